@@ -0,0 +1,65 @@
+"""
+Shared helpers for the benchmarks, they run on any platform by using the fakes from the test suite.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "test"))
+
+import _fakes  # noqa: E402,F401
+from _fakes import RecordingRunner  # noqa: E402,F401
+
+
+def default_executable() -> str:
+    """
+    Returns:
+        PowerShell on Windows, a no-op command elsewhere, used to measure process launch cost
+    """
+    if sys.platform == 'win32':
+        return "powershell.exe"
+    return shutil.which("true") or "true"
+
+
+class LaunchRunner:
+    """
+    Run each script in a real child process and wait for it, so the launch cost is part of the measurement.
+    """
+    def __init__(self, executable: str = ''):
+        self.executable = executable or default_executable()
+        self.launches = 0
+
+    def __call__(self, *, file='', command=''):
+        self.launches += 1
+        subprocess.run([self.executable, "-ExecutionPolicy", "Bypass", "-Command", command or file],
+                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        from winotify import _runner
+        self._previous = _runner._current
+        _runner._current = self
+        return self
+
+    def __exit__(self, *exc):
+        from winotify import _runner
+        _runner._current = self._previous
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """
+    Returns:
+        The fastest of `repeat` runs of `func`, in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
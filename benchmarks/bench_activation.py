@@ -0,0 +1,79 @@
+"""
+Time from a toast click until the running app receives the callback: relaunching the app script (the default
+registry command) versus the fast activation trampoline.
+
+    python benchmarks/bench_activation.py [--runs N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from _support import ROOT
+
+from winotify._communication import Listener
+from winotify._registry import ACTIVATE_SCRIPT, format_name
+
+APP = """\
+import sys
+sys.path[:0] = [{root!r}, {test!r}]
+import _fakes
+import winotify
+
+registry = winotify.Registry({app_id!r}, winotify.PY_EXE, __file__)
+notifier = winotify.Notifier(registry)
+"""
+
+
+def run(runs=10):
+    app_id = "winotify bench " + uuid.uuid4().hex[:8]
+    url = format_name(app_id) + ":clicked"
+    workdir = tempfile.mkdtemp()
+    script = os.path.join(workdir, "app.py")
+    with open(script, "w") as f:
+        f.write(APP.format(root=ROOT, test=os.path.join(ROOT, "test"), app_id=app_id))
+    pidfile = os.path.join(tempfile.gettempdir(), app_id + ".pid")
+
+    listener = Listener(app_id)
+    received = threading.Semaphore(0)
+    listener.callbacks["clicked"] = received.release
+    listener.start()
+    with open(pidfile, "w") as f:
+        f.write(str(os.getpid()))
+
+    commands = {
+        "relaunch_ms": [sys.executable, script, url],
+        "trampoline_ms": [sys.executable, ACTIVATE_SCRIPT, app_id, script, url],
+    }
+    results = {}
+    try:
+        for name, cmd in commands.items():
+            total = 0.0
+            for _ in range(runs):
+                start = time.perf_counter()
+                subprocess.run(cmd, check=True)
+                if not received.acquire(timeout=10):
+                    raise RuntimeError("the callback was not delivered")
+                total += time.perf_counter() - start
+            results[name] = total / runs * 1e3
+    finally:
+        listener.close()
+        os.unlink(pidfile)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10, help="activations per measurement")
+    args = parser.parse_args()
+
+    for name, value in run(args.runs).items():
+        print("{:<16} {:>10.1f}".format(name, value))
+
+
+if __name__ == '__main__':
+    main()
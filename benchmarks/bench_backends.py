@@ -0,0 +1,45 @@
+"""
+Toasts per second through `Batch` into the in-memory `RecordingBackend`, with and without rendering the XML,
+which is the ceiling of any pipeline load-tested on top of it.
+
+    python benchmarks/bench_backends.py [--number N]
+"""
+import argparse
+import time
+
+from _support import RecordingRunner  # noqa: F401  (installs the fakes)
+
+from winotify import Batch, Notification, RecordingBackend
+
+
+def toasts_per_sec(number, render):
+    toasts = [Notification("bench", "Build #{} finished".format(i), "All 128 tests passed") for i in range(number)]
+    backend = RecordingBackend(max_records=1000, render=render)
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        with Batch(500, backend) as batch:
+            for toast in toasts:
+                batch.add(toast)
+        best = min(best, time.perf_counter() - start)
+    return number / best
+
+
+def run(number=200000):
+    return {
+        "rendered_per_sec": toasts_per_sec(number, render=True),
+        "unrendered_per_sec": toasts_per_sec(number, render=False),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=200000, help="toasts per measurement")
+    args = parser.parse_args()
+
+    for name, value in run(args.number).items():
+        print("{:<20} {:>12,.0f}".format(name, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Per-toast cost of showing N toasts one by one versus with `Notifier.show_many`.
+
+    python benchmarks/bench_batch.py [--executable PATH]
+"""
+import argparse
+
+from _support import LaunchRunner, best_of
+
+from winotify import Batch, Notification
+
+
+def toasts(n):
+    return (Notification("bench", "title {}".format(i), "message {}".format(i)) for i in range(n))
+
+
+def run(sizes=(1, 10, 50, 200), executable=''):
+    results = []
+    with LaunchRunner(executable):
+        for n in sizes:
+            def one_by_one():
+                for toast in toasts(n):
+                    toast.show()
+
+            def batched():
+                with Batch() as batch:
+                    for toast in toasts(n):
+                        batch.add(toast)
+
+            results.append({
+                "n": n,
+                "single_ms_per_toast": best_of(one_by_one) / n * 1e3,
+                "batch_ms_per_toast": best_of(batched) / n * 1e3,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--executable", default='', help="the command each script is run with")
+    args = parser.parse_args()
+
+    print("{:>6} {:>16} {:>16}".format("N", "single ms/toast", "batch ms/toast"))
+    for r in run(executable=args.executable):
+        print("{n:>6} {single_ms_per_toast:>16.3f} {batch_ms_per_toast:>16.3f}".format(**r))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Throughput of the hot paths of the library: building and rendering toasts, `add_actions`,
+`Notifier.create_notification`, the callback round trip through a real `Listener`/`Sender` pair,
+and how fast `Notifier.update()` drains queued callbacks.
+
+    python benchmarks/bench_core.py [--number N] [--round-trips N]
+"""
+import argparse
+import threading
+import time
+import timeit
+import uuid
+
+from _support import RecordingRunner  # noqa: F401  (installs the fakes)
+from _fakes import registry
+
+from winotify import Notification, Notifier, audio, script_prefix
+from winotify._communication import Sender
+
+
+def _rate(func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    return number / seconds
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_toasts(number):
+    def construct():
+        Notification("bench", "Build finished", "All 128 tests passed", launch="https://example.com")
+
+    toast = Notification("bench", "Build finished", "All 128 tests passed", launch="https://example.com")
+    toast.set_audio(audio.Default, loop=False)
+
+    def add_actions():
+        toast.actions = ()
+        toast.add_actions("Open", "https://example.com/build")
+        toast.add_actions("Dismiss", "")
+
+    def render():
+        script_prefix(toast.app_id) + toast._render()
+
+    return {
+        "construct_per_sec": _rate(construct, number),
+        "add_actions_per_sec": _rate(add_actions, number) * 2,
+        "render_per_sec": _rate(render, number),
+    }
+
+
+def bench_notifier(number, round_trips):
+    app_id = "winotify bench " + uuid.uuid4().hex[:8]
+    notifier = Notifier(registry(app_id), queue_size=number)
+    results = {}
+    try:
+        @notifier.register_callback
+        def clicked():
+            pass
+
+        @notifier.register_callback(run_in_main_thread=True)
+        def queued():
+            pass
+
+        results["create_notification_per_sec"] = _rate(
+            lambda: notifier.create_notification("Build finished", "All tests passed", launch=clicked), number)
+
+        # update() draining a full queue, without IPC in the way
+        for _ in range(number):
+            notifier.listener.queue.put(queued)
+        start = time.perf_counter()
+        while notifier.update():
+            pass
+        results["update_per_sec"] = number / (time.perf_counter() - start)
+
+        notifier.listener.start()
+        received = threading.Event()
+        notifier.listener.callbacks["ping"] = received.set
+        latencies = []
+        for _ in range(round_trips):
+            received.clear()
+            start = time.perf_counter()
+            Sender(app_id).send("ping")
+            if not received.wait(10):
+                raise RuntimeError("the callback was not delivered")
+            latencies.append(time.perf_counter() - start)
+        results["round_trip_p50_ms"] = _percentile(latencies, 0.5) * 1e3
+        results["round_trip_p99_ms"] = _percentile(latencies, 0.99) * 1e3
+
+        # activations sent from another thread, run by update() in this one
+        n = min(number, round_trips * 10)
+
+        def send_all():
+            for _ in range(n):
+                Sender(app_id).send("queued")
+
+        sender = threading.Thread(target=send_all)
+        start = time.perf_counter()
+        sender.start()
+        for _ in range(n):
+            if not notifier.update(timeout=10):
+                raise RuntimeError("the callback was not delivered")
+        results["update_via_ipc_per_sec"] = n / (time.perf_counter() - start)
+        sender.join()
+    finally:
+        notifier.listener.close()
+    return results
+
+
+def run(number=20000, round_trips=200):
+    results = bench_toasts(number)
+    results.update(bench_notifier(number, round_trips))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000, help="calls per measurement")
+    parser.add_argument("--round-trips", type=int, default=200, help="callbacks sent through the listener")
+    args = parser.parse_args()
+
+    for name, value in run(args.number, args.round_trips).items():
+        print("{:<28} {:>12,.2f}".format(name, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Cost of resolving icons through an `IconCache`: cold (read, hash and convert or copy every image), warm (the same
+cache again, one stat per icon) and reopened (a new cache on the same directory, as in the next run of the app,
+which hashes the images again but finds the converted files).
+
+With Pillow the images are 2048x2048 PNGs downscaled to 256 pixels, without it they are 2 MB files copied as they
+are.
+
+    python benchmarks/bench_icons.py [--number N]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import _support  # noqa: F401  (installs the fakes)
+
+from winotify import IconCache
+from winotify._assets import _pillow
+
+
+def make_images(directory, number):
+    image = _pillow()
+    paths = []
+    for i in range(number):
+        path = os.path.join(directory, "image{}.png".format(i))
+        if image is not None:
+            image.new("RGB", (2048, 2048), (i % 256, 128, 64)).save(path)
+        else:
+            with open(path, "wb") as f:
+                f.write(os.urandom(2 * 1024 * 1024))
+        paths.append(path)
+    return paths
+
+
+def resolve_all(cache, paths):
+    start = time.perf_counter()
+    for path in paths:
+        cache.resolve(path)
+    return (time.perf_counter() - start) / len(paths) * 1e6
+
+
+def run(number=20):
+    directory = tempfile.mkdtemp()
+    try:
+        paths = make_images(directory, number)
+        icons = os.path.join(directory, "icons")
+        cache = IconCache(icons)
+        results = {"cold_us": resolve_all(cache, paths),
+                   "warm_us": min(resolve_all(cache, paths) for _ in range(5)),
+                   "reopened_us": resolve_all(IconCache(icons), paths)}
+        sizes = [os.path.getsize(path) for path in paths]
+        results["source_bytes"] = sum(sizes) / len(sizes)
+        results["cached_bytes"] = cache.size / len(cache)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20, help="distinct images per measurement")
+    args = parser.parse_args()
+
+    for name, value in run(args.number).items():
+        print("{:<20} {:>14,.1f}".format(name, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Cost of a `Journal` on the show path: toasts per second shown one by one into a `RecordingBackend` without and
+with a journal, the cost of one `record` call, and how many events per second the background writer stores.
+
+    python benchmarks/bench_journal.py [--number N]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from _support import RecordingRunner  # noqa: F401  (installs the fakes)
+
+from winotify import Journal, Notification, RecordingBackend, set_journal
+from winotify._journal import SHOW
+
+
+def toasts_per_sec(number):
+    toasts = [Notification("bench", "Build #{} finished".format(i), "All 128 tests passed") for i in range(number)]
+    backend = RecordingBackend(max_records=1000, render=False)
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for toast in toasts:
+            toast.show(backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return number / best
+
+
+def run(number=50000):
+    directory = tempfile.mkdtemp()
+    try:
+        results = {"plain_per_sec": toasts_per_sec(number)}
+        journal = Journal(os.path.join(directory, "journal.sqlite"), flush_interval=3600, max_pending=number * 4)
+        set_journal(journal)
+        try:
+            results["journaled_per_sec"] = toasts_per_sec(number)
+        finally:
+            set_journal(None)
+        journal.flush()
+
+        start = time.perf_counter()
+        for i in range(number):
+            journal.record(SHOW, "bench", "tag", "group", 0.001)
+        results["record_us"] = (time.perf_counter() - start) / number * 1e6
+        start = time.perf_counter()
+        journal.flush()
+        results["written_per_sec"] = number / (time.perf_counter() - start)
+        journal.close()
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=50000, help="toasts per measurement")
+    args = parser.parse_args()
+
+    for name, value in run(args.number).items():
+        print("{:<20} {:>12,.2f}".format(name, value))
+
+
+if __name__ == '__main__':
+    main()
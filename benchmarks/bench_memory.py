@@ -0,0 +1,89 @@
+"""
+Bytes per toast waiting in a `Scheduler`, measured with tracemalloc, compared with the previous layout of
+`Notification`: an instance dict, actions kept as XML strings and the rendered script kept after `show()`.
+
+    python benchmarks/bench_memory.py [--number N]
+"""
+import argparse
+import functools
+import gc
+import tracemalloc
+
+from _support import RecordingRunner  # noqa: F401  (installs the fakes)
+
+from winotify import Notification, Scheduler, audio
+from winotify._scheduler import _Entry
+
+
+class LegacyNotification:
+    """
+    The attributes `Notification` had before it used `__slots__`.
+    """
+    def __init__(self, app_id, title, msg="", icon="", duration='short', launch=''):
+        self.app_id = app_id
+        self.title = title
+        self.msg = msg
+        self.icon = icon
+        self.duration = duration
+        self.launch = launch
+        self.audio = audio.Silent
+        self.tag = self.title
+        self.group = self.app_id
+        self.actions = []
+        self.script = ""
+
+    def add_actions(self, label, launch=""):
+        xml = '<action activationType="protocol" content="{label}" arguments="{link}" />'
+        if len(self.actions) < 5:
+            self.actions.append(xml.format(label=label, link=launch))
+
+
+def make(cls, i, show):
+    toast = cls("bench", "Build #{} finished".format(i), "All 128 tests passed", launch="https://example.com")
+    toast.add_actions("Open", "https://example.com/build/{}".format(i))
+    toast.add_actions("Dismiss", "")
+    if show and cls is LegacyNotification:
+        toast.script = make(Notification, i, False).script  # what show() kept on the toast
+    return toast
+
+
+def queue(scheduler, toast):
+    # what `Scheduler.submit` keeps of a toast, without validating it: legacy actions are XML strings
+    scheduler._seq += 1
+    scheduler._pending[(toast.app_id, toast.group, toast.tag)] = _Entry(toast, 0, scheduler._seq)
+
+
+def bytes_per_toast(cls, number, show):
+    scheduler = Scheduler(max_pending=number + 1)
+    submit = functools.partial(queue, scheduler) if cls is LegacyNotification else scheduler.submit
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(number):
+            submit(make(cls, i, show))
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / number
+
+
+def run(number=10000):
+    return {
+        "legacy_bytes_per_toast": bytes_per_toast(LegacyNotification, number, show=False),
+        "legacy_shown_bytes_per_toast": bytes_per_toast(LegacyNotification, number, show=True),
+        "bytes_per_toast": bytes_per_toast(Notification, number, show=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=10000, help="toasts queued per measurement")
+    args = parser.parse_args()
+
+    for name, value in run(args.number).items():
+        print("{:<30} {:>10,.0f}".format(name, value))
+
+
+if __name__ == '__main__':
+    main()
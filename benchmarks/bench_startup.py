@@ -0,0 +1,61 @@
+"""
+Cost of `Registry(...)` at startup: the first registration, a restart without the stamp file (values are read
+and compared, nothing is written), and a restart with the stamp file (only the key's last write time is read).
+
+On Windows this registers the protocol "winotify-bench" in the real registry, elsewhere the in-memory fake is used,
+where reading values costs next to nothing, so only the number of writes is meaningful there.
+
+    python benchmarks/bench_startup.py [--number N]
+"""
+import argparse
+import tempfile
+import timeit
+
+import _support  # noqa: F401  (installs the fakes)
+from _fakes import _make_winreg, winreg
+
+from winotify import PY_EXE, Registry
+
+APP_ID = "winotify bench"
+COMMAND_KEY = r"SOFTWARE\Classes\winotify-bench\shell\open\command"
+
+
+def run(number=2000):
+    stamp_dir = tempfile.mkdtemp()
+
+    def first():
+        if hasattr(winreg, "store"):  # the in-memory fake, start from an empty registry
+            backend = _make_winreg()
+        else:  # the real registry, make the command outdated
+            backend = winreg
+            with winreg.CreateKey(winreg.HKEY_CURRENT_USER, COMMAND_KEY) as key:
+                winreg.SetValueEx(key, '', 0, winreg.REG_SZ, "outdated")
+        Registry(APP_ID, PY_EXE, __file__, stamp_dir=None, winreg=backend)
+
+    def unchanged():
+        Registry(APP_ID, PY_EXE, __file__, stamp_dir=None, winreg=winreg)
+
+    def stamped():
+        Registry(APP_ID, PY_EXE, __file__, stamp_dir=stamp_dir, winreg=winreg)
+
+    results = {}
+    for name, func in (("register", first), ("unchanged", unchanged), ("stamped", stamped)):
+        func()  # also creates the stamp before it is timed
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        results[name + "_us"] = seconds / number * 1e6
+    results["unchanged_writes"] = Registry(APP_ID, PY_EXE, __file__, stamp_dir=None, winreg=winreg).writes
+    results["stamped_writes"] = Registry(APP_ID, PY_EXE, __file__, stamp_dir=stamp_dir, winreg=winreg).writes
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=2000, help="registrations per measurement")
+    args = parser.parse_args()
+
+    for name, value in run(args.number).items():
+        print("{:<20} {:>10.1f}".format(name, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Run the benchmarks and write their results as JSON, optionally comparing them with a previous run.
+
+    python benchmarks/run.py [-o results.json] [--compare baseline.json] [--threshold 0.2] [bench_core ...]
+
+Metrics ending in `_per_sec` are better when higher, every other metric (latencies, seconds) when lower.
+The exit code is 1 if any metric regressed by more than the threshold.
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import json
+import platform
+import subprocess
+import sys
+
+from _support import ROOT
+
+import winotify
+
+BENCHMARKS = ("bench_core", "bench_render", "bench_memory", "bench_startup", "bench_backends", "bench_batch",
+              "bench_activation", "bench_journal", "bench_icons", "bench_escape")
+
+
+def _revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _flatten(result, prefix=''):
+    # bench_batch returns a list of rows, one per batch size
+    if isinstance(result, list):
+        flat = {}
+        for row in result:
+            row = dict(row)
+            label = "n{}_".format(row.pop("n")) if "n" in row else ""
+            flat.update(_flatten(row, prefix + label))
+        return flat
+    return {prefix + key: value for key, value in result.items() if isinstance(value, (int, float))}
+
+
+def collect(names=BENCHMARKS) -> dict:
+    """
+    Returns:
+        The environment and the metrics of every benchmark in `names`, keyed by benchmark then metric
+    """
+    results = {}
+    for name in names:
+        print("running", name, file=sys.stderr)
+        with contextlib.redirect_stdout(sys.stderr):  # keep stdout for the JSON
+            results[name] = _flatten(importlib.import_module(name).run())
+    return {
+        "version": winotify.__version__,
+        "revision": _revision(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Returns:
+        (benchmark, metric, old, new, change) for every metric worse than `threshold` (a fraction) in `current`
+    """
+    regressions = []
+    for bench, metrics in current["results"].items():
+        old_metrics = baseline.get("results", {}).get(bench, {})
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if metric.endswith("_per_sec") else change
+            if worse > threshold:
+                regressions.append((bench, metric, old, new, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("benchmarks", nargs="*", default=BENCHMARKS, help="benchmark modules to run")
+    parser.add_argument("-o", "--output", default='', help="write the JSON here instead of stdout")
+    parser.add_argument("--compare", default='', help="a previous JSON output to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    report = collect(args.benchmarks)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for bench, metric, old, new, change in regressions:
+            print("REGRESSION {}.{}: {:.4g} -> {:.4g} ({:+.0%})".format(bench, metric, old, new, change),
+                  file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
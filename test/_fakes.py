@@ -0,0 +1,206 @@
+"""
+Stand-ins for the Windows-only pieces of winotify, so the test suite can run on any platform.
+
+Import this module before importing winotify.
+"""
+import os
+import sys
+import types
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _make_winreg():
+    winreg = types.ModuleType("winreg")
+    winreg.HKEY_CURRENT_USER = "HKCU"
+    winreg.REG_SZ = 1
+    winreg.store = {}  # path -> {name: value}
+    winreg.modified = {}  # path -> last write "time", a counter so every write changes it
+    winreg.writes = 0
+
+    class Key:
+        def __init__(self, path):
+            self.path = path
+
+        def Close(self):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.Close()
+
+    def _path(key, sub):
+        base = key.path if isinstance(key, Key) else key
+        return base + "\\" + sub if sub else base
+
+    def ConnectRegistry(computer, key):
+        return Key(key)
+
+    def OpenKey(key, sub, *args):
+        path = _path(key, sub)
+        if path not in winreg.store:
+            raise FileNotFoundError(path)
+        return Key(path)
+
+    def _touch(path):
+        winreg.writes += 1
+        winreg.modified[path] = winreg.writes
+
+    def CreateKey(key, sub):
+        path = _path(key, sub)
+        if path not in winreg.store:
+            winreg.store[path] = {}
+            _touch(path)
+        return Key(path)
+
+    def SetValueEx(key, name, reserved, type_, value):
+        winreg.store[key.path][name] = value
+        _touch(key.path)
+
+    def QueryInfoKey(key):
+        return 0, len(winreg.store[key.path]), winreg.modified[key.path]
+
+    def QueryValueEx(key, name):
+        try:
+            return winreg.store[key.path][name], winreg.REG_SZ
+        except KeyError:
+            raise FileNotFoundError(name) from None
+
+    winreg.Key = Key
+    winreg.ConnectRegistry = ConnectRegistry
+    winreg.OpenKey = OpenKey
+    winreg.CreateKey = CreateKey
+    winreg.SetValueEx = SetValueEx
+    winreg.QueryValueEx = QueryValueEx
+    winreg.QueryInfoKey = QueryInfoKey
+    return winreg
+
+
+def install_winreg():
+    """
+    Put an in-memory `winreg` into `sys.modules` unless the real one is available.
+
+    Returns:
+        The `winreg` module in use
+    """
+    try:
+        import winreg
+    except ImportError:
+        winreg = sys.modules["winreg"] = _make_winreg()
+    return winreg
+
+
+
+class Clock:
+    """
+    A clock which only moves when told to, for the `clock` arguments of winotify.
+    """
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class RecordingRunner:
+    """
+    A runner that keeps the scripts instead of running them.
+    """
+    def __init__(self):
+        self.scripts = []
+
+    def __call__(self, *, file='', command=''):
+        self.scripts.append(command or file)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        from winotify import _runner
+        self._previous = _runner._current
+        _runner._current = self
+        return self
+
+    def __exit__(self, *exc):
+        from winotify import _runner
+        _runner._current = self._previous
+
+
+class FakeListener:
+    """
+    A `Listener` without a pipe, activations are simulated with `activate`.
+    """
+    def __init__(self, key, queue_size=64):
+        import threading
+        from winotify._communication import CallbackQueue
+        self.key = key
+        self.callbacks = {}
+        self.contexts = None
+        self.queue = CallbackQueue(queue_size)
+        self.thread = threading.Thread(target=lambda: None, daemon=True)
+        self.dispatch = self.run_callback
+
+    def run_callback(self, func):
+        if hasattr(func, 'rimt'):
+            self.queue.put(func)
+        else:
+            func()
+
+    def activate(self, target):
+        """
+        Dispatch the callback of `target`, a route and its arguments, from another thread, like the real listener
+        does, and wait for it.
+        """
+        import threading
+        from winotify._routing import resolve
+        t = threading.Thread(target=self.dispatch, args=(resolve(target, self.callbacks, self.contexts),))
+        t.start()
+        t.join()
+
+
+def registry(app_id):
+    """
+    Returns:
+        An object usable as the `registry` argument of `Notifier`, without touching `winreg`
+    """
+    import types
+    return types.SimpleNamespace(app_id=app_id)
+
+
+def fake_powershell(directory):
+    """
+    Write an executable named powershell to `directory`, which runs fake_powershell.py.
+
+    Returns:
+        Its path, usable as the executable of a runner
+    """
+    import stat
+    executable = os.path.join(directory, "powershell")
+    with open(os.path.join(_HERE, "fake_powershell.py"), encoding='utf-8') as src, \
+            open(executable, 'w', encoding='utf-8') as f:
+        f.write("#!{}\n{}".format(sys.executable, src.read()))
+    os.chmod(executable, os.stat(executable).st_mode | stat.S_IXUSR)
+    return executable
+
+
+def run_python(code, **env):
+    """
+    Run `code` in a new interpreter, which imports the fakes then winotify, and wait for it to exit.
+
+    Args:
+        code: The statements to run
+        **env: Environment variables to set, eg. for fake_powershell.py
+    """
+    import subprocess
+    environ = dict(os.environ, **env)
+    environ["PYTHONPATH"] = os.pathsep.join([_HERE, os.path.dirname(_HERE), environ.get("PYTHONPATH", "")])
+    subprocess.run([sys.executable, "-c", "import _fakes\nimport winotify\n" + code], env=environ, check=True,
+                   timeout=30)
+
+
+winreg = install_winreg()
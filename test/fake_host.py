@@ -0,0 +1,27 @@
+"""
+A stand-in for the PowerShell host used by `HostRunner`.
+
+Reads framed scripts from stdin and appends "<pid> <script>" lines to the file given as the first argument.
+A script reading "exit" makes the host quit, simulating a crash.
+"""
+import io
+import os
+import sys
+
+
+def main():
+    out = sys.argv[1]
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    while True:
+        header = stdin.readline()
+        if not header:
+            break
+        script = stdin.read(int(header))
+        if script == "exit":
+            sys.exit(1)
+        with open(out, 'a', encoding='utf-8') as f:
+            f.write("{} {}\n".format(os.getpid(), script.replace("\n", "\\n")))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+A stand-in for powershell.exe used by `ProcessPool`, run as `fake_powershell.py -ExecutionPolicy Bypass -Command ...`.
+
+Commands are "sleep <seconds>" and "fail <exit code> <message>", which writes the message to stderr.
+Run as `fake_powershell.py -ExecutionPolicy Bypass -file <path>`, it waits $FAKE_POWERSHELL_DELAY seconds then
+appends "OK <path>" or "MISSING <path>" to the file $FAKE_POWERSHELL_OUT.
+"""
+import os
+import sys
+import time
+
+
+def main():
+    if "-file" in sys.argv:
+        path = sys.argv[sys.argv.index("-file") + 1]
+        time.sleep(float(os.environ.get("FAKE_POWERSHELL_DELAY", "0")))
+        with open(os.environ["FAKE_POWERSHELL_OUT"], 'a', encoding='utf-8') as f:
+            f.write("{} {}\n".format("OK" if os.path.exists(path) else "MISSING", path))
+        return
+    words = sys.argv[sys.argv.index("-Command") + 1].split(" ", 2)
+    if words[0] == "sleep":
+        time.sleep(float(words[1]))
+    elif words[0] == "fail":
+        sys.stderr.write(words[2])
+        sys.exit(int(words[1]))
+
+
+if __name__ == '__main__':
+    main()
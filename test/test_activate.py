@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+
+from _fakes import winreg
+from winotify import Registry, PY_EXE
+from winotify._communication import Listener
+from winotify._registry import ACTIVATE_SCRIPT
+
+
+class ActivateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app_id = "winotify test " + uuid.uuid4().hex[:8]
+        self.pidfile = os.path.join(tempfile.gettempdir(), self.app_id + ".pid")
+        fd, self.out = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, self.out)
+        self.script = os.path.join(tempfile.mkdtemp(), "app.py")
+        with open(self.script, "w") as f:
+            f.write("import sys\nopen({!r}, 'w').write(repr(sys.argv[1:]))\n".format(self.out))
+
+    def activate(self, url):
+        return subprocess.run([sys.executable, ACTIVATE_SCRIPT, self.app_id, self.script, url], timeout=30)
+
+    def started_with(self, timeout=10.0):
+        # the app is started without waiting for it, wait for it to write its arguments
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with open(self.out) as f:
+                written = f.read()
+            if written:
+                return written
+            time.sleep(0.02)
+        return ''
+
+    def test_forward_to_running_instance(self):
+        listener = Listener(self.app_id)
+        self.addCleanup(listener.close)
+        called = threading.Event()
+        listener.callbacks["foo"] = called.set
+        listener.start()
+        with open(self.pidfile, "w") as f:
+            f.write(str(os.getpid()))
+        self.addCleanup(os.unlink, self.pidfile)
+
+        self.assertEqual(self.activate("winotify-test:foo").returncode, 0)
+        self.assertTrue(called.wait(5))
+        with open(self.out) as f:
+            self.assertEqual(f.read(), "")
+
+    def test_start_app_when_not_running(self):
+        self.assertEqual(self.activate("winotify-test:foo").returncode, 0)
+        self.assertEqual(self.started_with(), repr(["winotify-test:foo"]))
+
+    def test_does_not_wait_for_app(self):
+        with open(self.script, "w") as f:
+            f.write("import sys, time\ntime.sleep(3)\nopen({!r}, 'w').write(repr(sys.argv[1:]))\n".format(self.out))
+        start = time.monotonic()
+        self.assertEqual(self.activate("winotify-test:foo").returncode, 0)
+        self.assertLess(time.monotonic() - start, 2.5)
+        self.assertEqual(self.started_with(), repr(["winotify-test:foo"]))
+
+    def test_start_app_on_stale_pidfile(self):
+        with open(self.pidfile, "w") as f:
+            f.write("0")
+        self.addCleanup(os.unlink, self.pidfile)
+        self.assertEqual(self.activate("winotify-test:foo").returncode, 0)
+        self.assertEqual(self.started_with(), repr(["winotify-test:foo"]))
+
+    def test_does_not_import_winotify(self):
+        result = subprocess.run([sys.executable, "-c",
+                                 "import runpy, sys; runpy.run_path({!r}); "
+                                 "print('winotify' in sys.modules)".format(ACTIVATE_SCRIPT)],
+                                capture_output=True, text=True, timeout=30)
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+class RegistryCommandTestCase(unittest.TestCase):
+    def test_fast_activation_command(self):
+        reg = Registry("winotify test", PY_EXE, r"C:\app.py", fast_activation=True)
+        value = winreg.QueryValueEx(winreg.OpenKey(winreg.HKEY_CURRENT_USER,
+                                                   r"SOFTWARE\Classes\winotify-test\shell\open\command"), '')[0]
+        self.assertEqual(value, reg.command)
+        self.assertIn(ACTIVATE_SCRIPT, value)
+        self.assertTrue(value.endswith(r'"winotify test" "C:\app.py" "%1"'))
+
+    def test_default_command(self):
+        reg = Registry("winotify test", PY_EXE, r"C:\app.py")
+        self.assertEqual(reg.command, r"{} C:\app.py %1".format(PY_EXE))
+
+
+if __name__ == '__main__':
+    unittest.main()
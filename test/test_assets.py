@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from _fakes import FakeListener, registry
+import winotify
+from winotify import IconCache, _assets, _communication
+
+ICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon.png")
+
+
+def path_of(url):
+    return url2pathname(urlparse(url).path)
+
+
+class IconCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.sources = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sources, True)
+        patcher = mock.patch.object(_assets, "_pillow", lambda: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cache(self, **kwargs):
+        return IconCache(os.path.join(self.directory, "icons"), **kwargs)
+
+    def image(self, name, content=b"\x89PNG fake"):
+        path = os.path.join(self.sources, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_copy_without_pillow(self):
+        cache = self.cache()
+        url = cache.resolve(ICON)
+        self.assertTrue(url.startswith("file:///"))
+        with open(path_of(url), "rb") as cached, open(ICON, "rb") as original:
+            self.assertEqual(cached.read(), original.read())
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_warm_hit(self):
+        cache = self.cache()
+        first = cache.resolve(ICON)
+        self.assertEqual(cache.resolve(ICON), first)
+        self.assertEqual(cache.resolve(Path(ICON).as_uri()), first)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_same_content_is_stored_once(self):
+        cache = self.cache()
+        first = cache.resolve(self.image("a.png"))
+        second = cache.resolve(self.image("b.PNG"))
+        self.assertEqual(first, second)
+        self.assertEqual(len(cache), 1)
+
+    def test_changed_source_is_reloaded(self):
+        cache = self.cache()
+        path = self.image("a.png")
+        first = cache.resolve(path)
+        self.image("a.png", b"\x89PNG other content")
+        os.utime(path, ns=(1, 1))
+        self.assertNotEqual(cache.resolve(path), first)
+
+    def test_eviction(self):
+        cache = self.cache(max_entries=2)
+        urls = [cache.resolve(self.image("{}.png".format(i), b"x" * (i + 1))) for i in range(3)]
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(os.path.exists(path_of(urls[0])))
+        self.assertTrue(os.path.exists(path_of(urls[2])))
+        self.assertEqual(cache.evicted, 1)
+
+    def test_eviction_by_size(self):
+        cache = self.cache(max_bytes=250)
+        first = cache.resolve(self.image("a.png", b"a" * 100))
+        second = cache.resolve(self.image("b.png", b"b" * 100))
+        cache.resolve(first)  # second is now the least recently used
+        cache.resolve(self.image("c.png", b"c" * 100))
+        self.assertTrue(os.path.exists(path_of(first)))
+        self.assertFalse(os.path.exists(path_of(second)))
+        self.assertLessEqual(cache.size, 250)
+
+    def test_outlives_the_process(self):
+        url = self.cache().resolve(ICON)
+        cache = self.cache()
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.resolve(ICON), url)
+
+    def test_unsupported_format_without_pillow(self):
+        with self.assertRaises(ValueError):
+            self.cache().resolve(self.image("icon.bmp"))
+
+    def test_missing_file(self):
+        with self.assertRaises(OSError):
+            self.cache().resolve(os.path.join(self.sources, "missing.png"))
+
+    def test_clear(self):
+        cache = self.cache()
+        url = cache.resolve(ICON)
+        cache.clear()
+        self.assertFalse(os.path.exists(path_of(url)))
+        self.assertEqual(cache.stats, {"hits": 0, "misses": 1, "evicted": 0, "entries": 0, "bytes": 0})
+
+    def test_notifier_icons(self):
+        with mock.patch.object(_communication, "Listener", FakeListener):
+            notifier = winotify.Notifier(registry("icon test"), icons=self.cache())
+        toast = notifier.create_notification("title", icon=ICON)
+        self.assertTrue(toast.icon.startswith("file:///"))
+        notifier.set_icon(ICON)
+        self.assertEqual(notifier.icon, toast.icon)
+
+
+    def test_remote_urls_are_kept(self):
+        cache = self.cache()
+        for url in ("https://example.com/a.png", "http://example.com/a.png", "ms-appx:///Assets/a.png",
+                    "ms-appdata:///local/a.png"):
+            self.assertEqual(cache.resolve(url), url)
+        self.assertEqual(len(cache), 0)
+
+    def test_async_notifier_icons(self):
+        with mock.patch.object(_communication, "Listener", FakeListener):
+            notifier = winotify.AsyncNotifier(registry("icon test"), icons=self.cache(), connect_timeout=1.0)
+        self.assertTrue(notifier.create_notification("title", icon=ICON).icon.startswith("file:///"))
+        toast = notifier.create_notification("title", icon="https://example.com/a.png")
+        self.assertEqual(toast.icon, "https://example.com/a.png")
+
+@unittest.skipIf(_assets._pillow() is None, "Pillow is not installed")
+class PillowTestCase(unittest.TestCase):
+    def test_downscale_to_png(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        Image = _assets._pillow()
+        source = os.path.join(directory, "big.bmp")
+        Image.new("RGB", (1024, 512), "red").save(source)
+
+        cache = IconCache(os.path.join(directory, "icons"), max_size=64)
+        url = cache.resolve(source)
+        self.assertTrue(url.endswith("-64.png"))
+        with Image.open(path_of(url)) as img:
+            self.assertEqual(img.size, (64, 32))
+
+    def test_undecodable(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        source = os.path.join(directory, "broken.png")
+        with open(source, "wb") as f:
+            f.write(b"not an image")
+        with self.assertRaises(ValueError):
+            IconCache(os.path.join(directory, "icons")).resolve(source)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import asyncio
+import functools
+import inspect
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from _fakes import fake_powershell, FakeListener, RecordingRunner, registry
+from winotify import _communication
+from winotify import AsyncNotifier, _runner
+
+
+class AsyncNotifierTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(_communication, "Listener", FakeListener)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.commands = []
+        self.notifier = AsyncNotifier(registry("async test"), launcher=self.launch)
+
+    async def launch(self, cmd):
+        self.commands.append(cmd)
+        await asyncio.sleep(0)
+        return 0
+
+    def run_async(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 5))
+
+    def test_show_uses_launcher(self):
+        previous = _runner._current
+        _runner._current = _runner.ProcessRunner()
+        try:
+            toast = self.notifier.create_notification("title", "msg")
+            self.assertEqual(self.run_async(self.notifier.show(toast)), 0)
+            self.run_async(self.notifier.clear())
+        finally:
+            _runner._current = previous
+
+        self.assertEqual(len(self.commands), 2)
+        self.assertEqual(self.commands[0][-1], toast.script)
+        self.assertIn("History.Clear('async test')", self.commands[1][-1])
+
+    def test_show_with_other_runner(self):
+        with RecordingRunner() as runner:
+            toasts = [self.notifier.create_notification("title {}".format(i)) for i in range(5)]
+            self.run_async(self.notifier.show_many(toasts, chunk_size=2))
+        self.assertEqual(len(runner.scripts), 3)
+        self.assertEqual(self.commands, [])
+
+    @unittest.skipIf(os.name == 'nt', "the stand-in for PowerShell is a script with a shebang line")
+    def test_show_within_pool_limits(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cache = _runner.ScriptCache(directory=directory)
+        self.addCleanup(cache.clear)
+        pool = _runner.ProcessPool(fake_powershell(directory), cache, max_processes=2, poll_interval=0.005)
+        self.addCleanup(pool.close)
+
+        async def main():
+            toasts = [self.notifier.create_notification("title {}".format(i)) for i in range(10)]
+            return await asyncio.gather(*(self.notifier.show(toast) for toast in toasts))
+
+        previous = _runner._current
+        _runner._current = pool
+        start = time.monotonic()
+        try:
+            with mock.patch.dict(os.environ, FAKE_POWERSHELL_OUT=os.path.join(directory, "opened.txt"),
+                                 FAKE_POWERSHELL_DELAY="0.2"):
+                self.assertEqual(asyncio.run(asyncio.wait_for(main(), 10)), [0] * 10)
+        finally:
+            _runner._current = previous
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)  # 5 rounds of 2 processes
+        self.assertEqual(self.commands, [])
+        self.assertEqual((pool.stats["launched"], pool.stats["completed"]), (10, 10))
+
+    def test_coroutine_callback_runs_in_loop(self):
+        done = []
+
+        @self.notifier.register_callback
+        async def clicked():
+            done.append(threading.current_thread())
+
+        async def main():
+            await self.notifier.start()
+            self.notifier.listener.activate("clicked")
+            while not done:
+                await asyncio.sleep(0.01)
+
+        self.run_async(main())
+        self.assertIs(done[0], threading.main_thread())
+
+    def test_coroutine_callback_with_arguments(self):
+        done = []
+
+        @self.notifier.register_callback
+        async def clicked(id):
+            done.append((id, threading.current_thread()))
+
+        def py37_iscoroutinefunction(func):
+            # python 3.7 does not see through partials
+            return not isinstance(func, functools.partial) and inspect.iscoroutinefunction(func)
+
+        async def main():
+            await self.notifier.start()
+            url = self.notifier.callback_to_url(clicked, id=42)
+            self.notifier.listener.activate(url.split(":", 1)[1])
+            while not done:
+                await asyncio.sleep(0.01)
+
+        with mock.patch.object(asyncio, "iscoroutinefunction", py37_iscoroutinefunction):
+            self.run_async(main())
+        self.assertEqual(done, [("42", threading.main_thread())])
+
+    def test_main_thread_callback_runs_in_loop(self):
+        done = []
+
+        @self.notifier.register_callback(run_in_main_thread=True)
+        def clicked():
+            done.append(threading.current_thread())
+
+        async def main():
+            await self.notifier.start()
+            self.notifier.listener.activate("clicked")
+            while not done:
+                await asyncio.sleep(0.01)
+
+        self.run_async(main())
+        self.assertIs(done[0], threading.main_thread())
+        self.assertEqual(len(self.notifier.listener.queue), 0)
+
+    def test_main_thread_callbacks_after_loop_closed(self):
+        done = []
+
+        @self.notifier.register_callback(run_in_main_thread=True)
+        def clicked():
+            done.append(threading.current_thread())
+
+        @self.notifier.register_callback(run_in_main_thread=True)
+        def quit_():
+            self.notifier.stop()
+
+        self.run_async(self.notifier.start())
+        self.notifier.listener.activate("clicked")
+        self.assertEqual(self.notifier.drain(), 1)
+        self.assertEqual(done, [threading.main_thread()])
+        self.notifier.listener.activate("quit_")
+        self.notifier.run_forever()
+        self.assertFalse(self.notifier.update())
+
+    def test_activations_iterator(self):
+        @self.notifier.register_callback
+        def first():
+            pass
+
+        @self.notifier.register_callback
+        async def second():
+            pass
+
+        async def main():
+            await self.notifier.start()
+            seen = []
+            activations = self.notifier.activations()
+            waiter = asyncio.ensure_future(activations.__anext__())
+            await asyncio.sleep(0)
+            self.notifier.listener.activate("first")
+            seen.append(await waiter)
+            self.notifier.listener.activate("second")
+            seen.append(await activations.__anext__())
+            await activations.aclose()
+            return seen
+
+        self.assertEqual([f.__name__ for f in self.run_async(main())], ["first", "second"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from _fakes import FakeListener, RecordingRunner, registry
+from winotify import (AsyncNotifier, Batch, Notification, Notifier, ProgressNotification, RecordingBackend,
+                      WinRTBackend, _communication, set_runner)
+from winotify._progress import debouncer
+from winotify._runner import get_runner
+
+
+def notifier(backend, cls=Notifier):
+    with mock.patch.object(_communication, "Listener", FakeListener):
+        return cls(registry("backend test"), backend=backend)
+
+
+class RecordingBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.backend = RecordingBackend()
+
+    def test_show(self):
+        toast = Notification("backend test", "title", "msg", launch="https://example.com")
+        toast.add_actions("Open", "https://example.com/open")
+        with RecordingRunner() as runner:
+            toast.show(backend=self.backend)
+        self.assertEqual(runner.scripts, [])
+        record = self.backend.records[0]
+        self.assertEqual((record.app_id, record.tag, record.group), ("backend test", "title", "backend test"))
+        self.assertTrue(record.xml.startswith('<toast activationType="protocol" launch="https://example.com"'))
+        self.assertIn('content="Open"', record.xml)
+        self.assertNotIn("$", record.xml)
+
+    def test_as_current_runner(self):
+        previous = get_runner()
+        set_runner(self.backend)
+        self.addCleanup(set_runner, previous)
+        Notification("backend test", "title").show()
+        with Batch() as batch:
+            for i in range(3):
+                batch.add(Notification("backend test", str(i)))
+        self.assertEqual(self.backend.count, 4)
+
+    def test_notifier(self):
+        n = notifier(self.backend)
+        n.show(n.create_notification("one"))
+        n.show_many(n.create_notification(str(i)) for i in range(120))
+        n.clear()
+        self.assertEqual(self.backend.count, 121)
+        self.assertEqual(len(self.backend.scripts), 1)
+        self.assertIn("History.Clear('backend test')", self.backend.scripts[0])
+
+    def test_async_notifier(self):
+        n = notifier(self.backend, AsyncNotifier)
+
+        async def main():
+            await n.show(n.create_notification("one"))
+            await n.show_many([n.create_notification(str(i)) for i in range(5)], chunk_size=2)
+
+        asyncio.run(main())
+        self.assertEqual([r.tag for r in self.backend.records], ["one", "0", "1", "2", "3", "4"])
+
+    def test_progress_xml_keeps_bindings(self):
+        ProgressNotification("backend test", "download", value=0.5).show(backend=self.backend)
+        self.assertIn('value="{progressValue}"', self.backend.records[0].xml)
+
+    def test_progress_updates(self):
+        n = notifier(self.backend)
+        toast = n.create_progress_notification("Job " + str(time.monotonic()), status="queued")
+        with RecordingRunner() as runner:
+            toast.show()
+            toast.update(value=0.5)
+            n.update_data(toast.tag, {"status": "running"})
+            debouncer.flush()
+        self.assertEqual(runner.scripts, [])
+        self.assertEqual(self.backend.count, 1)
+        self.assertEqual([(u.tag, u.group, u.values, u.sequence) for u in self.backend.updates],
+                         [(toast.tag, "backend test", {"progressValue": "0.5000"}, 2),
+                          (toast.tag, "backend test", {"progressStatus": "running"}, 3)])
+
+    def test_progress_updates_with_current_runner(self):
+        previous = get_runner()
+        set_runner(self.backend)
+        self.addCleanup(set_runner, previous)
+        toast = ProgressNotification("backend test", "Job " + str(time.monotonic()), status="queued")
+        toast.show()
+        toast.update(value=0.5)
+        debouncer.flush()
+        self.assertEqual(self.backend.count, 1)
+        self.assertEqual([u.values for u in self.backend.updates], [{"progressValue": "0.5000"}])
+
+    def test_bounded(self):
+        backend = RecordingBackend(max_records=10, render=False)
+        toasts = [Notification("backend test", str(i)) for i in range(100)]
+        backend.show(toasts)
+        self.assertEqual(backend.count, 100)
+        self.assertEqual(list(backend.records), toasts[-10:])
+        backend.clear()
+        self.assertEqual((backend.count, len(backend.records)), (0, 0))
+
+    def test_throughput(self):
+        toasts = [Notification("backend test", str(i)) for i in range(20000)]
+        start = time.perf_counter()
+        with Batch(500, RecordingBackend()) as batch:
+            for toast in toasts:
+                batch.add(toast)
+        # 100k+ per second on a typical machine, with a wide margin for slow CI runners
+        self.assertGreater(len(toasts) / (time.perf_counter() - start), 20000)
+
+
+class WinRTBackendTestCase(unittest.TestCase):
+    def test_unavailable(self):
+        if WinRTBackend.available():
+            self.skipTest("winsdk is installed")
+        with self.assertRaises(ImportError):
+            WinRTBackend()
+
+
+if __name__ == '__main__':
+    unittest.main()
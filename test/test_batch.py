@@ -0,0 +1,149 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+from _fakes import fake_powershell, RecordingRunner, run_python
+from winotify import Batch, Notification, PREAMBLE, ProcessRunner
+from winotify._runner import MAX_COMMAND_LINE
+
+
+def toasts(n, app_id="batch test"):
+    for i in range(n):
+        yield Notification(app_id, "title {}".format(i), "message {}".format(i))
+
+
+class BatchTestCase(unittest.TestCase):
+    def test_one_script_for_many_toasts(self):
+        with RecordingRunner() as runner:
+            with Batch() as batch:
+                for toast in toasts(10):
+                    toast.show(batch=batch)
+
+        self.assertEqual(len(runner.scripts), 1)
+        script = runner.scripts[0]
+        self.assertEqual(script.count("CreateToastNotifier"), 1)
+        self.assertEqual(script.count("$Notifier.Show($Toast)"), 10)
+        self.assertEqual(script.count(PREAMBLE), 1)
+        self.assertLess(script.index("title 3"), script.index("title 4"))
+
+    def test_chunks(self):
+        with RecordingRunner() as runner:
+            with Batch(chunk_size=4) as batch:
+                for toast in toasts(10):
+                    batch.add(toast)
+                self.assertEqual(len(runner.scripts), 2)
+
+        self.assertEqual([s.count("$Notifier.Show") for s in runner.scripts], [4, 4, 2])
+
+    def test_generator_is_consumed_lazily(self):
+        consumed = []
+
+        def gen():
+            for toast in toasts(6):
+                consumed.append(toast)
+                yield toast
+
+        with RecordingRunner() as runner:
+            batch = Batch(chunk_size=3)
+            it = gen()
+            for toast in it:
+                batch.add(toast)
+                if len(runner.scripts) == 1:
+                    break
+            self.assertEqual(len(consumed), 3)
+
+    def test_notifier_per_app_id(self):
+        mixed = list(toasts(2, "a")) + list(toasts(1, "b")) + list(toasts(1, "a"))
+        script = Batch.script(mixed)
+        self.assertEqual(script.count("CreateToastNotifier"), 3)
+
+    def test_empty_batch_runs_nothing(self):
+        with RecordingRunner() as runner:
+            Batch().flush()
+        self.assertEqual(runner.scripts, [])
+
+    def test_show_is_repeatable(self):
+        toast = Notification("batch test", "title", "msg", launch="https://example.com")
+        toast.add_actions("open", "https://example.com")
+        with RecordingRunner() as runner:
+            toast.show()
+            toast.show()
+        self.assertEqual(runner.scripts[0], runner.scripts[1])
+        self.assertEqual(toast.script, runner.scripts[0])
+
+    def test_default_batch_fits_a_command_line(self):
+        toasts = [Notification("batch test", "Job {} done".format(i), "The nightly export finished without errors.")
+                  for i in range(50)]
+        script = Batch.script(toasts)
+        self.assertGreater(len(script), MAX_COMMAND_LINE)  # too long to pass with -Command
+        cmd = ProcessRunner().command(command=script)
+        self.assertLessEqual(len(subprocess.list2cmdline(cmd)), MAX_COMMAND_LINE)
+        self.assertEqual(cmd[-2], "-file")
+        with open(cmd[-1], encoding='utf-8-sig') as f:
+            self.assertEqual(f.read(), script)
+        self.assertEqual(ProcessRunner().command(command="short")[-2:], ["-Command", "short"])
+
+    def test_too_long_toast_is_not_added(self):
+        batch = Batch()
+        batch.add(Notification("batch test", "valid"))
+        toast = Notification("batch test", "valid")
+        toast.title = "x" * 5000
+        with self.assertRaises(ValueError):
+            batch.add(toast)
+        with self.assertRaises(ValueError):
+            Notification("batch test", "x" * 5000)
+        self.assertEqual([t.title for t in batch.pending], ["valid"])
+
+    def test_failed_flush_keeps_the_chunk(self):
+        class FailingOnce:
+            def __init__(self):
+                self.shown = []
+
+            def show(self, notifications):
+                if not self.shown:
+                    self.shown.append(None)
+                    raise OSError("the runner failed")
+                self.shown.extend(t.title for t in notifications)
+
+        backend = FailingOnce()
+        batch = Batch(chunk_size=2, backend=backend)
+        batch.add(Notification("batch test", "first"))
+        with self.assertRaises(OSError):
+            batch.add(Notification("batch test", "second"))
+        self.assertEqual([t.title for t in batch.pending], ["first", "second"])
+        batch.flush()
+        self.assertEqual(backend.shown, [None, "first", "second"])
+        self.assertEqual(batch.pending, [])
+
+    @unittest.skipIf(os.name == 'nt', "the stand-in for PowerShell is a script with a shebang line")
+    def test_long_batches_shown_at_exit(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        out = os.path.join(directory, "opened.txt")
+        # two chunks too long for a command line, the second waits for the first process until the pool starts it
+        # at exit
+        run_python("winotify.set_runner(winotify.ProcessPool({!r}, max_processes=1))\n"
+                   "with winotify.Batch() as batch:\n"
+                   "    for i in range(100):\n"
+                   "        batch.add(winotify.Notification('batch test', 'Job {{}} done'.format(i),\n"
+                   "                                        'The nightly export finished without errors.'))"
+                   .format(fake_powershell(directory)), FAKE_POWERSHELL_OUT=out, FAKE_POWERSHELL_DELAY="0.5")
+        deadline = time.monotonic() + 10
+        opened = []
+        while len(opened) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+            if os.path.exists(out):
+                with open(out, encoding='utf-8') as f:
+                    opened = [line.split(" ", 1)[0] for line in f]
+        self.assertEqual(opened, ["OK", "OK"])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            Batch(chunk_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from _fakes import RecordingRunner
+from winotify import __main__ as cli
+
+
+def defaults(*argv):
+    return cli.build_parser(argv).parse_args(list(argv))
+
+
+def lines(*specs):
+    return [json.dumps(spec) + "\n" for spec in specs]
+
+
+class SpecTestCase(unittest.TestCase):
+    def setUp(self):
+        self.parser = cli.spec_parser()
+
+    def parse(self, spec, *argv):
+        return cli.parse_spec(json.dumps(spec), self.parser, defaults(*argv))
+
+    def test_fields(self):
+        toast = self.parse({"title": "t", "message": "-m", "audio": "mail", "loop": True, "tag": "x",
+                            "actions": [["Open", "https://example.com"], ["-dash", ""]]})
+        self.assertEqual((toast.title, toast.msg, toast.tag), ("t", "-m", "x"))
+        self.assertIn('loop="true"', toast.audio)
+        self.assertEqual(toast.actions, (("Open", "https://example.com"), ("-dash", "")))
+
+    def test_command_line_defaults(self):
+        toast = self.parse({"title": "t"}, "-id", "stream app", "--duration", "long")
+        self.assertEqual((toast.app_id, toast.duration, toast.group), ("stream app", "long", "stream app"))
+
+    def test_invalid(self):
+        for spec in ({"duration": "forever"}, {"audio": "nope"}, {"colour": "red"}, ["title"],
+                     {"actions": [["only a label"]]}, {"icon": "relative.png"}):
+            with self.assertRaises(ValueError, msg=spec):
+                self.parse(spec)
+        with self.assertRaises(ValueError):
+            cli.parse_spec("{not json", self.parser, defaults())
+
+
+class StreamTestCase(unittest.TestCase):
+    def test_batches_and_skips_invalid_lines(self):
+        errors = io.StringIO()
+        specs = lines({"title": "a"}, {"duration": "forever"}, {"title": "b"}) + ["\n", "{oops\n"]
+        with RecordingRunner() as runner:
+            invalid = cli.stream(specs, defaults(), errors=errors)
+        self.assertEqual(invalid, 2)
+        self.assertIn("line 2:", errors.getvalue())
+        self.assertIn("line 5:", errors.getvalue())
+        shown = "".join(runner.scripts)
+        self.assertIn("<![CDATA[a]]>", shown)
+        self.assertIn("<![CDATA[b]]>", shown)
+
+    def test_chunk_size(self):
+        with RecordingRunner() as runner:
+            cli.stream(lines(*({"title": str(i)} for i in range(10))), defaults(), chunk_size=3)
+        self.assertGreaterEqual(len(runner.scripts), 4)
+        self.assertTrue(all(script.count("$Notifier.Show") <= 3 for script in runner.scripts))
+
+    def test_back_pressure(self):
+        release = threading.Event()
+        consumed = []
+
+        class SlowRunner(RecordingRunner):
+            def __call__(self, *, file='', command=''):
+                release.wait(5)
+                super().__call__(file=file, command=command)
+
+        def producer():
+            for line in lines(*({"title": str(i)} for i in range(100))):
+                consumed.append(line)
+                yield line
+
+        with SlowRunner() as runner:
+            t = threading.Thread(target=cli.stream, args=(producer(), defaults()),
+                                 kwargs=dict(chunk_size=1, max_pending=5))
+            t.start()
+            time.sleep(0.2)
+            # one toast is being shown, at most max_pending wait, and one more line is held by the reader
+            self.assertLessEqual(len(consumed), 1 + 5 + 1)
+            release.set()
+            t.join(10)
+        self.assertEqual(len(consumed), 100)
+        self.assertEqual(len(runner.scripts), 100)
+
+    def test_main(self):
+        stdin = io.StringIO("".join(lines({"title": "a"}, {"title": "b"})))
+        with RecordingRunner() as runner, mock.patch("sys.stdin", stdin), self.assertRaises(SystemExit) as cm:
+            cli.main(["--stream", "-id", "stream app"])
+        self.assertEqual(cm.exception.code, 0)
+        self.assertIn("stream app", runner.scripts[0])
+
+
+class SingleToastTestCase(unittest.TestCase):
+    def test_show(self):
+        with RecordingRunner() as runner:
+            cli.main(["-t", "hello", "--action", "Open", "--action-url", "https://example.com", "--tag", "t"])
+        self.assertIn("<![CDATA[hello]]>", runner.scripts[0])
+        self.assertIn('$Toast.Tag = "t"', runner.scripts[0])
+
+    def test_invalid_audio(self):
+        with RecordingRunner(), mock.patch("sys.stderr", io.StringIO()), self.assertRaises(SystemExit):
+            cli.main(["--audio", "nope"])
+
+
+if __name__ == '__main__':
+    unittest.main()
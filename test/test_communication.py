@@ -0,0 +1,185 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from _fakes import registry
+from winotify import Notifier, format_name
+from winotify._communication import ConnectTimeout, Listener, Sender, Transport
+
+
+class ListenerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.key = "winotify-test-" + uuid.uuid4().hex[:8]
+        self.listener = Listener(self.key, workers=4, read_timeout=0.2)
+        self.addCleanup(self.listener.close)
+        self.called = {}
+        self.event = threading.Event()
+
+        def record(name):
+            def callback():
+                self.called[name] = threading.current_thread()
+                self.event.set()
+            callback.__name__ = name
+            return callback
+
+        self.listener.callbacks.update(fast=record("fast"))
+        self.listener.start()
+
+    def send(self, name, key=None):
+        Sender(key or self.key).send(name)
+
+    def wait_for(self, name):
+        deadline = time.monotonic() + 5
+        while name not in self.called:
+            self.assertLess(time.monotonic(), deadline, "{} was not called".format(name))
+            self.event.wait(0.05)
+            self.event.clear()
+
+    def test_callback_runs_in_pool(self):
+        self.send("fast")
+        self.wait_for("fast")
+        self.assertIsNot(self.called["fast"], self.listener.thread)
+        self.assertNotEqual(self.called["fast"], threading.main_thread())
+
+    def test_slow_callback_does_not_block_others(self):
+        release = threading.Event()
+        self.listener.callbacks["slow"] = lambda: release.wait(5)
+        self.addCleanup(release.set)
+        self.send("slow")
+        self.send("fast")
+        self.wait_for("fast")
+
+    def test_silent_client_times_out(self):
+        silent = self.listener.transport.connect_raw()
+        self.addCleanup(silent.close)
+        self.send("fast")
+        self.wait_for("fast")
+        deadline = time.monotonic() + 5
+        while self.listener.rejected < 1:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+    def test_main_thread_callbacks_are_queued(self):
+        def main():
+            pass
+        main.rimt = True
+        self.listener.callbacks["main"] = main
+        self.send("main")
+        deadline = time.monotonic() + 5
+        while not len(self.listener.queue):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertIs(self.listener.queue.get(), main)
+
+
+class BackPressureTestCase(unittest.TestCase):
+    def test_accept_waits_for_free_slot(self):
+        key = "winotify-test-" + uuid.uuid4().hex[:8]
+        listener = Listener(key, workers=1, max_pending=1, read_timeout=5)
+        self.addCleanup(listener.close)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+        listener.callbacks["slow"] = lambda: (calls.append("slow"), release.wait(5))
+        listener.callbacks["next"] = lambda: calls.append("next")
+        listener.start()
+
+        Sender(key).send("slow")
+        deadline = time.monotonic() + 5
+        while not calls:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        threading.Thread(target=lambda: Sender(key).send("next"), daemon=True).start()
+        time.sleep(0.2)
+        self.assertEqual(calls, ["slow"])
+        release.set()
+        while calls != ["slow", "next"]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+
+class SenderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.key = "winotify-test-" + uuid.uuid4().hex[:8]
+
+    def test_connect_metrics(self):
+        listener = Listener(self.key)
+        self.addCleanup(listener.close)
+        listener.start()
+        listener.callbacks["nothing"] = lambda: None
+        sender = Sender(self.key)
+        sender.send("nothing")
+        self.assertEqual(sender.attempts, 1)
+        self.assertGreater(sender.latency, 0)
+
+    def test_gives_up_at_deadline(self):
+        start = time.monotonic()
+        with self.assertRaises(ConnectTimeout) as cm:
+            Sender(self.key, timeout=0.3)
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertLess(elapsed, 2)
+        self.assertGreater(cm.exception.attempts, 1)
+        self.assertIsInstance(cm.exception.__cause__, OSError)
+
+    def test_retries_until_listener_is_up(self):
+        called = threading.Event()
+        listeners = []
+
+        def start_listener():
+            listener = Listener(self.key)
+            listener.callbacks["late"] = called.set
+            listener.start()
+            listeners.append(listener)
+
+        timer = threading.Timer(0.2, start_listener)
+        timer.start()
+        sender = Sender(self.key, timeout=5)
+        sender.send("late")
+        timer.join()
+        self.addCleanup(listeners[0].close)
+        self.assertTrue(called.wait(5))
+        self.assertGreater(sender.attempts, 1)
+
+
+class ProtocolFallbackTestCase(unittest.TestCase):
+    def test_stale_pidfile_runs_callback_locally(self):
+        app_id = "winotify test " + uuid.uuid4().hex[:8]
+        pidfile = os.path.join(tempfile.gettempdir(), app_id + ".pid")
+        with open(pidfile, "w") as f:
+            f.write("0")
+        self.addCleanup(os.unlink, pidfile)
+
+        argv = ["app.py", format_name(app_id) + ":clicked"]
+        with mock.patch.object(sys, "argv", argv):
+            notifier = Notifier(registry(app_id), connect_timeout=0.2)
+            called = []
+
+            @notifier.register_callback
+            def clicked():
+                called.append(True)
+
+            notifier.start()
+
+        self.assertEqual(called, [True])
+        self.assertIsInstance(notifier.connect_error, ConnectTimeout)
+
+
+class TransportTestCase(unittest.TestCase):
+    def test_default_family(self):
+        transport = Transport("my-app")
+        if os.name == 'nt':
+            self.assertEqual((transport.family, transport.address), ('AF_PIPE', r'\\.\pipe\myapp'))
+        else:
+            self.assertEqual(transport.family, 'AF_UNIX')
+            self.assertTrue(transport.address.endswith('winotify-myapp.sock'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import threading
+import unittest
+import uuid
+
+import _fakes  # noqa: F401
+from winotify import Daemon, DaemonClient, Scheduler
+from winotify._communication import ConnectTimeout, Transport
+from winotify._daemon import DaemonError
+
+
+class FakeDisplay:
+    """
+    A display backend recording the toasts instead of showing them.
+    """
+    def __init__(self):
+        self.batches = []
+        self.shown = threading.Condition()
+
+    def __call__(self, toasts):
+        with self.shown:
+            self.batches.append(list(toasts))
+            self.shown.notify_all()
+
+    def titles(self):
+        return [toast.title for batch in self.batches for toast in batch]
+
+    def wait_for(self, count, timeout=5):
+        with self.shown:
+            return self.shown.wait_for(lambda: len(self.titles()) >= count, timeout)
+
+
+class DaemonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.key = "winotify-test-" + uuid.uuid4().hex[:8]
+        self.display = FakeDisplay()
+        self.daemon = self.make_daemon()
+        self.daemon.start()
+        self.addCleanup(self.daemon.close)
+        self.client = DaemonClient(self.key)
+        self.addCleanup(self.client.close)
+
+    def make_daemon(self, **kwargs):
+        kwargs.setdefault("scheduler", Scheduler(rate=1000, burst=1000, coalesce_window=0, show=self.display))
+        return Daemon(self.key, **kwargs)
+
+    def test_show(self):
+        reply = self.client.show(title="hello", message="from a worker", app_id="worker")
+        self.assertEqual(reply, {"accepted": 1, "errors": []})
+        self.assertTrue(self.display.wait_for(1))
+        toast = self.display.batches[0][0]
+        self.assertEqual((toast.title, toast.msg, toast.app_id), ("hello", "from a worker", "worker"))
+
+    def test_connection_is_reused(self):
+        for i in range(5):
+            self.client.show(title=str(i))
+        self.assertEqual(self.client.connects, 1)
+        self.assertTrue(self.display.wait_for(5))
+        self.assertEqual(self.client.stats()["connections"], 1)
+
+    def test_invalid_specs(self):
+        reply = self.client.show_many([{"title": "ok"}, {"duration": "forever"}, "nope", {"priority": "high"}])
+        self.assertEqual(reply["accepted"], 1)
+        self.assertEqual([i for i, _ in reply["errors"]], [1, 2, 3])
+        self.assertEqual(self.client.stats()["invalid"], 3)
+
+    def test_unknown_op(self):
+        with self.assertRaises(DaemonError):
+            self.client.request({"op": "explode"})
+        self.client.show(title="still connected")
+        self.assertEqual(self.client.connects, 1)
+
+    def test_many_clients(self):
+        def worker(n):
+            with DaemonClient(self.key) as client:
+                for i in range(10):
+                    client.show(title="{}-{}".format(n, i))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertTrue(self.display.wait_for(80))
+        self.assertEqual(len(set(self.display.titles())), 80)
+
+    def test_wrong_key_is_refused(self):
+        other = DaemonClient("wrong key", transport=Transport(self.key), timeout=0.2)
+        with self.assertRaises(ConnectTimeout):
+            other.show(title="intruder")
+        self.assertGreaterEqual(self.client.stats()["refused"], 1)
+
+    def test_reconnects_after_restart(self):
+        self.client.show(title="before")
+        self.daemon.close()
+        self.daemon = self.make_daemon()
+        self.daemon.start()
+        self.addCleanup(self.daemon.close)
+        self.assertEqual(self.client.show(title="after")["accepted"], 1)
+        self.assertEqual(self.client.connects, 2)
+
+    def test_second_daemon_refused(self):
+        with self.assertRaises(OSError):
+            Daemon(self.key)
+
+
+class CoalescingTestCase(unittest.TestCase):
+    def test_same_tag_is_deduplicated(self):
+        key = "winotify-test-" + uuid.uuid4().hex[:8]
+        display = FakeDisplay()
+        now = [0.0]
+        scheduler = Scheduler(rate=1, burst=1, coalesce_window=10, show=display, clock=lambda: now[0])
+        daemon = Daemon(key, scheduler=scheduler)
+        daemon.thread.start()  # the scheduler is pumped by hand
+        self.addCleanup(daemon.close)
+        with DaemonClient(key) as client:
+            client.show_many([{"title": "build", "message": str(i), "tag": "ci"} for i in range(5)])
+            scheduler.pump()
+            client.show(title="build", message="5", tag="ci")
+            client.show(title="build", message="6", tag="ci")
+        scheduler.pump()  # still in the coalescing window of the first one
+        now[0] = 11
+        scheduler.pump()
+        self.assertEqual([toast.msg for batch in display.batches for toast in batch], ["4", "6"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from _fakes import FakeListener, registry
+import winotify
+from winotify import _communication
+from winotify._communication import CallbackQueue
+
+
+class CallbackQueueTestCase(unittest.TestCase):
+    def test_put_drops_when_full(self):
+        q = CallbackQueue(2)
+        self.assertTrue(q.put(print))
+        self.assertTrue(q.put(print))
+        self.assertFalse(q.put(print))
+        self.assertEqual(q.stats, {"queued": 2, "dropped": 1, "executed": 0, "pending": 2})
+
+    def test_get_does_not_wait_by_default(self):
+        start = time.perf_counter()
+        self.assertIsNone(CallbackQueue().get())
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+    def test_get_waits_for_callback(self):
+        q = CallbackQueue()
+        threading.Timer(0.05, q.put, args=(print,)).start()
+        self.assertIs(q.get(timeout=5), print)
+
+    def test_get_timeout(self):
+        start = time.perf_counter()
+        self.assertIsNone(CallbackQueue().get(timeout=0.05))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+
+    def test_wake(self):
+        q = CallbackQueue()
+        threading.Timer(0.05, q.wake).start()
+        self.assertIsNone(q.get(timeout=None))
+
+    def test_run_counts_failures(self):
+        q = CallbackQueue()
+        q.put(lambda: 1 / 0)
+        with self.assertRaises(ZeroDivisionError):
+            q.run()
+        self.assertEqual(q.executed, 1)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            CallbackQueue(0)
+
+
+class NotifierDispatchTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(_communication, "Listener", FakeListener)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.notifier = winotify.Notifier(registry("dispatch test"), queue_size=8)
+        self.calls = []
+
+        @self.notifier.register_callback(run_in_main_thread=True)
+        def clicked():
+            self.calls.append(threading.current_thread())
+
+        self.notifier.start()
+
+    def test_update_runs_in_calling_thread(self):
+        self.notifier.listener.activate("clicked")
+        self.assertFalse(self.calls)
+        self.assertTrue(self.notifier.update())
+        self.assertFalse(self.notifier.update())
+        self.assertEqual(self.calls, [threading.current_thread()])
+
+    def test_burst_does_not_block_listener(self):
+        for _ in range(10):
+            self.notifier.listener.activate("clicked")
+        self.assertEqual(self.notifier.drain(max_items=3), 3)
+        self.assertEqual(self.notifier.drain(), 5)
+        self.assertEqual(self.notifier.stats, {"queued": 8, "dropped": 2, "executed": 8, "pending": 0})
+
+    def test_run_forever_until_stop(self):
+        @self.notifier.register_callback(run_in_main_thread=True)
+        def quit_():
+            self.notifier.stop()
+
+        self.notifier.listener.activate("clicked")
+        self.notifier.listener.activate("quit_")
+        self.notifier.run_forever()
+        self.assertEqual(len(self.calls), 1)
+
+    def test_stop_from_other_thread(self):
+        threading.Timer(0.05, self.notifier.stop).start()
+        self.notifier.run_forever()
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
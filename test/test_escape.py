@@ -0,0 +1,216 @@
+import random
+import unittest
+from xml.dom import minidom
+
+from _fakes import RecordingRunner
+from winotify import Batch, Notification, ProgressNotification
+from winotify._escape import (MAX_ACTIONS, MAX_ATTRIBUTE, MAX_TEXT, attribute, ps_literal, ps_string, text,
+                              validate)
+
+# characters special somewhere in a toast, mixed with ordinary ones
+NASTY = ['"@', '@"', ']]>', ']]', '<![CDATA[', '"', "'", '`', '$', '${x}', '$(calc)', '&', '&amp;', '<', '>', '\n',
+         '\r\n', '\t', '\x00', '\x07', '\x1b', '\ud800', '\ufffe', '\u201c', '\u201d', '\u201e', '\u2018', '\u2019',
+         '\u201a', '\u201b', 'é', '😀', '\\', '/', '?', ';', '=', '%', ' ', 'a', 'Z', '0']
+
+
+def _random_value(rng: random.Random, length: int = 12) -> str:
+    return ''.join(rng.choice(NASTY) for _ in range(rng.randrange(length)))
+
+
+def _valid(value: str) -> str:
+    # the characters XML can carry
+    return ''.join(c for c in value if c in '\t\n\r' or ' ' <= c < '\ud800' or '\ue000' <= c < '\ufffe' or
+                   c > '\uffff')
+
+
+def _parsed_text(value: str) -> str:
+    # what the parser reads from a CDATA section, line ends are normalized
+    return _valid(value).replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _unescape_ps(value: str) -> str:
+    # what PowerShell makes of the inside of a double-quoted here-string, as far as the escaping goes
+    result = []
+    chars = iter(value)
+    for c in chars:
+        if c == '`':
+            result.append(next(chars))
+        else:
+            assert c != '$', "unescaped $ in {!r}".format(value)
+            result.append(c)
+    return ''.join(result)
+
+
+def _single_quoted(script: str) -> list:
+    # the values of the single-quoted strings in `script`, which end at the first quote not doubled. PowerShell takes
+    # the typographic single quotes as quotes too.
+    quotes = "'\u2018\u2019\u201a\u201b"
+    values = []
+    value = None  # the value of the string being read, None outside strings
+    i = 0
+    while i < len(script):
+        c = script[i]
+        if value is None:
+            if c in quotes:
+                value = []
+        elif c in quotes and i + 1 < len(script) and script[i + 1] in quotes:
+            value.append(c)
+            i += 1
+        elif c in quotes:
+            values.append(''.join(value))
+            value = None
+        else:
+            value.append(c)
+        i += 1
+    return values
+
+
+def _here_string(script: str) -> str:
+    start = script.index('@"\n') + 3
+    end = script.index('\n"@', start)
+    return script[start:end]
+
+
+def _text(node) -> str:
+    return ''.join(child.data for child in node.childNodes)
+
+
+class EscapeTestCase(unittest.TestCase):
+    def test_cdata_is_split(self):
+        self.assertEqual(text("a]]>b", script=False), "a]]]]><![CDATA[>b")
+        doc = minidom.parseString("<t><![CDATA[{}]]></t>".format(text("]]>]]>", script=False)))
+        self.assertEqual(_text(doc.documentElement), "]]>]]>")
+
+    def test_attribute(self):
+        self.assertEqual(attribute('<a href="x">&\'', script=False), "&lt;a href=&quot;x&quot;&gt;&amp;&apos;")
+        self.assertEqual(attribute('"$x`', script=True), "&quot;`$x``")
+
+    def test_here_string_end(self):
+        self.assertEqual(text('\n"@\n', script=True), '\n`"@\n')
+        self.assertEqual(text('\n\u201c@', script=True), '\n`\u201c@')
+
+    def test_invalid_characters_are_removed(self):
+        self.assertEqual(text("a\x00b\x1bc\ud800d\uffff", script=False), "abcd")
+        self.assertEqual(attribute("\x08", script=False), "")
+
+    def test_ps_strings(self):
+        self.assertEqual(ps_literal("it's \u2018x\u2019"), "it''s \u2018\u2018x\u2019\u2019")
+        self.assertEqual(ps_string('say "$hi" `now`'), 'say `"`$hi`" ``now``')
+
+    def test_plain_values_are_unchanged(self):
+        for escape in (text, attribute, ps_string, ps_literal):
+            self.assertEqual(escape("Hello world 42 é 😀"), "Hello world 42 é 😀")
+
+
+class FuzzTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(2022)
+
+    def random_toast(self, cls=Notification, **kwargs) -> Notification:
+        rng = self.rng
+        toast = cls(_random_value(rng), _random_value(rng), _random_value(rng, 40),
+                    icon=rng.choice([r"C:\icons\\", "file:///C:/icons/"]) + _random_value(rng, 4),
+                    launch=_random_value(rng), **kwargs)
+        for _ in range(rng.randrange(MAX_ACTIONS + 1)):
+            toast.add_actions(_random_value(rng), _random_value(rng))
+        if rng.random() < 0.5:
+            toast.tag = _random_value(rng)
+        return toast
+
+    def check_xml(self, toast: Notification, xml: str):
+        doc = minidom.parseString(xml.encode('utf-8'))
+        texts = doc.getElementsByTagName("text")
+        self.assertEqual(_text(texts[0]), _parsed_text(toast.title))
+        self.assertEqual(_text(texts[1]), _parsed_text(toast.msg))
+        # whitespace is escaped in attributes, so it is kept as it is
+        self.assertEqual(doc.getElementsByTagName("image")[0].getAttribute("src"), _valid(toast.icon))
+        self.assertEqual(doc.documentElement.getAttribute("launch"), _valid(toast.launch))
+        actions = doc.getElementsByTagName("action")
+        self.assertEqual([(a.getAttribute("content"), a.getAttribute("arguments")) for a in actions],
+                         [(_valid(label), _valid(url)) for label, url in toast.actions])
+
+    def test_xml_round_trip(self):
+        for _ in range(500):
+            toast = self.random_toast()
+            self.check_xml(toast, toast._xml())
+
+    def test_script_round_trip(self):
+        for _ in range(500):
+            toast = self.random_toast()
+            inside = _here_string(toast.script)
+            self.assertNotIn('\n"@', inside)
+            self.assertEqual(_unescape_ps(inside), toast._xml())
+            self.check_xml(toast, _unescape_ps(inside))
+
+    def test_progress_round_trip(self):
+        for _ in range(200):
+            toast = self.random_toast(ProgressNotification, status=_random_value(self.rng))
+            self.assertEqual(_unescape_ps(_here_string(toast._render())), toast._xml())
+            data = toast._render().split('$Toast.Data = New-Object Windows.UI.Notifications.NotificationData\n')[1]
+            expected = []
+            for key, value in toast.data.items():
+                expected += [_valid(key), _valid(value)]
+            self.assertEqual(_single_quoted(data), expected)
+
+    def test_double_quoted_values(self):
+        for _ in range(200):
+            value = _random_value(self.rng, 30)
+            escaped = ps_string(value)
+            self.assertEqual(_unescape_ps(escaped), _valid(value))
+            for quote in '"\u201c\u201d\u201e':
+                self.assertEqual(escaped.count(quote), escaped.count('`' + quote))
+
+    def test_batch_script_with_many_apps(self):
+        toasts = [Notification('app "{}" $x'.format(i), "title") for i in range(3)]
+        script = Batch.script(toasts)
+        for i in range(3):
+            self.assertIn('CreateToastNotifier("app `"{}`" `$x")'.format(i), script)
+
+    def test_shown_script(self):
+        toast = Notification("escape test", 'say "@ and $HOME', 'end ]]> here')
+        with RecordingRunner() as runner:
+            toast.show()
+        self.assertIn("<![CDATA[say `\"@ and `$HOME]]>", runner.scripts[0])
+        self.assertIn("<![CDATA[end ]]]]><![CDATA[> here]]>", runner.scripts[0])
+        self.assertIn('$Toast.Tag = "say `"@ and `$HOME"', runner.scripts[0])
+
+
+class ValidateTestCase(unittest.TestCase):
+    def test_valid(self):
+        for icon in ("", r"C:\icon.png", "C:/icon.png", r"\\server\share\icon.png", "/usr/share/icon.png",
+                     "file:///C:/icon.png", "https://example.com/icon.png", "ms-appx:///icon.png"):
+            validate(Notification("app", "title", icon=icon))
+
+    def test_relative_icon(self):
+        for icon in ("icon.png", r"icons\icon.png", "C:icon.png", "javascript:alert(1)"):
+            with self.assertRaises(ValueError, msg=icon):
+                validate(Notification("app", "title", icon=icon))
+
+    def test_lengths(self):
+        validate(Notification("app", "t" * MAX_TEXT, "m" * MAX_TEXT))
+        with self.assertRaises(ValueError):
+            validate(Notification("app", "t" * (MAX_TEXT + 1)))
+        with self.assertRaises(ValueError):
+            validate(Notification("app", "title", "m" * (MAX_TEXT + 1)))
+        with self.assertRaises(ValueError):
+            validate(Notification("app", "title", launch="x" * (MAX_ATTRIBUTE + 1)))
+        with self.assertRaises(ValueError):
+            validate(Notification("app", "title", icon="C:\\" + "x" * MAX_ATTRIBUTE))
+        toast = Notification("app", "title")
+        toast.add_actions("x" * (MAX_ATTRIBUTE + 1))
+        with self.assertRaises(ValueError):
+            toast._xml()
+
+    def test_changed_after_construction(self):
+        toast = Notification("app", "title")
+        toast.duration = "forever"
+        with self.assertRaises(ValueError):
+            toast._xml()
+        toast = Notification("app", "title")
+        toast.actions = (("a", ""),) * (MAX_ACTIONS + 1)
+        with self.assertRaises(ValueError):
+            toast.script
+
+
+if __name__ == '__main__':
+    unittest.main()
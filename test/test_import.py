@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import _fakes  # noqa: F401
+import winotify
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules the notification-only path must not import
+HEAVY = {"winreg", "subprocess", "tempfile", "threading", "typing", "asyncio", "multiprocessing",
+         "multiprocessing.connection", "concurrent.futures", "winotify._communication", "winotify._runner",
+         "winotify._async"}
+
+
+def importtime(code):
+    """
+    Returns:
+        {module: cumulative microseconds} of everything imported by running `code` in a fresh interpreter
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            env=env, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    def test_notification_path_is_light(self):
+        modules = importtime("import winotify; winotify.Notification('app', 'title')._render()")
+        self.assertIn("winotify", modules)
+        self.assertEqual(HEAVY & set(modules), set())
+
+    def test_import_budget(self):
+        best = min(importtime("import winotify")["winotify"] for _ in range(3))
+        self.assertLess(best, 50000, "import winotify took {} us".format(best))
+
+    def test_cli_module_is_light(self):
+        modules = importtime("import winotify.__main__")
+        self.assertEqual(HEAVY & set(modules), set())
+
+
+class LazyAttributeTestCase(unittest.TestCase):
+    def test_lazy_names_resolve(self):
+        from winotify import _async, _communication, _runner
+        self.assertIs(winotify.Listener, _communication.Listener)
+        self.assertIs(winotify.Sender, _communication.Sender)
+        self.assertIs(winotify.HostRunner, _runner.HostRunner)
+        self.assertIs(winotify.set_runner, _runner.set_runner)
+        self.assertIs(winotify.AsyncNotifier, _async.AsyncNotifier)
+        self.assertTrue(os.path.isdir(winotify.tempdir))
+
+    def test_all_and_dir(self):
+        for name in winotify.__all__:
+            self.assertTrue(hasattr(winotify, name), name)
+            self.assertIn(name, dir(winotify))
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            winotify.does_not_exist
+
+
+if __name__ == '__main__':
+    unittest.main()
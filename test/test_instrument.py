@@ -0,0 +1,124 @@
+import io
+import json
+import threading
+import unittest
+import uuid
+
+from _fakes import RecordingRunner
+from winotify import Batch, Collector, Notification, _instrument, set_hook
+from winotify._communication import CallbackQueue, Listener, Sender
+
+
+class CollectorTestCase(unittest.TestCase):
+    def test_summary(self):
+        collector = Collector()
+        for ms in (1, 2, 3, 4):
+            collector.span("render", ms / 1e3)
+        collector.count("toasts.shown")
+        collector.count("toasts.shown", 2)
+        collector.gauge("queue.depth", 5)
+        collector.gauge("queue.depth", 1)
+
+        summary = collector.summary()
+        render = summary["spans"]["render"]
+        self.assertEqual(render["count"], 4)
+        self.assertAlmostEqual(render["total_ms"], 10)
+        self.assertAlmostEqual(render["min_ms"], 1)
+        self.assertAlmostEqual(render["max_ms"], 4)
+        self.assertAlmostEqual(render["p50_ms"], 3)
+        self.assertEqual(summary["counters"], {"toasts.shown": 3})
+        self.assertEqual(summary["gauges"], {"queue.depth": {"last": 1, "max": 5}})
+
+    def test_dump(self):
+        collector = Collector()
+        collector.count("x")
+        out = io.StringIO()
+        text = collector.dump(out)
+        self.assertEqual(out.getvalue(), text)
+        self.assertEqual(json.loads(text)["counters"], {"x": 1})
+
+    def test_samples_are_bounded(self):
+        collector = Collector(max_samples=10)
+        for i in range(100):
+            collector.span("s", i)
+        self.assertEqual(collector.summary()["spans"]["s"]["count"], 100)
+        self.assertEqual(len(collector._spans["s"].samples), 10)
+
+
+class HookTestCase(unittest.TestCase):
+    def setUp(self):
+        self.collector = Collector()
+        set_hook(self.collector)
+        self.addCleanup(set_hook, None)
+
+    def test_show(self):
+        with RecordingRunner():
+            Notification("app", "title").show()
+            with Batch() as batch:
+                for i in range(3):
+                    batch.add(Notification("app", str(i)))
+        summary = self.collector.summary()
+        self.assertEqual(summary["counters"]["toasts.shown"], 4)
+        self.assertEqual(summary["spans"]["render"]["count"], 2)
+        self.assertEqual(summary["spans"]["launch"]["count"], 2)
+
+    def test_launch_error(self):
+        class Failing(RecordingRunner):
+            def __call__(self, *, file='', command=''):
+                raise OSError("no powershell")
+
+        with Failing(), self.assertRaises(OSError):
+            Notification("app", "title").show()
+        summary = self.collector.summary()
+        self.assertEqual(summary["counters"][_instrument.LAUNCH_ERRORS], 1)
+        self.assertEqual(summary["spans"]["launch"]["count"], 1)
+
+    def test_queue(self):
+        queue = CallbackQueue(2)
+        for _ in range(3):
+            queue.put(lambda: None)
+        queue.run()
+        summary = self.collector.summary()
+        self.assertEqual(summary["gauges"]["queue.depth"], {"last": 2, "max": 2})
+        self.assertEqual(summary["counters"]["callbacks.dropped"], 1)
+        self.assertEqual(summary["spans"]["callback"]["count"], 1)
+
+    def test_callback_error(self):
+        queue = CallbackQueue()
+        queue.put(lambda: 1 / 0)
+        with self.assertRaises(ZeroDivisionError):
+            queue.run()
+        self.assertEqual(self.collector.summary()["counters"]["errors.callback"], 1)
+
+    def test_listener(self):
+        key = "winotify-test-" + uuid.uuid4().hex[:8]
+        listener = Listener(key)
+        self.addCleanup(listener.close)
+        called = threading.Event()
+        listener.callbacks["ping"] = called.set
+        listener.start()
+        Sender(key).send("ping")
+        self.assertTrue(called.wait(5))
+        listener.pool.shutdown(wait=True)  # the callback span is recorded after the callback returns
+
+        summary = self.collector.summary()
+        for span in ("ipc.accept", "ipc.recv", "callback"):
+            self.assertEqual(summary["spans"][span]["count"], 1, span)
+        self.assertEqual(summary["counters"]["callbacks.dispatched"], 1)
+
+    def test_function_hook(self):
+        calls = []
+        set_hook(lambda kind, name, value: calls.append((kind, name)))
+        with RecordingRunner():
+            Notification("app", "title").show()
+        self.assertEqual(calls, [("span", "render"), ("count", "toasts.shown"), ("span", "launch")])
+
+    def test_disabled(self):
+        set_hook(None)
+        with RecordingRunner():
+            Notification("app", "title").show()
+        self.assertEqual(self.collector.summary()["counters"], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
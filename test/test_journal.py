@@ -0,0 +1,203 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from _fakes import Clock, FakeListener, RecordingRunner, registry
+import winotify
+from winotify import Batch, Collector, Journal, Notification, _communication, format_name, set_hook, set_journal
+from winotify._communication import Listener, Sender
+from winotify._instrument import LAUNCH, RENDER, TOASTS_SHOWN
+from winotify._journal import ACTIVATE, CLEAR, SHOW, UPDATE
+from winotify._progress import _send_update
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "journal.sqlite")
+        self.clock = Clock()
+        self.journal = self.open()
+
+    def open(self, **kwargs):
+        journal = Journal(self.path, flush_interval=60, clock=self.clock, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_wal_mode(self):
+        with sqlite3.connect(self.path) as db:
+            self.assertEqual(db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_writes_are_batched(self):
+        for i in range(3):
+            self.journal.record(SHOW, "app", str(i))
+        self.assertEqual(self.journal.written, 0)
+        self.journal.flush()
+        self.assertEqual(self.journal.written, 3)
+
+    def test_batch_size_wakes_the_writer(self):
+        journal = self.open(batch_size=2)
+        journal.record(SHOW, "app", "a")
+        journal.record(SHOW, "app", "b")
+        for _ in range(100):
+            if journal.written == 2:
+                break
+            time.sleep(0.02)
+        self.assertEqual(journal.written, 2)
+
+    def test_query(self):
+        self.journal.record(SHOW, "app", "a", "g", 0.01)
+        self.clock.now += 1
+        self.journal.record(SHOW, "other", "b")
+        self.clock.now += 1
+        self.journal.record(ACTIVATE, "app", detail="open?id=1")
+
+        events = self.journal.query()
+        self.assertEqual([e.kind for e in events], [ACTIVATE, SHOW, SHOW])
+        self.assertEqual(events[-1], (1000.0, SHOW, "app", "a", "g", 0.01, ""))
+        self.assertEqual([e.tag for e in self.journal.query(kind=SHOW)], ["b", "a"])
+        self.assertEqual(len(self.journal.query(app_id="app")), 2)
+        self.assertEqual(len(self.journal.query(since=1001.0)), 2)
+        self.assertEqual(len(self.journal.query(limit=1)), 1)
+        self.assertEqual(self.journal.query(tag="b")[0].app_id, "other")
+
+    def test_compact(self):
+        journal = self.open(retention=10)
+        journal.record(SHOW, "app", "old")
+        self.clock.now += 20
+        journal.record(SHOW, "app", "new")
+        journal.flush()
+        self.assertEqual(journal.compact(), 1)
+        self.assertEqual([e.tag for e in journal.query()], ["new"])
+        self.clock.now += 1
+        self.assertEqual(journal.compact(retention=0), 1)
+
+    def test_max_pending(self):
+        journal = self.open(max_pending=2)
+        for tag in "abc":
+            journal.record(SHOW, "app", tag)
+        self.assertEqual(journal.dropped, 1)
+        self.assertEqual([e.tag for e in journal.query()], ["c", "b"])
+
+    def test_detail_is_a_string(self):
+        self.journal.record(ACTIVATE, "app", detail=("open", 1))
+        self.assertEqual(self.journal.query()[0].detail, "('open', 1)")
+
+    def test_unbindable_row_is_dropped(self):
+        self.journal.record(SHOW, "app", "a")
+        self.journal.record(SHOW, object(), "b")
+        self.journal.record(SHOW, "app", "c")
+        self.journal.flush()
+        self.assertEqual((self.journal.written, self.journal.dropped), (2, 1))
+        self.journal.record(SHOW, "app", "d")
+        self.assertEqual([e.tag for e in self.journal.query()], ["d", "c", "a"])
+
+    def test_failed_write_keeps_the_newest(self):
+        journal = self.open(max_pending=3)
+        journal.record(SHOW, "app", "a")
+        journal.record(SHOW, "app", "b")
+        db = journal._db
+
+        class Locked:
+            def execute(self, *args):
+                return db.execute(*args)
+
+            def executemany(self, *args):
+                for tag in "cde":  # recorded by other threads meanwhile
+                    journal.record(SHOW, "app", tag)
+                raise sqlite3.OperationalError("database is locked")
+
+        journal._db = Locked()
+        with self.assertRaises(sqlite3.OperationalError):
+            journal.flush()
+        journal._db = db
+        self.assertEqual(journal.dropped, 2)
+        self.assertEqual([e.tag for e in journal.query()], ["e", "d", "c"])
+
+    def test_close_writes_pending(self):
+        self.journal.record(CLEAR, "app")
+        self.journal.close()
+        self.assertEqual(self.open().query()[0].kind, CLEAR)
+
+
+class RecordingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.journal = Journal(os.path.join(tempfile.mkdtemp(), "journal.sqlite"), flush_interval=60)
+        self.addCleanup(self.journal.close)
+        set_journal(self.journal)
+        self.addCleanup(set_journal, None)
+
+    def kinds(self):
+        return [(e.kind, e.tag) for e in reversed(self.journal.query())]
+
+    def test_show_update_clear(self):
+        patcher = mock.patch.object(_communication, "Listener", FakeListener)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        notifier = winotify.Notifier(registry("journal test"))
+        with RecordingRunner():
+            Notification("app", "first").show()
+            with Batch() as batch:
+                batch.add(Notification("app", "second"))
+                batch.add(Notification("app", "third"))
+            _send_update(("app", "app", "first", None), {"progressValue": "0.5"}, 1)
+            notifier.clear()
+        self.assertEqual(self.kinds(), [(SHOW, "first"), (SHOW, "second"), (SHOW, "third"), (UPDATE, "first"),
+                                        (CLEAR, "")])
+        events = self.journal.query()
+        self.assertEqual(events[1].detail, '{"progressValue": "0.5"}')
+        self.assertIsNotNone(events[2].latency)
+
+    def test_async_show_and_clear(self):
+        patcher = mock.patch.object(_communication, "Listener", FakeListener)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        notifier = winotify.AsyncNotifier(registry("journal test"))
+        collector = Collector()
+        set_hook(collector)
+        self.addCleanup(set_hook, None)
+
+        async def main():
+            await notifier.show(notifier.create_notification("first"))
+            await notifier.show_many([notifier.create_notification("second"), notifier.create_notification("third")])
+            await notifier.clear()
+
+        with RecordingRunner() as runner:
+            asyncio.run(main())
+        self.assertEqual(len(runner.scripts), 3)
+        self.assertEqual(self.kinds(), [(SHOW, "first"), (SHOW, "second"), (SHOW, "third"), (CLEAR, "")])
+        summary = collector.summary()
+        self.assertEqual(summary["counters"][TOASTS_SHOWN], 3)
+        self.assertEqual(summary["spans"][LAUNCH]["count"], 3)
+        self.assertEqual(summary["spans"][RENDER]["count"], 2)
+
+    def test_activation(self):
+        key = "winotify-test-" + uuid.uuid4().hex[:8]
+        listener = Listener(key)
+        self.addCleanup(listener.close)
+        called = threading.Event()
+        listener.callbacks["open"] = lambda id: called.set()
+        listener.thread.start()
+        Sender(key).send("open?id=1")
+        self.assertTrue(called.wait(5))
+        event = self.journal.query(kind=ACTIVATE)[0]
+        self.assertEqual((event.app_id, event.detail), (key, "open?id=1"))
+        self.assertGreaterEqual(event.latency, 0)
+
+    def test_protocol_activation(self):
+        app_id = "winotify test " + uuid.uuid4().hex[:8]
+        with mock.patch.object(sys, "argv", ["app.py", format_name(app_id) + ":clicked"]):
+            notifier = winotify.Notifier(registry(app_id))
+            notifier.register_callback(lambda: None, route="clicked")
+            notifier.start()
+        event = self.journal.query()[0]
+        self.assertEqual((event.kind, event.app_id, event.detail), (ACTIVATE, app_id, "clicked"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from _fakes import FakeListener, RecordingRunner, registry
+from winotify import ProgressNotification, _communication, Notifier
+from winotify._progress import Debouncer
+
+
+class ProgressNotificationTestCase(unittest.TestCase):
+    def test_render_binds_progress(self):
+        toast = ProgressNotification("progress test", "Downloading", value=0.25, status="it's going", data={"eta": 3})
+        with RecordingRunner() as runner:
+            toast.show()
+        script = runner.scripts[0]
+        self.assertIn('<binding template="ToastGeneric">', script)
+        self.assertIn('value="{progressValue}"', script)
+        self.assertIn("$Toast.Data.Values['progressValue'] = '0.2500'", script)
+        self.assertIn("$Toast.Data.Values['progressStatus'] = 'it''s going'", script)
+        self.assertIn("$Toast.Data.Values['eta'] = '3'", script)
+        self.assertIn("$Toast.Data.SequenceNumber = 1", script)
+
+    def test_update_sends_changed_keys_only(self):
+        toast = ProgressNotification("progress test", "Update " + str(time.monotonic()))
+        with RecordingRunner() as runner:
+            toast.update(value=0.5)
+        script = runner.scripts[0]
+        self.assertIn("$Data.Values['progressValue'] = '0.5000'", script)
+        self.assertNotIn("progressStatus", script)
+        self.assertIn("$Data.SequenceNumber = 2", script)
+        self.assertIn('$Notifier.Update($Data, "{}", "progress test")'.format(toast.tag), script)
+        self.assertEqual(toast.data["progressValue"], "0.5000")
+
+
+class DebouncerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.done = threading.Event()
+
+    def send(self, key, values, sequence):
+        self.sent.append((key, values, sequence))
+        self.done.set()
+
+    def test_first_update_is_immediate(self):
+        debouncer = Debouncer(self.send, interval=10)
+        debouncer.submit("a", {"x": "1"})
+        self.assertEqual(self.sent, [("a", {"x": "1"}, 2)])
+
+    def test_burst_is_merged(self):
+        debouncer = Debouncer(self.send, interval=0.05)
+        for i in range(10):
+            debouncer.submit("a", {"x": str(i), "y{}".format(i % 2): "z"})
+        self.assertTrue(self.done.wait(5))
+        deadline = time.monotonic() + 5
+        while len(self.sent) < 2:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(self.sent[1], ("a", {"x": "9", "y1": "z", "y0": "z"}, 3))
+        self.assertEqual(debouncer.merged, 8)
+
+    def test_keys_are_independent(self):
+        debouncer = Debouncer(self.send, interval=10)
+        debouncer.submit("a", {"x": "1"})
+        debouncer.submit("b", {"x": "1"})
+        self.assertEqual([key for key, _, _ in self.sent], ["a", "b"])
+
+    def test_one_in_flight_per_key(self):
+        release = threading.Event()
+        in_flight = []
+
+        def slow_send(key, values, sequence):
+            in_flight.append(values)
+            self.assertEqual(len(in_flight) - len(self.sent), 1)
+            release.wait(5)
+            self.sent.append(values)
+
+        debouncer = Debouncer(slow_send, interval=0)
+        t = threading.Thread(target=debouncer.submit, args=("a", {"x": "1"}))
+        t.start()
+        while not in_flight:
+            time.sleep(0.01)
+        debouncer.submit("a", {"x": "2"})
+        debouncer.submit("a", {"x": "3"})
+        self.assertEqual(len(in_flight), 1)
+        release.set()
+        t.join()
+        deadline = time.monotonic() + 5
+        while len(self.sent) < 2:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(self.sent, [{"x": "1"}, {"x": "3"}])
+
+    def test_flush(self):
+        debouncer = Debouncer(self.send, interval=60)
+        debouncer.submit("a", {"x": "1"})
+        debouncer.submit("a", {"x": "2"})
+        debouncer.flush()
+        self.assertEqual([values for _, values, _ in self.sent], [{"x": "1"}, {"x": "2"}])
+
+
+class NotifierUpdateDataTestCase(unittest.TestCase):
+    def test_update_data(self):
+        with mock.patch.object(_communication, "Listener", FakeListener):
+            notifier = Notifier(registry("progress test"))
+        toast = notifier.create_progress_notification("Job " + str(time.monotonic()), status="queued")
+        with RecordingRunner() as runner:
+            toast.show()
+            notifier.update_data(toast.tag, {"status": "running"})
+        self.assertIn("$Data.Values['progressStatus'] = 'running'", runner.scripts[1])
+        self.assertIn('"{}", "progress test"'.format(toast.tag), runner.scripts[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from _fakes import _make_winreg
+from winotify import PY_EXE, PYW_EXE, Registry
+
+COMMAND_KEY = r"HKCU\SOFTWARE\Classes\registry-test\shell\open\command"
+
+
+class RegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.winreg = _make_winreg()
+        self.stamp_dir = tempfile.mkdtemp()
+
+    def register(self, executable=PY_EXE, script_path=r"C:\app.py", **kwargs):
+        kwargs.setdefault("stamp_dir", self.stamp_dir)
+        return Registry("registry test", executable, script_path, winreg=self.winreg, **kwargs)
+
+    def test_first_registration_writes_everything(self):
+        reg = self.register()
+        self.assertEqual(reg.writes, 3)
+        self.assertEqual(self.winreg.store[COMMAND_KEY][''], reg.command)
+        self.assertTrue(os.path.isfile(reg.stamp_path))
+
+    def test_stamp_skips_registry_reads(self):
+        self.register()
+        reads = []
+        query = self.winreg.QueryValueEx
+        self.winreg.QueryValueEx = lambda *args: reads.append(args) or query(*args)
+        reg = self.register()
+        self.assertEqual(reg.writes, 0)
+        self.assertEqual(reads, [])
+
+    def test_unchanged_values_are_not_written(self):
+        self.register(stamp_dir=None)
+        writes = self.winreg.writes
+        reg = self.register(stamp_dir=None)
+        self.assertEqual(reg.writes, 0)
+        self.assertEqual(self.winreg.writes, writes)
+
+    def test_changed_script_path(self):
+        self.register()
+        reg = self.register(script_path=r"C:\other.py")
+        self.assertEqual(reg.writes, 1)
+        self.assertEqual(self.winreg.store[COMMAND_KEY][''], reg.command)
+
+    def test_changed_executable(self):
+        self.register()
+        reg = self.register(PYW_EXE)
+        self.assertEqual(reg.writes, 1)
+        self.assertIn(str(PYW_EXE), self.winreg.store[COMMAND_KEY][''])
+
+    def test_stale_stamp_after_external_edit(self):
+        self.register()
+        self.winreg.store[COMMAND_KEY][''] = "edited"
+        self.winreg.modified[COMMAND_KEY] += 1
+        reg = self.register()
+        self.assertEqual(reg.writes, 1)
+        self.assertEqual(self.winreg.store[COMMAND_KEY][''], reg.command)
+
+    def test_stale_stamp_after_protocol_value_edit(self):
+        self.register()
+        protocol_key = COMMAND_KEY[:-len(r"\shell\open\command")]
+        del self.winreg.store[protocol_key]['URL Protocol']
+        self.winreg.modified[protocol_key] += 1
+        reg = self.register()
+        self.assertEqual(reg.writes, 1)
+        self.assertEqual(self.winreg.store[protocol_key]['URL Protocol'], '')
+
+    def test_stale_stamp_after_key_removed(self):
+        reg = self.register()
+        self.winreg.store.clear()
+        reg = self.register()
+        self.assertEqual(reg.writes, 3)
+
+    def test_force_override_ignores_stamp(self):
+        self.register()
+        reads = []
+        query = self.winreg.QueryValueEx
+        self.winreg.QueryValueEx = lambda *args: reads.append(args) or query(*args)
+        reg = self.register(force_override=True)
+        self.assertEqual(reg.writes, 0)
+        self.assertEqual(len(reads), 3)
+
+    def test_unwritable_stamp_dir(self):
+        path = os.path.join(self.stamp_dir, "file")
+        open(path, "w").close()
+        reg = self.register(stamp_dir=path)
+        self.assertEqual(reg.writes, 3)
+        self.assertEqual(self.register(stamp_dir=path).writes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
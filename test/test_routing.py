@@ -0,0 +1,294 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import uuid
+from unittest import mock
+
+from _fakes import Clock, FakeListener, registry
+import winotify
+from winotify import _communication, format_name
+from winotify._communication import Listener, Sender
+from winotify._routing import MAX_INLINE, ContextStore, SqliteContextStore, add_token, encode_target, parse_target, \
+    resolve
+
+
+class ContextStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock(0.0)
+        self.store = ContextStore(max_entries=2, ttl=10, clock=self.clock)
+
+    def test_put_and_get(self):
+        token = self.store.put({"id": "1"})
+        self.assertEqual(self.store.get(token), {"id": "1"})
+        self.assertIn(token, self.store)
+        self.assertIsNone(self.store.get("unknown"))
+
+    def test_oldest_is_evicted(self):
+        first = self.store.put(1)
+        self.store.put(2)
+        self.store.put(3)
+        self.assertEqual(len(self.store), 2)
+        self.assertNotIn(first, self.store)
+        self.assertEqual(self.store.evicted, 1)
+
+    def test_expires_after_ttl(self):
+        first = self.store.put(1)
+        self.clock.now = 5
+        second = self.store.put(2)
+        self.clock.now = 10
+        self.assertNotIn(first, self.store)
+        self.assertEqual(self.store.get(second), 2)
+        self.clock.now = 15
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.expired, 2)
+
+    def test_least_recently_used_is_evicted(self):
+        first = self.store.put(1)
+        second = self.store.put(2)
+        self.store.get(first)
+        self.store.put(3)
+        self.assertIn(first, self.store)
+        self.assertNotIn(second, self.store)
+
+    def test_memory_cap(self):
+        store = ContextStore(max_bytes=10000)
+        tokens = [store.put("x" * 3000) for _ in range(4)]
+        self.assertNotIn(tokens[0], store)
+        self.assertIn(tokens[-1], store)
+        self.assertLessEqual(store.size, 10000)
+        with self.assertRaises(ValueError):
+            store.put("x" * 10000)
+
+    def test_clear(self):
+        self.store.put([1, 2, 3])
+        self.store.clear()
+        self.assertEqual((len(self.store), self.store.size), (0, 0))
+
+
+class SqliteContextStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, "contexts.sqlite")
+        self.clock = Clock(0.0)
+        self.store = self.open()
+
+    def open(self, **kwargs):
+        store = SqliteContextStore(self.path, clock=self.clock, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_shared_between_processes(self):
+        token = self.store.put({"context": {"job": 42, "path": "C:\\out.txt"}})
+        self.assertEqual(self.open().get(token), {"context": {"job": 42, "path": "C:\\out.txt"}})
+
+    def test_expires_after_ttl(self):
+        store = self.open(ttl=10)
+        token = store.put(1)
+        self.clock.now = 10
+        self.assertIsNone(store.get(token))
+        self.assertEqual(len(store), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        store = self.open(max_entries=2)
+        first = store.put(1)
+        self.clock.now = 1
+        second = store.put(2)
+        self.clock.now = 2
+        store.get(first)
+        store.put(3)
+        self.assertIn(first, store)
+        self.assertNotIn(second, store)
+        self.assertEqual(store.evicted, 1)
+
+    def test_memory_cap(self):
+        store = self.open(max_bytes=100)
+        first = store.put("x" * 60)
+        self.clock.now = 1
+        second = store.put("x" * 30)
+        store.put("x" * 30)
+        self.assertNotIn(first, store)
+        self.assertIn(second, store)
+        with self.assertRaises(ValueError):
+            store.put("x" * 100)
+
+    def test_not_json(self):
+        with self.assertRaises(TypeError):
+            self.store.put(object())
+
+
+class TargetTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        args = {"path": r"C:\it's & <here> $HOME", "id": "42", "semi;colon": "a=b"}
+        target = encode_target("open", args)
+        for char in "&<>\"'$ \\":
+            self.assertNotIn(char, target)
+        self.assertEqual(parse_target(target), ("open", args))
+
+    def test_no_arguments(self):
+        self.assertEqual(encode_target("open", {}), "open")
+        self.assertEqual(parse_target("open"), ("open", {}))
+
+    def test_values_become_strings(self):
+        self.assertEqual(parse_target(encode_target("open", {"id": 42})), ("open", {"id": "42"}))
+
+    def test_long_arguments_are_stored(self):
+        store = ContextStore()
+        target = encode_target("open", {"data": "x" * MAX_INLINE}, store)
+        self.assertLess(len(target), 32)
+        self.assertEqual(len(store), 1)
+        calls = []
+        resolve(target, {"open": lambda data: calls.append(data)}, store)()
+        self.assertEqual(calls, ["x" * MAX_INLINE])
+
+    def test_long_arguments_without_store(self):
+        with self.assertRaises(ValueError):
+            encode_target("open", {"data": "x" * MAX_INLINE})
+
+    def test_add_token(self):
+        self.assertEqual(add_token("open", "t1"), "open?~=t1")
+        self.assertEqual(add_token("open?id=1", "t1"), "open?id=1;~=t1")
+        self.assertEqual(add_token("open?~=t1", "t2"), "open?~=t1,t2")
+
+    def test_reserved_name(self):
+        with self.assertRaises(ValueError):
+            encode_target("open", {"~": "x"})
+
+    def test_resolve_unknown_or_expired(self):
+        calls = []
+        with mock.patch("builtins.print", calls.append):
+            resolve("missing", {})()
+            resolve("open?~=gone", {"open": print}, ContextStore())()
+        self.assertEqual(calls, ["no such callbacks: missing", "the context of open expired"])
+
+
+class NotifierRoutingTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(_communication, "Listener", FakeListener)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.notifier = winotify.Notifier(registry("routing test"))
+        self.calls = []
+
+        @self.notifier.register_callback(route="open", run_in_main_thread=True)
+        def open_file(path, line="1"):
+            self.calls.append((path, line))
+
+        self.open_file = open_file
+        self.notifier.start()
+
+    def activate(self, url):
+        self.notifier.listener.activate(url.split(":", 1)[1])
+
+    def test_url_carries_arguments(self):
+        url = self.notifier.callback_to_url(self.open_file, path="a b.txt", line=3)
+        self.assertEqual(url, "routing-test:open?path=a%20b.txt;line=3")
+        self.activate(url)
+        self.assertTrue(self.notifier.update())
+        self.assertEqual(self.calls, [("a b.txt", "3")])
+
+    def test_one_callback_for_many_toasts(self):
+        for i in range(3):
+            self.activate(self.notifier.callback_to_url(self.open_file, path=str(i)))
+        self.assertEqual(self.notifier.drain(), 3)
+        self.assertEqual(self.calls, [("0", "1"), ("1", "1"), ("2", "1")])
+        self.assertEqual(list(self.notifier.callbacks), ["open"])
+
+    def test_long_arguments_use_the_store(self):
+        path = "x" * (MAX_INLINE + 1)
+        self.activate(self.notifier.callback_to_url(self.open_file, path=path))
+        self.notifier.update()
+        self.assertEqual(self.calls, [(path, "1")])
+
+    def test_toast_context(self):
+        @self.notifier.register_callback
+        def retry(context):
+            self.calls.append(context)
+
+        toast = self.notifier.create_notification("Job failed", launch=retry, context={"job": 7})
+        toast.add_actions("Retry", retry)
+        toast.add_actions("Open log", self.notifier.callback_to_url(self.open_file, path="x" * (MAX_INLINE + 1)))
+        toast.add_actions("Help", "https://example.com")
+        self.assertEqual(toast.actions[2], ("Help", "https://example.com"))
+
+        self.activate(toast.launch)
+        self.activate(toast.actions[0][1])
+        self.assertEqual(self.calls, [{"job": 7}, {"job": 7}])
+        with mock.patch.object(self, "open_file") as open_file:
+            open_file.side_effect = lambda path, context: self.calls.append((len(path), context))
+            self.notifier.callbacks["open"] = open_file
+            self.activate(toast.actions[1][1])
+            self.notifier.update()
+        self.assertEqual(self.calls[-1], (MAX_INLINE + 1, {"job": 7}))
+
+    def test_url_launch_is_left_alone(self):
+        toast = self.notifier.create_notification("Done", launch="https://example.com", context=1)
+        self.assertEqual(toast.launch, "https://example.com")
+
+    def test_unregistered_launch(self):
+        def unregistered():
+            pass
+
+        with self.assertRaisesRegex(ValueError, "is not registered"):
+            self.notifier.create_notification("Done", launch=unregistered)
+
+    def test_default_route_is_the_name(self):
+        @self.notifier.register_callback
+        def clicked():
+            pass
+
+        self.assertEqual(clicked.url, "routing-test:clicked")
+
+
+class ListenerRoutingTestCase(unittest.TestCase):
+    def test_arguments_over_the_pipe(self):
+        key = "winotify-test-" + uuid.uuid4().hex[:8]
+        listener = Listener(key)
+        self.addCleanup(listener.close)
+        received = []
+        called = threading.Event()
+
+        def open_file(path):
+            received.append(path)
+            called.set()
+
+        listener.callbacks["open"] = open_file
+        listener.thread.start()
+        Sender(key).send(encode_target("open", {"path": "C:\\a.txt"}))
+        self.assertTrue(called.wait(5))
+        self.assertEqual(received, ["C:\\a.txt"])
+
+
+class ProtocolLaunchTestCase(unittest.TestCase):
+    def test_context_survives_relaunch(self):
+        app_id = "winotify test " + uuid.uuid4().hex[:8]
+        path = os.path.join(tempfile.mkdtemp(), "contexts.sqlite")
+        with mock.patch.object(_communication, "Listener", FakeListener):
+            first = winotify.Notifier(registry(app_id), contexts=SqliteContextStore(path))
+            toast = first.create_notification("Job done", launch=first.register_callback(lambda context: None),
+                                              context={"job": 3})
+        first.contexts.close()
+        os.unlink(os.path.join(tempfile.gettempdir(), app_id + ".pid"))  # the app exited
+
+        with mock.patch.object(sys, "argv", ["app.py", toast.launch]):
+            notifier = winotify.Notifier(registry(app_id), contexts=SqliteContextStore(path))
+            received = []
+            notifier.register_callback(lambda context: received.append(context))
+            notifier.start()
+        notifier.contexts.close()
+        self.assertEqual(received, [{"job": 3}])
+
+    def test_arguments_from_argv(self):
+        app_id = "winotify test " + uuid.uuid4().hex[:8]
+        argv = ["app.py", format_name(app_id) + ":" + encode_target("open", {"id": "7"})]
+        with mock.patch.object(sys, "argv", argv):
+            notifier = winotify.Notifier(registry(app_id))
+            received = []
+            notifier.register_callback(lambda id: received.append(id), route="open")
+            notifier.start()
+        self.assertEqual(received, ["7"])
+
+
+if __name__ == '__main__':
+    unittest.main()
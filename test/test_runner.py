@@ -0,0 +1,315 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from _fakes import fake_powershell, run_python
+from winotify import _runner, HostRunner, ProcessPool, ProcessRunner, ScriptCache
+
+FAKE_HOST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_host.py")
+
+
+class HostRunnerTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.out = tempfile.mkstemp()
+        os.close(fd)
+        self.runner = HostRunner([sys.executable, FAKE_HOST, self.out])
+
+    def tearDown(self):
+        self.runner.close()
+        os.unlink(self.out)
+
+    def lines(self):
+        with open(self.out, encoding='utf-8') as f:
+            return [line.rstrip("\n").split(" ", 1) for line in f]
+
+    def test_one_process_for_many_scripts(self):
+        for i in range(5):
+            self.runner(command="toast {}".format(i))
+        self.runner.close()
+
+        lines = self.lines()
+        self.assertEqual([script for _, script in lines], ["toast {}".format(i) for i in range(5)])
+        self.assertEqual(len({pid for pid, _ in lines}), 1)
+
+    def test_multiline_and_non_ascii(self):
+        self.runner(command="first line\nسلام")
+        self.runner.close()
+        self.assertEqual(self.lines()[0][1], "first line\\nسلام")
+
+    def test_file_is_dot_sourced(self):
+        self.runner(file=r"C:\it's here.ps1")
+        self.runner.close()
+        self.assertEqual(self.lines()[0][1], r". 'C:\it''s here.ps1'")
+
+    def test_restart_after_crash(self):
+        self.runner(command="before")
+        first = self.runner.pid
+        self.runner(command="exit")
+        dead = self.runner._proc
+        dead.wait()
+        self.runner(command="after")
+        self.assertTrue(dead.stdin.closed)
+        self.runner.close()
+
+        lines = self.lines()
+        self.assertEqual([script for _, script in lines], ["before", "after"])
+        self.assertNotEqual(lines[0][0], lines[1][0])
+        self.assertEqual(int(lines[0][0]), first)
+        self.assertEqual(self.runner.restarts, 1)
+
+    def test_close_stops_host(self):
+        self.runner(command="x")
+        proc = self.runner._proc
+        self.runner.close()
+        self.assertIsNotNone(proc.poll())
+        self.assertIsNone(self.runner.pid)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.runner()
+        with self.assertRaises(ValueError):
+            self.runner(file="a", command="b")
+
+
+class ScriptCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = ScriptCache(max_entries=2, grace=0)
+        self.addCleanup(self.cache.clear)
+
+    def test_identical_scripts_share_a_file(self):
+        first = self.cache.path("Write-Host 'hi'")
+        second = self.cache.path("Write-Host 'hi'")
+        self.assertEqual(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        with open(first, encoding='utf-8-sig') as f:
+            self.assertEqual(f.read(), "Write-Host 'hi'")
+        self.assertTrue(first.startswith(tempfile.gettempdir()))
+
+    def test_bom_for_windows_powershell(self):
+        with open(self.cache.path("سلام"), 'rb') as f:
+            self.assertTrue(f.read().startswith(b'\xef\xbb\xbf'))
+
+    def test_lru_eviction(self):
+        a = self.cache.path("a")
+        b = self.cache.path("b")
+        self.cache.path("a")  # b is now the least recently used
+        c = self.cache.path("c")
+        self.assertEqual(len(self.cache), 2)
+        self.assertTrue(os.path.exists(a))
+        self.assertFalse(os.path.exists(b))
+        self.assertTrue(os.path.exists(c))
+
+    def test_grace_period(self):
+        cache = ScriptCache(max_entries=1, grace=60)
+        self.addCleanup(cache.clear)
+        a = cache.path("a")
+        cache.path("b")
+        self.assertTrue(os.path.exists(a))
+
+    def test_clear(self):
+        path = self.cache.path("a")
+        self.cache.clear()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(self.cache.directory))
+        self.assertTrue(os.path.exists(self.cache.path("a")))
+
+    def test_process_runner_uses_file(self):
+        runner = ProcessRunner(cache=self.cache)
+        cmd = runner.command(command="Write-Host 'hi'")
+        self.assertEqual(cmd[-2:], ["-file", self.cache.path("Write-Host 'hi'")])
+        self.assertEqual(runner.command(file="x.ps1")[-2:], ["-file", "x.ps1"])
+
+    def test_stale_scripts_are_swept(self):
+        parent = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, parent, ignore_errors=True)
+        cache = ScriptCache(directory=parent, grace=60)
+        self.addCleanup(cache.clear)
+        stale, fresh = cache.path("stale"), cache.path("fresh")
+        cache._at_exit()  # both were just used, a process may not have opened them yet
+        self.assertTrue(os.path.exists(stale) and os.path.exists(fresh))
+
+        old = time.time() - _runner.STALE_SCRIPTS - 1
+        os.utime(stale, (old, old))
+        _runner._swept.discard(parent)
+        ScriptCache(directory=parent).clear()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+
+    def test_swept_script_is_written_again(self):
+        path = self.cache.path("a")
+        os.unlink(path)
+        self.assertEqual(self.cache.path("a"), path)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(self.cache.misses, 2)
+
+
+@unittest.skipIf(os.name == 'nt', "the stand-in for PowerShell is a script with a shebang line")
+class ScriptLifetimeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.executable = fake_powershell(self.directory)
+        self.out = os.path.join(self.directory, "opened.txt")
+
+    def opened(self, count):
+        # what the stand-ins found, once `count` of them have looked for their script
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if os.path.exists(self.out):
+                with open(self.out, encoding='utf-8') as f:
+                    lines = [line.split(" ", 1)[0] for line in f]
+                if len(lines) >= count:
+                    return lines
+            time.sleep(0.05)
+        self.fail("the scripts were not run")
+
+    def test_cached_script_outlives_python(self):
+        run_python("winotify.set_runner(winotify.ProcessRunner({!r}, cache=winotify.ScriptCache(directory={!r})))\n"
+                   "winotify.Notification('app', 'hello').show()".format(self.executable, self.directory),
+                   FAKE_POWERSHELL_OUT=self.out, FAKE_POWERSHELL_DELAY="0.5")
+        self.assertEqual(self.opened(1), ["OK"])
+
+    def test_queued_script_is_written_when_started(self):
+        # without a grace period, every script written evicts the previous one
+        cache = ScriptCache(max_entries=1, directory=self.directory, grace=0)
+        self.addCleanup(cache.clear)
+        pool = ProcessPool(self.executable, cache, max_processes=1, poll_interval=0.005)
+        self.addCleanup(pool.close)
+        with mock.patch.dict(os.environ, FAKE_POWERSHELL_OUT=self.out, FAKE_POWERSHELL_DELAY="0.1"):
+            for i in range(3):
+                pool(command="toast {}".format(i))
+            self.assertTrue(pool.wait(10))
+        self.assertEqual(self.opened(3), ["OK", "OK", "OK"])
+
+
+@unittest.skipIf(os.name == 'nt', "the stand-in for PowerShell is a script with a shebang line")
+class ProcessPoolTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.executable = fake_powershell(cls.directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def pool(self, **kwargs):
+        pool = ProcessPool(self.executable, poll_interval=0.005, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_at_most_max_processes(self):
+        pool = self.pool(max_processes=2)
+        for _ in range(6):
+            pool(command="sleep 0.3")
+        self.assertEqual((pool.running, pool.pending), (2, 4))
+        self.assertTrue(pool.wait(10))
+        stats = pool.stats
+        self.assertEqual((stats["launched"], stats["completed"], stats["failed"]), (6, 6, 0))
+        self.assertEqual((stats["running"], stats["pending"]), (0, 0))
+        self.assertGreaterEqual(stats["latency_p99_ms"], 300)
+        self.assertGreaterEqual(stats["wait_p99_ms"], 250)  # the last two waited for two others each
+
+    def test_failure_is_reported(self):
+        failures = []
+        reported = threading.Event()
+
+        def on_failure(failure):
+            failures.append(failure)
+            reported.set()
+
+        pool = self.pool(on_failure=on_failure, stderr_limit=5)
+        pool(command="sleep 0")
+        pool(command="fail 3 something broke")
+        self.assertTrue(reported.wait(10))
+        pool.wait(10)
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0].returncode, 3)
+        self.assertEqual(failures[0].stderr, "broke")
+        self.assertEqual(failures[0].cmd[-1], "fail 3 something broke")
+        self.assertEqual(list(pool.failures), failures)
+        self.assertEqual((pool.stats["completed"], pool.stats["failed"]), (1, 1))
+
+    def test_done_is_called_with_the_exit_code(self):
+        codes = []
+        pool = self.pool(max_processes=1)
+        pool(command="sleep 0", done=codes.append)
+        pool(command="fail 3 broke", done=codes.append)
+        pool(command="sleep 2", done=codes.append)
+        pool(command="sleep 0", done=codes.append)  # waits for the long one, dropped by close
+        time.sleep(0.3)
+        pool.close(timeout=0.1)
+        self.assertEqual(codes, [0, 3, None, None])
+
+        missing = ProcessPool(os.path.join(self.directory, "missing"))
+        missing(command="sleep 0", done=codes.append)
+        self.assertEqual(codes[-1], None)
+        self.assertEqual(len(codes), 5)
+
+    def test_missing_executable(self):
+        failures = []
+        pool = ProcessPool(os.path.join(self.directory, "missing"), on_failure=failures.append)
+        pool(command="sleep 0")
+        self.assertIsNone(failures[0].returncode)
+        self.assertEqual((pool.launched, pool.failed), (0, 1))
+
+    def test_submit_blocks_while_queue_is_full(self):
+        pool = self.pool(max_processes=1, max_pending=1)
+        pool(command="sleep 0.2")
+        pool(command="sleep 0")
+        start = time.monotonic()
+        pool(command="sleep 0")  # waits for the first process to exit
+        self.assertGreater(time.monotonic() - start, 0.1)
+        self.assertTrue(pool.wait(10))
+
+    def test_restarts_after_close(self):
+        pool = self.pool()
+        pool(command="sleep 0")
+        pool.close()
+        self.assertIsNone(pool._reaper)
+        pool(command="sleep 0")
+        self.assertTrue(pool.wait(10))
+        self.assertEqual(pool.completed, 2)
+
+    def test_invalid_limits(self):
+        with self.assertRaises(ValueError):
+            ProcessPool(max_processes=0)
+
+
+class SetRunnerTestCase(unittest.TestCase):
+    def test_set_runner_closes_previous(self):
+        closed = []
+
+        class Runner:
+            def __init__(self):
+                self.calls = []
+
+            def __call__(self, **kwargs):
+                self.calls.append(kwargs)
+
+            def close(self):
+                closed.append(self)
+
+        first, second = Runner(), Runner()
+        previous = _runner._current
+        try:
+            _runner.set_runner(first)
+            from winotify import _run_ps
+            _run_ps(command="hello")
+            _runner.set_runner(second)
+            self.assertEqual(first.calls, [{'file': '', 'command': 'hello'}])
+            self.assertEqual(closed, [first])
+        finally:
+            _runner._current = previous
+
+    def test_default_is_process_pool(self):
+        self.assertIsInstance(_runner.get_runner(), ProcessPool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+from _fakes import Clock
+from winotify import Notification, Scheduler
+from winotify._scheduler import TokenBucket
+
+
+def toast(title, msg="", app_id="scheduler test"):
+    return Notification(app_id, title, msg)
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=2, burst=3, now=0)
+        self.assertEqual([bucket.take(0) for _ in range(4)], [True, True, True, False])
+        self.assertAlmostEqual(bucket.wait_time(0), 0.5)
+        self.assertFalse(bucket.take(0.4))
+        self.assertTrue(bucket.take(0.5))
+
+    def test_never_exceeds_burst(self):
+        bucket = TokenBucket(rate=100, burst=2, now=0)
+        bucket.wait_time(60)
+        self.assertEqual(bucket.tokens, 2)
+
+
+class SchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.shown = []
+        self.scheduler = Scheduler(rate=1, burst=2, coalesce_window=5, clock=self.clock,
+                                   show=lambda toasts: self.shown.append([t.title for t in toasts]))
+
+    def test_rate_limit(self):
+        for i in range(4):
+            self.scheduler.submit(toast("t{}".format(i)))
+        self.assertAlmostEqual(self.scheduler.pump(), 1.0)
+        self.assertEqual(self.shown, [["t0", "t1"]])
+        self.clock.advance(1)
+        self.scheduler.pump()
+        self.clock.advance(1)
+        self.assertIsNone(self.scheduler.pump())
+        self.assertEqual(self.shown, [["t0", "t1"], ["t2"], ["t3"]])
+
+    def test_buckets_per_app_and_group(self):
+        for app_id in ("a", "b"):
+            for i in range(3):
+                self.scheduler.submit(toast("{}{}".format(app_id, i), app_id=app_id))
+        self.scheduler.pump()
+        self.assertEqual(self.shown, [["a0", "a1", "b0", "b1"]])
+
+    def test_coalesce_same_tag(self):
+        first = toast("progress", "10%")
+        self.scheduler.submit(first)
+        self.scheduler.pump()
+        for pct in (20, 30, 40):
+            t = toast("other")
+            t.tag = "progress"
+            t.msg = "{}%".format(pct)
+            self.scheduler.submit(t)
+
+        self.clock.advance(1)
+        self.assertAlmostEqual(self.scheduler.pump(), 4.0)
+        self.assertEqual(len(self.shown), 1)
+        self.clock.advance(4)
+        self.scheduler.pump()
+        self.assertEqual(self.shown[1], ["other"])
+        self.assertEqual(self.scheduler.stats["coalesced"], 2)
+        self.assertEqual(self.scheduler.stats["shown"], 2)
+
+    def test_latest_content_wins(self):
+        received = []
+        scheduler = Scheduler(clock=self.clock, show=received.extend)
+        for pct in (10, 20):
+            scheduler.submit(toast("progress", "{}%".format(pct)))
+        scheduler.pump()
+        self.assertEqual([t.msg for t in received], ["20%"])
+
+    def test_priority_first_when_budget_is_tight(self):
+        self.scheduler.submit(toast("low1"))
+        self.scheduler.submit(toast("low2"))
+        self.scheduler.submit(toast("high"), priority=5)
+        self.scheduler.pump()
+        self.assertEqual(self.shown, [["high", "low1"]])
+
+    def test_overflow_drops_lowest_priority(self):
+        scheduler = Scheduler(max_pending=2, clock=self.clock, show=self.shown.append)
+        self.assertTrue(scheduler.submit(toast("a"), priority=1))
+        self.assertTrue(scheduler.submit(toast("b"), priority=0))
+        self.assertFalse(scheduler.submit(toast("c"), priority=0))
+        self.assertTrue(scheduler.submit(toast("d"), priority=2))
+        self.assertEqual(scheduler.stats["dropped"], 2)
+        scheduler.pump()
+        self.assertEqual([t.title for t in self.shown[0]], ["d", "a"])
+
+    def test_show_with_batch_argument(self):
+        toast("via show").show(batch=self.scheduler)
+        self.assertEqual(len(self.scheduler), 1)
+
+    def test_worker_thread(self):
+        shown = threading.Event()
+        scheduler = Scheduler(rate=100, burst=1, show=lambda toasts: shown.set())
+        scheduler.start()
+        try:
+            scheduler.submit(toast("background"))
+            self.assertTrue(shown.wait(5))
+        finally:
+            scheduler.stop()
+
+    def test_worker_survives_failing_show(self):
+        shown = []
+        done = threading.Event()
+
+        def show(toasts):
+            if not shown:
+                shown.append(None)
+                raise OSError("the runner failed")
+            shown.extend(t.title for t in toasts)
+            done.set()
+
+        scheduler = Scheduler(rate=100, burst=1, coalesce_window=0, show=show)
+        scheduler.start()
+        try:
+            with contextlib.redirect_stderr(io.StringIO()) as errors:
+                scheduler.submit(toast("lost"))
+                self.assertTrue(self._wait_for(lambda: shown))
+                scheduler.submit(toast("shown"))
+                self.assertTrue(done.wait(5))
+        finally:
+            scheduler.stop()
+        self.assertEqual(shown, [None, "shown"])
+        self.assertIn("OSError: the runner failed", errors.getvalue())
+
+    def test_too_long_toast_is_rejected(self):
+        shown = []
+        done = threading.Event()
+
+        def show(toasts):
+            shown.extend(t.title for t in toasts)
+            done.set()
+
+        scheduler = Scheduler(rate=100, burst=1, show=show)
+        scheduler.start()
+        try:
+            invalid = toast("valid")
+            invalid.title = "x" * 5000
+            with self.assertRaises(ValueError):
+                scheduler.submit(invalid)
+            scheduler.submit(toast("shown"))
+            self.assertTrue(done.wait(5))
+        finally:
+            scheduler.stop()
+        self.assertEqual(shown, ["shown"])
+
+    @staticmethod
+    def _wait_for(predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return predicate()
+
+    def test_stop_flush(self):
+        scheduler = Scheduler(rate=0.001, burst=1, clock=self.clock, show=self.shown.append)
+        scheduler.start()
+        for i in range(3):
+            scheduler.submit(toast("t{}".format(i)))
+        scheduler.stop(flush=True)
+        self.assertEqual(sum(len(batch) for batch in self.shown), 3)
+        self.assertEqual(len(scheduler), 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            Scheduler(rate=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+import _fakes  # noqa: F401
+from winotify import Notification, TEMPLATE, audio
+from winotify._template import CompiledTemplate, TOAST, TOAST_TEMPLATE, script_prefix
+
+
+class CompiledTemplateTestCase(unittest.TestCase):
+    def test_matches_format(self):
+        values = {name: "<{}>".format(name) for name in TOAST.fields}
+        self.assertEqual(TOAST.render(**values), TOAST_TEMPLATE.format(**values))
+
+    def test_fields(self):
+        self.assertEqual(CompiledTemplate("{a} {b} {a}").fields, ("a", "b"))
+        self.assertEqual(CompiledTemplate("{a} {b} {a}").render(a="1", b="x"), "1 x 1")
+
+    def test_escaped_braces(self):
+        self.assertEqual(CompiledTemplate("{{{a}}}").render(a="x"), "{x}")
+
+    def test_unsupported_fields(self):
+        for template in ("{}", "{a!r}", "{a:>3}"):
+            with self.assertRaises(ValueError):
+                CompiledTemplate(template)
+
+    def test_unbalanced_braces(self):
+        for template in ("{a", "a}", "{a}}"):
+            with self.assertRaises(ValueError, msg=template):
+                CompiledTemplate(template)
+        self.assertEqual(CompiledTemplate("}}{{a}}").render(), "}{a}")
+
+    def test_missing_value(self):
+        with self.assertRaises(KeyError):
+            CompiledTemplate("{a}").render()
+
+    def test_prefix_is_cached(self):
+        self.assertIs(script_prefix("template test"), script_prefix("template test"))
+
+
+class RenderTestCase(unittest.TestCase):
+    def test_same_as_full_template(self):
+        toast = Notification("template test", "title", "msg", launch="https://example.com")
+        toast.set_audio(audio.Mail, loop=True)
+        toast.add_actions("a", "https://a.example.com")
+        toast.add_actions("b", "https://b.example.com")
+
+        expected = TEMPLATE.format(
+            app_id="template test",
+            launch='activationType="protocol" launch="https://example.com"',
+            duration="short", icon="", title="title", msg="msg",
+            actions='<action activationType="protocol" content="a" arguments="https://a.example.com" />\n'
+                    '<action activationType="protocol" content="b" arguments="https://b.example.com" />',
+            audio='<audio src="ms-winsoundevent:Notification.Mail" loop="true" />',
+            tag="title", group="template test")
+        self.assertEqual(script_prefix(toast.app_id) + toast._render(), expected)
+
+    def test_render_has_no_side_effects(self):
+        toast = Notification("template test", "title", launch="https://example.com")
+        toast.add_actions("a", "https://a.example.com")
+        before = {name: getattr(toast, name) for name in Notification.__slots__}
+        toast._render()
+        self.assertEqual({name: getattr(toast, name) for name in Notification.__slots__}, before)
+        self.assertEqual(toast._render(), toast._render())
+
+    def test_compact(self):
+        toast = Notification("template test", "title")
+        toast.add_actions("a", "https://a.example.com")
+        self.assertFalse(hasattr(toast, '__dict__'))
+        self.assertFalse(hasattr(audio.Default, '__dict__'))
+        self.assertEqual(toast.actions, (("a", "https://a.example.com"),))
+
+    def test_at_most_five_actions(self):
+        toast = Notification("template test", "title")
+        for i in range(5):
+            toast.add_actions(str(i), "")
+        with self.assertRaises(ValueError):
+            toast.add_actions("5", "")
+        self.assertEqual(len(toast.actions), 5)
+
+    def test_script_is_rendered_on_access(self):
+        toast = Notification("template test", "title")
+        self.assertEqual(toast.script, script_prefix(toast.app_id) + toast._render())
+        toast.title = "changed"
+        self.assertIn("changed", toast.script)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,85 +1,156 @@
 """
 .. include:: ./documentation.md
 """
+from __future__ import annotations
 
-
-import queue
 import os
-import subprocess
 import sys
 import atexit
-from tempfile import gettempdir
-from typing import Callable, Union
 
-from winotify import audio
+from winotify import audio, _escape, _instrument, _journal
 from winotify._registry import Registry, format_name, PY_EXE, PYW_EXE
-from winotify._communication import Listener, Sender
+from winotify._template import (PREAMBLE, NOTIFIER_TEMPLATE, TOAST_TEMPLATE, ACTION_TEMPLATE, CLEAR_TEMPLATE, TOAST,
+                                XML, script_prefix)
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+    from winotify._progress import ProgressNotification
+    from winotify._routing import ContextStore
+    from winotify._assets import IconCache
 
 
 __author__ = "Versa Syahputra"
 __version__ = "1.1.0"
-__all__ = ["Notifier", "Notification", "Registry", "audio"]
-
-
-TEMPLATE = r"""
-[Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] > $null
-[Windows.UI.Notifications.ToastNotification, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
-[Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
-$Template = @"
-<toast {launch} duration="{duration}">
-    <visual>
-        <binding template="ToastImageAndText02">
-            <image id="1" src="{icon}" />
-            <text id="1"><![CDATA[{title}]]></text>
-            <text id="2"><![CDATA[{msg}]]></text>
-        </binding>
-    </visual>
-    <actions>
-        {actions}
-    </actions>
-    {audio}
-</toast>
-"@
-
-$SerializedXml = New-Object Windows.Data.Xml.Dom.XmlDocument
-$SerializedXml.LoadXml($Template)
-
-$Toast = [Windows.UI.Notifications.ToastNotification]::new($SerializedXml)
-$Toast.Tag = "{tag}"
-$Toast.Group = "{group}"
-
-$Notifier = [Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("{app_id}")
-$Notifier.Show($Toast);
-"""
-
-tempdir = gettempdir()
-
-
-def _run_ps(*, file='', command=''):
-    si = subprocess.STARTUPINFO()
-    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
-    cmd = ["powershell.exe", "-ExecutionPolicy", "Bypass"]
-    if file and command:
-        raise ValueError
-    elif file:
-        cmd.extend(["-file", file])
-    elif command:
-        cmd.extend(['-Command', command])
+__all__ = ["Notifier", "AsyncNotifier", "Notification", "ProgressNotification", "Batch", "Scheduler", "Registry",
+           "audio", "ProcessRunner", "ProcessPool", "HostRunner", "ScriptCache", "set_runner", "RecordingBackend",
+           "WinRTBackend", "Collector", "set_hook", "Daemon", "DaemonClient", "ContextStore", "SqliteContextStore",
+           "Journal", "set_journal", "IconCache"]
+
+
+TEMPLATE = PREAMBLE + NOTIFIER_TEMPLATE + TOAST_TEMPLATE
+
+# imported on first use (PEP 562), so showing a toast does not pay for the callback machinery
+_LAZY = {
+    "AsyncNotifier": "winotify._async",
+    "Scheduler": "winotify._scheduler",
+    "ProgressNotification": "winotify._progress",
+    "Listener": "winotify._communication",
+    "Sender": "winotify._communication",
+    "ProcessRunner": "winotify._runner",
+    "ProcessPool": "winotify._runner",
+    "ProcessFailure": "winotify._runner",
+    "HostRunner": "winotify._runner",
+    "ScriptCache": "winotify._runner",
+    "get_runner": "winotify._runner",
+    "set_runner": "winotify._runner",
+    "RecordingBackend": "winotify._backends",
+    "WinRTBackend": "winotify._backends",
+    "Collector": "winotify._instrument",
+    "set_hook": "winotify._instrument",
+    "Daemon": "winotify._daemon",
+    "DaemonClient": "winotify._daemon",
+    "ContextStore": "winotify._routing",
+    "SqliteContextStore": "winotify._routing",
+    "IconCache": "winotify._assets",
+    "Journal": "winotify._journal",
+    "set_journal": "winotify._journal",
+}
+
+
+def __getattr__(name: str):
+    if name == "tempdir":
+        value = _tempdir()
+    elif name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name]), name)
     else:
-        raise ValueError
-
-    subprocess.Popen(
-        cmd,
-        # stdin, stdout, and stderr have to be defined here, because windows tries to duplicate these if not null
-        stdin=subprocess.DEVNULL,
-        stdout=subprocess.DEVNULL,  # set to null because we don't need the output :)
-        stderr=subprocess.DEVNULL,
-        startupinfo=si
-    )
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | {"tempdir"})
+
+
+def _tempdir() -> str:
+    from tempfile import gettempdir
+    return gettempdir()
+
+
+def _remove(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _run_ps(*, file='', command='', runner=None):
+    if runner is None:
+        from winotify._runner import get_runner
+        runner = get_runner()
+    hook = _instrument.hook
+    if hook is None:
+        runner(file=file, command=command)
+        return
+    start = _instrument.perf_counter()
+    try:
+        runner(file=file, command=command)
+    except Exception:
+        hook.count(_instrument.LAUNCH_ERRORS)
+        raise
+    finally:
+        hook.span(_instrument.LAUNCH, _instrument.perf_counter() - start)
+
+
+def _display(notifications: List[Notification], backend=None):
+    journal = _journal.journal
+    if journal is None:
+        _show(notifications, backend)
+        return
+    start = _instrument.perf_counter()
+    _show(notifications, backend)
+    latency = _instrument.perf_counter() - start
+    for notif in notifications:
+        journal.record(_journal.SHOW, notif.app_id, notif.tag, notif.group, latency)
+
+
+def _show(notifications: List[Notification], backend=None):
+    # hand the toasts to the backend as they are if it has a `show` method, else as a single script
+    if backend is None:
+        from winotify._runner import get_runner
+        backend = get_runner()
+    hook = _instrument.hook
+    show = getattr(backend, 'show', None)
+    if show is None:
+        start = _instrument.perf_counter() if hook is not None else 0.0
+        script = Batch.script(notifications)
+        if hook is not None:
+            hook.span(_instrument.RENDER, _instrument.perf_counter() - start)
+            hook.count(_instrument.TOASTS_SHOWN, len(notifications))
+        _run_ps(command=script, runner=backend)
+        return
+
+    if hook is None:
+        show(notifications)
+        return
+    hook.count(_instrument.TOASTS_SHOWN, len(notifications))
+    start = _instrument.perf_counter()
+    try:
+        show(notifications)
+    except Exception:
+        hook.count(_instrument.LAUNCH_ERRORS)
+        raise
+    finally:
+        hook.span(_instrument.LAUNCH, _instrument.perf_counter() - start)
 
 
 class Notification(object):
+    # toasts can wait in large numbers in a batch or a scheduler, so they are kept small
+    __slots__ = ('app_id', 'title', 'msg', 'icon', 'duration', 'launch', 'audio', 'tag', 'group', 'actions',
+                 'context_token')
+
     def __init__(self,
                  app_id: str,
                  title: str,
@@ -96,7 +167,7 @@ class Notification(object):
             title: The heading of the toast.
             msg: The content/message of the toast.
             icon: An optional path to an image to display on the left of the title & message.
-                  Make sure the path is absolute.
+                  Make sure the path is absolute, or a file, http(s), ms-appx or ms-appdata url.
             duration: How long the toast should show up for (short/long), default is short.
             launch: The url or callback to launch (invoked when the user clicks the notification)
 
@@ -104,8 +175,12 @@ class Notification(object):
             If you want to pass a callback to `launch` parameter,
             please use `create_notification` from `Notifier` object
 
+            Values are escaped when the toast is rendered, they can contain any character.
+            The limits of a toast, eg. 4096 characters of title or message, are checked here, when the toast is
+            added to a `Batch` or `Scheduler`, and again when it is rendered.
+
         Raises:
-            ValueError: If the duration specified is not short or long
+            ValueError: If the duration specified is not short or long, or a value is over the limits of a toast
         """
 
         self.app_id = app_id
@@ -117,10 +192,9 @@ class Notification(object):
         self.audio = audio.Silent
         self.tag = self.title
         self.group = self.app_id
-        self.actions = []
-        self.script = ""
-        if duration not in ("short", "long"):
-            raise ValueError("Duration is not 'short' or 'long'")
+        self.actions = ()  # (label, url) of each button
+        self.context_token = ''  # the context given to `Notifier.create_notification`, also passed to buttons
+        _escape.validate(self)
 
     def set_audio(self, sound: audio.Sound, loop: bool):
         """
@@ -150,7 +224,7 @@ class Notification(object):
             Register a callback function using `Notifier.register_callback()` decorator before passing it here
 
         Raises:
-              ValueError: If the callback function is not registered
+              ValueError: If the callback function is not registered, or the notification already has 5 buttons
         """
 
         if callable(launch):
@@ -161,9 +235,13 @@ class Notification(object):
         else:
             url = launch
 
-        xml = '<action activationType="protocol" content="{label}" arguments="{link}" />'
-        if len(self.actions) < 5:
-            self.actions.append(xml.format(label=label, link=url))
+        if self.context_token and url.startswith(format_name(self.app_id) + ":"):
+            from winotify._routing import add_token
+            url = add_token(url, self.context_token)
+
+        if len(self.actions) >= _escape.MAX_ACTIONS:
+            raise ValueError("a toast can have at most {} actions".format(_escape.MAX_ACTIONS))
+        self.actions += ((label, url),)
 
     def build(self):
         """
@@ -177,53 +255,205 @@ class Notification(object):
         warnings.warn("build method is deprecated, call show directly instead", DeprecationWarning)
         return self
 
-    def show(self):
+    def _fields(self, script: bool = True) -> Dict[str, str]:
+        # the values of the toast template fields, escaped for the toast XML, and for the here-string holding it in
+        # a script if `script` is True
+        _escape.validate(self)
+        text = _escape.text
+        attribute = _escape.attribute
+
+        if self.audio == audio.Silent:
+            sound = '<audio silent="true" />'
+        else:
+            sound = self.audio
+
+        if self.launch:
+            launch = 'activationType="protocol" launch="{}"'.format(attribute(self.launch, script))
+        else:
+            launch = ''
+
+        actions = '\n'.join([ACTION_TEMPLATE.format(label=attribute(label, script), link=attribute(link, script))
+                             for label, link in self.actions])
+
+        return dict(launch=launch,
+                    duration=self.duration,
+                    icon=attribute(self.icon, script),
+                    title=text(self.title, script),
+                    msg=text(self.msg, script),
+                    actions=actions,
+                    audio=sound,
+                    tag=_escape.ps_string(self.tag),
+                    group=_escape.ps_string(self.group))
+
+    def _render(self) -> str:
+        """
+        Render the part of the script that shows this toast, it expects `$Notifier` to be defined already.
+        The notification is left untouched, so it can be rendered and shown any number of times.
+        """
+        return TOAST.render(**self._fields())
+
+    @property
+    def script(self) -> str:
+        """
+        The full script showing this toast, rendered on every access rather than kept after `show`
+        """
+        return script_prefix(self.app_id) + self._render()
+
+    def show(self, batch: 'Batch' = None, backend=None):
         """
         Show the toast
+
+        Args:
+            batch: If given, the toast is added to `batch` and shown when the batch is flushed
+            backend: Where to show the toast instead of the current runner, eg. a `RecordingBackend`
         """
-        if self.actions:
-            self.actions = '\n'.join(self.actions)
-        else:
-            self.actions = ''
+        if batch is not None:
+            batch.add(self)
+            return
 
-        if self.audio == audio.Silent:
-            self.audio = '<audio silent="true" />'
+        _display([self], backend)
 
-        if self.launch:
-            self.launch = 'activationType="protocol" launch="{}"'.format(self.launch)
+    def _xml(self) -> str:
+        """
+        Render the toast XML alone, for backends which don't go through PowerShell
+        """
+        return XML.render(**self._fields(script=False))
+
+
+class Batch:
+    def __init__(self, chunk_size: int = 50, backend=None):
+        """
+        Collect toasts and show them with a single script, which creates each `ToastNotifier` once.
+
+        The batch is flushed every `chunk_size` toasts, so it can be fed from a generator of any length.
+
+        Args:
+            chunk_size: The maximum number of toasts sent in one script
+            backend: Where to show the toasts instead of the current runner, eg. a `RecordingBackend`
+
+        Examples:
+            ```python
+            with Batch() as batch:
+                for toast in toasts:
+                    toast.show(batch=batch)
+            ```
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.chunk_size = chunk_size
+        self.backend = backend
+        self.pending = []
+
+    def add(self, notification: Notification):
+        """
+        Add `notification` to the batch, flushing it if the batch is full
+
+        Raises:
+            ValueError: If `notification` is over the limits of a toast, it is not added
+            Exception: What flushing the batch raised, see `flush`. `notification` was added and is still pending,
+                       don't add it again
+        """
+        _escape.validate(notification)
+        self.pending.append(notification)
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Show all pending toasts
+
+        Raises:
+            Exception: What showing them raised, eg. an OSError of the runner. The toasts stay pending.
+        """
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        try:
+            _display(pending, self.backend)
+        except BaseException:
+            self.pending[:0] = pending
+            raise
 
-        self.script = TEMPLATE.format(**self.__dict__)
+    @staticmethod
+    def script(notifications) -> str:
+        """
+        Returns:
+            A single script showing all `notifications` in order
+        """
+        parts = []
+        app_id = None
+        for notif in notifications:
+            if app_id is None:
+                parts.append(script_prefix(notif.app_id))
+            elif notif.app_id != app_id:
+                parts.append(NOTIFIER_TEMPLATE.format(app_id=_escape.ps_string(notif.app_id)))
+            app_id = notif.app_id
+            parts.append(notif._render())
+        return ''.join(parts)
+
+    def __enter__(self):
+        return self
 
-        _run_ps(command=self.script)
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
 
 
 class Notifier:
-    def __init__(self, registry: Registry):
+    def __init__(self, registry: Registry, *, queue_size: Optional[int] = None, connect_timeout: float = 5.0,
+                 backend=None, contexts: Optional[ContextStore] = None, icons: Optional[IconCache] = None):
         """
         A `Notification` manager class.
 
         Args:
             registry: A `Registry` instance containing the `app_id`, default interpreter, and the script path.
+            queue_size: The maximum number of callbacks waiting to run in the main thread,
+                        more are dropped until `update` catches up. Defaults to 64.
+            connect_timeout: When opened from a notification, how long to try reaching the main process.
+                             If it can't be reached, the callback is run by `start` in this process instead.
+            backend: Where `show`, `show_many` and `clear` send toasts and scripts, defaults to the current runner
+                     (see `set_runner`). Any runner works, and so does `RecordingBackend` or `WinRTBackend`.
+            contexts: Where the contexts of toasts (see `create_notification`) and the arguments too long for an
+                      activation url are kept, defaults to a `ContextStore` in memory. Use a `SqliteContextStore`
+                      to still find them when a click starts the app again.
+            icons: If given, the icons of `set_icon` and `create_notification` are replaced by their cached
+                   variant, downscaled and converted, see `IconCache`
         """
         self.app_id = registry.app_id
         self.icon = ""
-        pidfile = os.path.join(tempdir, f'{self.app_id}.pid')
+        self.icons = icons
+        self.backend = backend
+        self._running = False
+        pidfile = os.path.join(_tempdir(), f'{self.app_id}.pid')
 
         # alias for callback_to_url()
         self.cb_url = self.callback_to_url
 
+        if contexts is None:
+            from winotify._routing import ContextStore
+            contexts = ContextStore()
+        self.contexts = contexts
+
         if self._protocol_launched:
             # communicate to main process if it's alive
-            self.func_to_call = sys.argv[1].split(':')[1]
+            self.func_to_call = sys.argv[1].split(':', 1)[1]  # the route and its arguments
             self._cb = {}  # callbacks are stored here because we have no listener
+            self.sender = None
+            self.connect_error = None
             if os.path.isfile(pidfile):
-                sender = Sender(self.app_id)
-                sender.send(self.func_to_call)
-                sys.exit()
+                from winotify._communication import Sender
+                try:
+                    self.sender = Sender(self.app_id, timeout=connect_timeout)
+                    self.sender.send(self.func_to_call)
+                except OSError as e:
+                    self.connect_error = e  # the main process is gone, start() runs the callback here
+                else:
+                    sys.exit()
         else:
-            self.listener = Listener(self.app_id)
+            from winotify._communication import Listener, DISPATCH_QUEUE_SIZE
+            self.listener = Listener(self.app_id, queue_size or DISPATCH_QUEUE_SIZE)
+            self.listener.contexts = self.contexts
             open(pidfile, 'w').write(str(os.getpid()))  # pid file
-            atexit.register(os.unlink, pidfile)
+            atexit.register(_remove, pidfile)
 
     @property
     def callbacks(self):
@@ -247,6 +477,8 @@ class Notifier:
             None
 
         """
+        if self.icons is not None and path:
+            path = self.icons.resolve(path)
         self.icon = path
 
     def create_notification(self,
@@ -254,7 +486,8 @@ class Notifier:
                             msg: str = '',
                             icon: str = '',
                             duration: str = 'short',
-                            launch: Union[str, Callable] = '') -> Notification:
+                            launch: Union[str, Callable] = '',
+                            context: Any = None) -> Notification:
         """
 
         See Also:
@@ -263,21 +496,110 @@ class Notifier:
         Notes:
             `launch` parameter can be a callback function here
 
+        Args:
+            context: Passed as the `context` keyword argument to the callbacks of this toast, its launch and
+                     its buttons, when it is clicked. It is kept in `contexts` until it expires.
+
         Returns:
             `Notification` object
 
+        Raises:
+            ValueError: If `launch` is a callback function which is not registered, or a value is over the limits
+                        of a toast
         """
         if self.icon:
             icon = self.icon
+        elif self.icons is not None and icon:
+            icon = self.icons.resolve(icon)
 
         if callable(launch):
             url = self.callback_to_url(launch)
+            if url is None:
+                raise ValueError(f"{launch} is not registered")
         else:
             url = launch
 
         notif = Notification(self.app_id, title, msg, icon, duration, url)
+        if context is not None:
+            from winotify._routing import add_token
+            notif.context_token = self.contexts.put({"context": context})
+            if url and url.startswith(format_name(self.app_id) + ":"):
+                notif.launch = add_token(url, notif.context_token)
         return notif
 
+    def batch(self, chunk_size: int = 50) -> Batch:
+        """
+        Returns:
+            A new `Batch`, use it as a context manager and pass it to `Notification.show(batch=...)`
+        """
+        return Batch(chunk_size, self.backend)
+
+    def show_many(self, notifications: Iterable[Notification], chunk_size: int = 50):
+        """
+        Show many toasts using one script per `chunk_size` toasts, instead of one per toast.
+
+        Args:
+            notifications: Any iterable of `Notification`, generators are consumed lazily
+            chunk_size: The maximum number of toasts sent in one script
+
+        Examples:
+            ```python
+            notifier.show_many(notifier.create_notification(f"job {i} done") for i in range(50))
+            ```
+        """
+        with Batch(chunk_size, self.backend) as batch:
+            for notif in notifications:
+                batch.add(notif)
+
+    def show(self, notification: Notification):
+        """
+        Show `notification` with the backend of this notifier
+        """
+        notification.show(backend=self.backend)
+
+    def create_progress_notification(self,
+                                     title: str,
+                                     msg: str = '',
+                                     icon: str = '',
+                                     duration: str = 'short',
+                                     launch: Union[str, Callable] = '',
+                                     **progress) -> ProgressNotification:
+        """
+        Same as `create_notification`, with a progress bar that can be updated with `update_data`.
+
+        Args:
+            **progress: The initial values, see `ProgressNotification`
+
+        Returns:
+            `ProgressNotification` object
+        """
+        from winotify._progress import ProgressNotification
+        base = self.create_notification(title, msg, icon, duration, launch)
+        return ProgressNotification(self.app_id, title, msg, base.icon, duration, base.launch, backend=self.backend,
+                                    **progress)
+
+    def update_data(self, tag: str, values: Dict[str, object], group: str = ''):
+        """
+        Update the bound values of a toast already shown, eg. the progress of a `ProgressNotification`.
+
+        Only the given keys are sent. Updates are debounced, at most one is sent per toast every half second,
+        the newest values win.
+
+        Args:
+            tag: The tag of the toast, the title unless it was changed
+            values: The keys to update, see `ProgressNotification.update`
+            group: The group of the toast, the app id unless it was changed
+
+        Examples:
+            ```python
+            toast = notifier.create_progress_notification("Downloading", status="starting")
+            toast.show()
+            notifier.update_data("Downloading", {"value": 0.5, "status": "halfway there"})
+            ```
+        """
+        from winotify._progress import debouncer, _values
+        debouncer.submit((self.app_id, group or self.app_id, tag, self.backend), _values(values))
+
     def start(self):
         """
         Start the listener thread. This method *must* be called first in the main function,
@@ -291,39 +613,92 @@ class Notifier:
             ```
         """
         if self._protocol_launched:  # call the callback directly
-            self.callbacks.get(self.func_to_call)()
+            self._callback()()
 
         else:
             self.listener.callbacks.update(self.callbacks)
             self.listener.thread.start()
 
-    def update(self):
+    def update(self, timeout: Optional[float] = 0) -> bool:
         """
-        check for available callback function in queue then call it
-        this method *must* be called *every time* in loop.
+        Call the next callback function waiting to run in the main thread, if there is one.
 
         If all callback functions don't need to run in main thread, calling this functions is *optional*
 
+        Args:
+            timeout: Seconds to wait for a callback, the default 0 returns immediately, None waits until one arrives
+                     or `stop` is called
+
+        Returns:
+            True if a callback was called
+
         Examples:
             ```python
             # the main loop
             while True:
-                notifier.update()
+                notifier.update(timeout=1)
                 ...
             ```
         """
         if self._protocol_launched:
-            return
+            return False
 
-        q = self.listener.queue
-        try:
-            func = q.get_nowait()
-            if callable(func):
-                func()
-            else:
-                print(f"{func.__name__} ")
-        except queue.Empty:
-            pass
+        return self.listener.queue.run(timeout)
+
+    def drain(self, max_items: Optional[int] = None) -> int:
+        """
+        Call every callback function waiting to run in the main thread, without waiting for new ones.
+
+        Args:
+            max_items: Call at most this many callbacks
+
+        Returns:
+            The number of callbacks called
+        """
+        count = 0
+        while (max_items is None or count < max_items) and self.update():
+            count += 1
+        return count
+
+    def run_forever(self):
+        """
+        Call main thread callbacks as they arrive until `stop` is called, sleeping while there are none.
+
+        Examples:
+            ```python
+            if __name__ == "__main__":
+                notifier.start()
+                notifier.run_forever()
+            ```
+        """
+        self._running = True
+        while self._running:
+            self.update(timeout=None)
+
+    def stop(self):
+        """
+        Make `run_forever` return, can be called from any thread or from a callback
+        """
+        self._running = False
+        if not self._protocol_launched:
+            self.listener.queue.wake()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Counters of the main thread callbacks: queued, dropped, executed and pending
+        """
+        if self._protocol_launched:
+            return {"queued": 0, "dropped": 0, "executed": 0, "pending": 0}
+        return self.listener.queue.stats
+
+    def _callback(self) -> Callable:
+        # the callback of the url this process was started with
+        from winotify._routing import resolve
+        if _journal.journal is not None:
+            _journal.journal.record(_journal.ACTIVATE, self.app_id, detail=self.func_to_call)
+        return resolve(self.func_to_call, self.callbacks, self.contexts)
 
     @property
     def _protocol_launched(self) -> bool:
@@ -339,17 +714,23 @@ class Notifier:
         else:
             return False
 
-    def register_callback(self, func=None, *, run_in_main_thread=False):
+    def register_callback(self, func=None, *, run_in_main_thread=False, route: str = ''):
         """
         A decorator to register a function to be used as a callback
         Args:
             func: the function to decorate
             run_in_main_thread: If True, the callback function will run in main thread
+            route: The name of the callback in activation urls, defaults to the function's name
 
         Examples:
             ```python
             @notifier.register_callback
             def foo(): ...
+
+            @notifier.register_callback(route="open")
+            def open_file(path): ...
+
+            notifier.create_notification("Download finished", launch=notifier.callback_to_url(open_file, path=p))
             ```
 
         Returns:
@@ -359,7 +740,8 @@ class Notifier:
         def inner(f):
             if run_in_main_thread:
                 f.rimt = run_in_main_thread
-            self.callbacks[f.__name__] = f
+            f.route = route or f.__name__
+            self.callbacks[f.route] = f
             f.url = self.callback_to_url(f)
             return f
 
@@ -368,20 +750,32 @@ class Notifier:
         else:
             return inner(func)
 
-    def callback_to_url(self, func: Callable) -> str:
+    def callback_to_url(self, func: Callable, **args) -> str:
         """
         Translate the registered callback function `func` to url notation.
 
         Args:
             func: The registered callback function
+            **args: Passed to `func` as keyword arguments when the url is activated, converted to strings.
+                    Arguments too long for a url are kept by the notifier, for a day or until 1024 newer ones
+                    are, and are lost if the app is not running when the toast is clicked.
 
         Returns:
-             url-notation string eg. `my-app-id:foo`, where **my-app-id** is the app id and **foo** is the function name
+             url-notation string eg. `my-app-id:foo`, where **my-app-id** is the app id and **foo** is the function
+             name, followed by the arguments, eg. `my-app-id:foo?id=42`
 
+        Raises:
+            ValueError: If an argument is named "~"
+
+        Warnings:
+            Any program or web page can open an activation url, so the callback can be called with any string
+            keyword arguments, including `context`. Validate them like user input.
         """
 
-        if callable(func) and func.__name__ in self.callbacks:
-            url = format_name(self.app_id) + ":" + func.__name__
+        route = getattr(func, 'route', getattr(func, '__name__', None))
+        if callable(func) and route in self.callbacks:
+            from winotify._routing import encode_target
+            url = format_name(self.app_id) + ":" + encode_target(route, args, self.contexts)
             return url
 
     def clear(self):
@@ -390,8 +784,6 @@ class Notifier:
 
         """
 
-        cmd = f"""\
-        [Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] > $null
-        [Windows.UI.Notifications.ToastNotificationManager]::History.Clear('{self.app_id}')
-        """
-        _run_ps(command=cmd)
+        _run_ps(command=CLEAR_TEMPLATE.format(app_id=_escape.ps_literal(self.app_id)), runner=self.backend)
+        if _journal.journal is not None:
+            _journal.journal.record(_journal.CLEAR, self.app_id)
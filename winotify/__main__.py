@@ -1,15 +1,27 @@
 import argparse
+import json
 import sys
 
 import winotify
-from winotify import Notification, audio
+from winotify import Batch, Notification, audio
+from winotify._escape import validate
 
 audio_map = {key.lower(): value for key, value in audio.__dict__.items() if not key.startswith("__")}
 
+# the keys of a toast spec in --stream mode, each is the long option of the same name
+SPEC_FIELDS = ("app_id", "title", "message", "icon", "duration", "open_url", "audio", "loop", "tag", "group",
+               "actions")
 
-def main():
-    parser = argparse.ArgumentParser(prog="winotify[-nc]", description="Show notification toast on Windows 10."
-                                     "Use 'winotify-nc' for no console window.")
+
+class _SpecParser(argparse.ArgumentParser):
+    # validates toast specs with the command line rules, without exiting on the first invalid one
+    def error(self, message):
+        raise ValueError(message)
+
+
+def build_parser(argv=(), parser_class=argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser = parser_class(prog="winotify[-nc]", description="Show notification toast on Windows 10."
+                          "Use 'winotify-nc' for no console window.")
     parser.version = winotify.__version__
     parser.add_argument('-id',
                         '--app-id',
@@ -49,13 +61,48 @@ def main():
     parser.add_argument("--action-url",
                         metavar="URL",
                         action="append",
-                        required=("--action" in sys.argv),
+                        required=("--action" in argv),
                         help="an URL to launch when the button clicked")
+    parser.add_argument("--tag",
+                        help="replace the toast with the same tag instead of adding one (default: the title)")
+    parser.add_argument("--group",
+                        help="the group of the tag (default: the app id)")
+    parser.add_argument("--stream",
+                        "--stdin",
+                        action="store_true",
+                        help="read toasts from stdin, one JSON object per line, until it is closed. "
+                             "Keys are the long options, with actions as a list of [label, url] pairs. "
+                             "The other options are the defaults of every toast")
+    parser.add_argument("--batch-size",
+                        type=int,
+                        default=50,
+                        metavar="N",
+                        help="in --stream mode, the maximum number of toasts shown by one script (default: 50)")
+    parser.add_argument("--max-pending",
+                        type=int,
+                        default=100,
+                        metavar="N",
+                        help="in --stream mode, stop reading stdin while this many toasts wait (default: 100)")
+    parser.add_argument("--daemon",
+                        action="store_true",
+                        help="serve toasts sent by `winotify.DaemonClient` from other processes, until interrupted. "
+                             "The other options are the defaults of every toast")
     parser.add_argument("-v",
                         "--version",
                         action="version")
+    return parser
 
-    args = parser.parse_args()
+
+def make_toast(args) -> Notification:
+    """
+    Returns:
+        The toast described by the parsed arguments `args`
+
+    Raises:
+        ValueError: If the arguments are invalid
+    """
+    if args.audio is not None and args.audio not in audio_map.keys():
+        raise ValueError("Invalid audio " + args.audio)
 
     toast = Notification(args.app_id,
                          args.title,
@@ -65,25 +112,183 @@ def main():
                          args.open_url)
 
     if args.audio is not None:
-        if args.audio not in audio_map.keys():
-            sys.exit("Invalid audio " + args.audio)
-        else:
-            toast.set_audio(audio_map[args.audio], args.loop)
-
-    actions = args.action
-    action_urls = args.action_url
-    if actions and action_urls:
-        if len(actions) == len(action_urls):
-            dik = dict(zip(actions, action_urls))
-            for action, url in dik.items():
-                toast.add_actions(action, url)
-        else:
-            parser.error("imbalance arguments, "
+        toast.set_audio(audio_map[args.audio], args.loop)
+
+    actions = args.action or []
+    action_urls = args.action_url or []
+    if len(actions) != len(action_urls):
+        raise ValueError("imbalance arguments, "
                          "the amount of action specified is not the same as the specified amount of action-url")
+    for action, url in dict(zip(actions, action_urls)).items():
+        toast.add_actions(action, url)
+
+    if args.tag is not None:
+        toast.tag = args.tag
+    if args.group is not None:
+        toast.group = args.group
+    validate(toast)  # fail here rather than when the toast is rendered, eg. in the middle of a batch
+    return toast
+
+
+def spec_argv(spec) -> list:
+    """
+    Returns:
+        The command line arguments equivalent to the toast spec `spec`, a dict decoded from JSON
+
+    Raises:
+        ValueError: If `spec` is not a dict or has unknown keys
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("a toast must be a JSON object")
+    argv = []
+    for key, value in spec.items():
+        if key not in SPEC_FIELDS:
+            raise ValueError("unknown key {!r}".format(key))
+        if value is None:
+            continue  # same as leaving the key out
+        if key == "actions":
+            if not isinstance(value, list):
+                raise ValueError("actions must be a list of [label, url] pairs")
+            for action in value:
+                if not (isinstance(action, list) and len(action) == 2):
+                    raise ValueError("actions must be a list of [label, url] pairs")
+                argv += ["--action={}".format(action[0]), "--action-url={}".format(action[1])]
+        elif key == "loop":
+            if value:
+                argv.append("--loop")
+        else:
+            # the = form keeps values starting with a dash from being taken as options
+            argv.append("--{}={}".format(key.replace('_', '-'), value))
+    return argv
+
+
+def toast_from_spec(spec, parser: argparse.ArgumentParser, defaults: argparse.Namespace) -> Notification:
+    """
+    Returns:
+        The toast described by `spec`, a dict decoded from JSON, missing keys take their value from `defaults`
+
+    Raises:
+        ValueError: If the spec is invalid, `parser` must raise it instead of exiting (see `spec_parser`)
+    """
+    args = parser.parse_args(spec_argv(spec), argparse.Namespace(**vars(defaults)))
+    return make_toast(args)
+
+
+def spec_parser() -> argparse.ArgumentParser:
+    """
+    Returns:
+        The command line parser, raising ValueError on invalid arguments instead of exiting
+    """
+    return build_parser(parser_class=_SpecParser)
 
+
+def parse_spec(line: str, parser: argparse.ArgumentParser, defaults: argparse.Namespace) -> Notification:
+    """
+    Returns:
+        The toast described by the JSON object `line`, missing keys take their value from `defaults`
+
+    Raises:
+        ValueError: If the line is not valid JSON or the spec is invalid
+    """
+    return toast_from_spec(json.loads(line), parser, defaults)
+
+
+def stream(lines, defaults: argparse.Namespace, chunk_size: int = 50, max_pending: int = 100, errors=None) -> int:
+    """
+    Show a toast for every JSON object in `lines`, until they run out.
+
+    Lines are read by a thread into a queue of `max_pending` entries, when it is full the thread stops reading,
+    so a fast producer is slowed down to the speed of the toasts instead of filling memory. Every spec waiting
+    when the previous batch is done is shown in the next one, up to `chunk_size` toasts per script.
+
+    Args:
+        lines: An iterable of lines, eg. `sys.stdin`
+        defaults: The parsed command line, used for the keys missing from a spec
+        chunk_size: The maximum number of toasts per script
+        max_pending: The maximum number of lines read but not shown yet
+        errors: Where invalid lines are reported, defaults to stderr
+
+    Returns:
+        The number of invalid lines, which were skipped
+    """
+    import queue
+    import threading
+
+    errors = errors or sys.stderr
+    parser = spec_parser()
+    pending = queue.Queue(max_pending)
+    done = object()
+
+    def read():
+        try:
+            for number, line in enumerate(lines, 1):
+                if line.strip():
+                    pending.put((number, line))  # blocks while the queue is full
+        finally:
+            pending.put(done)
+
+    threading.Thread(name="winotify-stream", target=read, daemon=True).start()
+
+    invalid = 0
+    finished = False
+    while not finished:
+        items = [pending.get()]
+        while len(items) < chunk_size and items[-1] is not done:
+            try:
+                items.append(pending.get_nowait())
+            except queue.Empty:
+                break
+        if items[-1] is done:
+            items.pop()
+            finished = True
+
+        with Batch(chunk_size) as batch:
+            for number, line in items:
+                try:
+                    batch.add(parse_spec(line, parser, defaults))
+                except ValueError as e:
+                    invalid += 1
+                    print("line {}: {}".format(number, e), file=errors)
+    return invalid
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = build_parser(argv)
+    args = parser.parse_args(argv)
+
+    if args.stream or args.daemon:
+        if args.batch_size < 1 or args.max_pending < 1:
+            parser.error("--batch-size and --max-pending must be at least 1")
+        from winotify._runner import HostRunner, ProcessPool, ProcessRunner, get_runner, set_runner
+        # one PowerShell for every toast, unless a runner was set
+        if type(get_runner()) in (ProcessRunner, ProcessPool):
+            set_runner(HostRunner())
+
+    if args.daemon:
+        from winotify._daemon import Daemon
+        daemon = Daemon(defaults=args)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.close()
+            get_runner().close()
+        return
+
+    if args.stream:
+        invalid = stream(sys.stdin, args, args.batch_size, args.max_pending)
+        get_runner().close()
+        sys.exit(1 if invalid else 0)
+
+    try:
+        toast = make_toast(args)
+    except ValueError as e:
+        parser.error(str(e))
     toast.show()
 
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,62 @@
+"""
+Lightweight activation entry point, registered as the protocol command by `Registry(..., fast_activation=True)`.
+
+Windows runs this file directly when a toast is clicked, with the app id, the app script and the activation url.
+If the app is already running, the url is forwarded to it and the app script never starts. Otherwise the app script
+is started with the url, exactly as without fast activation, and this process exits without waiting for it.
+
+This file is run by path so the winotify package is not imported, it must only use the standard library.
+The pidfile, address and message format must match `winotify.Notifier` and `winotify._communication`.
+"""
+import os
+import sys
+import tempfile
+
+
+def _address(app_id: str):
+    name = app_id.replace("-", "")
+    if sys.platform == 'win32':
+        return r'\\.\pipe\{}'.format(name), 'AF_PIPE'
+    return os.path.join(tempfile.gettempdir(), 'winotify-{}.sock'.format(name)), 'AF_UNIX'
+
+
+def forward(app_id: str, url: str) -> bool:
+    """
+    Send the target in `url`, the route and its arguments, to the running instance of `app_id`.
+
+    Returns:
+        True if it was delivered, False if there is no running instance to deliver it to
+    """
+    if not os.path.isfile(os.path.join(tempfile.gettempdir(), '{}.pid'.format(app_id))):
+        return False
+
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Client
+
+    address, family = _address(app_id)
+    try:
+        con = Client(address, family=family, authkey=app_id.encode())
+    except (OSError, EOFError, AuthenticationError):  # stale pidfile
+        return False
+    with con:
+        con.send(url.split(':', 1)[1])
+    return True
+
+
+def main(argv=None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    app_id, script = argv[0], argv[1]
+    url = argv[2] if len(argv) > 2 else ''
+
+    if url and forward(app_id, url):
+        return 0
+
+    # started rather than waited for, so this process and its console go away while the app runs
+    import subprocess
+    subprocess.Popen([sys.executable, script, url] if url else [sys.executable, script], close_fds=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Icons normalized into a content-addressed cache, so the shell decodes a small file instead of the original image.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+__all__ = ['IconCache']
+
+# the image formats toasts can show, a file in another format is converted, or refused without Pillow
+TOAST_FORMATS = {".png": ".png", ".jpg": ".jpg", ".jpeg": ".jpg", ".gif": ".gif"}
+
+# urls of images the shell loads itself, they are not cached
+REMOTE_SCHEMES = ("http:", "https:", "ms-appx:", "ms-appdata:")
+
+
+def _pillow():
+    # Pillow is optional, without it icons are cached as they are
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _source(path: str) -> str:
+    if path.startswith("file:"):
+        from urllib.parse import unquote, urlparse
+        parsed = urlparse(path)
+        path = unquote(parsed.path)
+        if os.name == 'nt' and path.startswith("/"):
+            path = path[1:]  # file:///C:/icon.png
+    return os.path.abspath(path)
+
+
+class IconCache:
+    def __init__(self, directory: str = '', max_size: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 max_entries: int = 512):
+        """
+        Downscale icons to the size of a toast, convert them to PNG and keep them in a directory named after
+        their content, so the same image from many paths is stored once and every toast reuses it.
+
+        Converting needs Pillow (`pip install Pillow`). Without it, images in a format toasts can show are
+        copied into the cache as they are, which still gives them a stable path.
+
+        Args:
+            directory: Where the cached icons are kept, defaults to "winotify-icons" in the temp directory.
+                       The cache outlives the process, so the next run starts warm.
+            max_size: The maximum width and height in pixels, larger images are downscaled keeping their ratio
+            max_bytes: The maximum size of the cached files, the least recently used ones are removed first
+            max_entries: The maximum number of cached files
+
+        Examples:
+            ```python
+            icons = winotify.IconCache()
+            toast = winotify.Notification("app", "title", icon=icons.resolve(r"C:\\photos\\huge.png"))
+            ```
+        """
+        if max_size < 1 or max_entries < 1:
+            raise ValueError("max_size and max_entries must be at least 1")
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "winotify-icons")
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.size = 0
+        self._sources = {}  # (path, mtime, size) -> cached file name
+        self._files = OrderedDict()  # cached file name -> size, least recently used first
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        # adopt the files left by previous runs, the oldest are evicted first
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self.size += size
+
+    def __len__(self):
+        return len(self._files)
+
+    def resolve(self, path: str) -> str:
+        """
+        Returns:
+            The `file:///` url of the cached variant of the image at `path`, a file path or `file:` url.
+            Other urls (http, https, ms-appx, ms-appdata) are returned as they are.
+
+        Raises:
+            OSError: If the image can't be read
+            ValueError: If it is not an image toasts can show and Pillow is not installed to convert it,
+                        or Pillow can't decode it
+        """
+        if path.lower().startswith(REMOTE_SCHEMES):
+            return path
+        path = _source(path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            name = self._sources.get(key)
+            if name is not None and name in self._files:
+                self.hits += 1
+                self._files.move_to_end(name)
+                return self._url(name)
+
+        name = self._store(path)
+        with self._lock:
+            self.misses += 1
+            if len(self._sources) >= 4 * self.max_entries:  # forget the sources of evicted files
+                self._sources = {k: v for k, v in self._sources.items() if v in self._files}
+            self._sources[key] = name
+            if name in self._files:
+                self._files.move_to_end(name)
+            else:
+                size = os.path.getsize(os.path.join(self.directory, name))
+                self._files[name] = size
+                self.size += size
+            self._evict(keep=name)
+        return self._url(name)
+
+    def _url(self, name: str) -> str:
+        return Path(self.directory, name).as_uri()
+
+    def _store(self, path: str) -> str:
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        image = _pillow()
+        if image is None:
+            ext = TOAST_FORMATS.get(os.path.splitext(path)[1].lower())
+            if ext is None:
+                raise ValueError("{} is not a png, jpg or gif, install Pillow to convert it".format(path))
+            name = digest + ext
+            self._write(name, lambda tmp: shutil.copyfile(path, tmp))
+            return name
+
+        name = "{}-{}.png".format(digest, self.max_size)
+        self._write(name, lambda tmp: self._convert(image, path, tmp))
+        return name
+
+    def _convert(self, image, path: str, tmp: str):
+        try:
+            with image.open(path) as img:
+                img.thumbnail((self.max_size, self.max_size))
+                if img.mode not in ("RGB", "RGBA"):
+                    img = img.convert("RGBA")
+                img.save(tmp, "PNG", optimize=True)
+        except (image.UnidentifiedImageError, image.DecompressionBombError) as e:
+            raise ValueError("can't decode {}: {}".format(path, e)) from e
+
+    def _write(self, name: str, write):
+        final = os.path.join(self.directory, name)
+        if os.path.exists(final):
+            return  # same content, already cached
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = "{}.{}.tmp".format(final, threading.get_ident())
+        try:
+            write(tmp)
+            os.replace(tmp, final)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _evict(self, keep: str):
+        # called with the lock held
+        while (len(self._files) > self.max_entries or self.size > self.max_bytes) and len(self._files) > 1:
+            name = next(iter(self._files))
+            if name == keep:
+                self._files.move_to_end(name)
+                continue
+            self.size -= self._files.pop(name)
+            self.evicted += 1
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+        Remove every cached icon
+        """
+        with self._lock:
+            for name in self._files:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            self._files.clear()
+            self._sources.clear()
+            self.size = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns:
+            The number of hits, misses and evictions, and the number and total size of the cached files
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted, "entries": len(self._files),
+                    "bytes": self.size}
@@ -0,0 +1,233 @@
+import asyncio
+import functools
+import subprocess
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Set
+
+from winotify import Notifier, Notification, Batch, Registry, _instrument, _journal
+from winotify._runner import ProcessPool, ProcessRunner, get_runner, startupinfo
+from winotify._escape import ps_literal
+from winotify._template import CLEAR_TEMPLATE
+
+__all__ = ['AsyncNotifier']
+
+
+def _is_coroutine(func: Callable) -> bool:
+    # a callback bound to the arguments of its url is a partial, which asyncio only recognizes from python 3.8
+    return asyncio.iscoroutinefunction(getattr(func, 'func', func))
+
+
+def _set_result(future: asyncio.Future, result):
+    if not future.done():  # cancelled by the caller
+        future.set_result(result)
+
+
+async def create_process(cmd: List[str]) -> int:
+    """
+    Run `cmd` without blocking the event loop.
+
+    Returns:
+        The exit code of the process
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        startupinfo=startupinfo()
+    )
+    return await proc.wait()
+
+
+class AsyncNotifier(Notifier):
+    def __init__(self, registry: Registry, *, launcher: Callable[[List[str]], Awaitable[int]] = create_process,
+                 queue_size: Optional[int] = None, connect_timeout: float = 5.0, backend=None, contexts=None,
+                 icons=None):
+        """
+        A `Notifier` for asyncio applications.
+
+        Toasts are shown with `await show(...)`, and callbacks are dispatched on the event loop: coroutine
+        functions are scheduled as tasks, callbacks registered with `run_in_main_thread=True` are called in the loop,
+        every other callback still runs in the listener thread. Activations can also be consumed with
+        `async for func in notifier.activations()`. When the loop is closed, eg. after `asyncio.run` returned,
+        callbacks registered with `run_in_main_thread=True` wait for `update`, `drain` or `run_forever`, like
+        with `Notifier`.
+
+        Args:
+            registry: A `Registry` instance containing the `app_id`, default interpreter, and the script path.
+            launcher: A coroutine function running a command line, used when the current runner is a
+                      `ProcessRunner`. A `ProcessPool` runs the scripts itself, within its limits, and the exit
+                      code of its process is awaited. Other runners (eg. `HostRunner`) are called in the default
+                      executor.
+            queue_size: See `Notifier`
+            connect_timeout: See `Notifier`
+            backend: See `Notifier`
+            contexts: See `Notifier`
+            icons: See `Notifier`
+        """
+        super().__init__(registry, queue_size=queue_size, connect_timeout=connect_timeout, backend=backend,
+                         contexts=contexts, icons=icons)
+        self.launcher = launcher
+        self.loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        self._subscribers = set()  # type: Set[asyncio.Queue]
+        self._tasks = set()  # type: Set[asyncio.Task]
+        if hasattr(self, 'listener'):
+            self.listener.dispatch = self._dispatch
+
+    async def _run_ps(self, *, file: str = '', command: str = '') -> Optional[int]:
+        hook = _instrument.hook
+        if hook is None:
+            return await self._launch(file=file, command=command)
+        start = _instrument.perf_counter()  # with the launcher, until the process exits
+        try:
+            return await self._launch(file=file, command=command)
+        except Exception:
+            hook.count(_instrument.LAUNCH_ERRORS)
+            raise
+        finally:
+            hook.span(_instrument.LAUNCH, _instrument.perf_counter() - start)
+
+    async def _launch(self, *, file: str = '', command: str = '') -> Optional[int]:
+        runner = self.backend or get_runner()
+        loop = asyncio.get_running_loop()
+        if isinstance(runner, ProcessPool):
+            # so the scripts count against its limit and its failures and stats, submitting blocks if it is full
+            exited = loop.create_future()
+
+            def done(code):
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(_set_result, exited, code)
+
+            await loop.run_in_executor(None, functools.partial(runner, file=file, command=command, done=done))
+            return await exited
+        if isinstance(runner, ProcessRunner):
+            return await self.launcher(runner.command(file=file, command=command))
+        await loop.run_in_executor(None, functools.partial(runner, file=file, command=command))
+        return None
+
+    async def show(self, notification: Notification) -> Optional[int]:
+        """
+        Show `notification`
+
+        Returns:
+            The exit code of the PowerShell process, or None if the script was handed to another runner
+        """
+        return await self._show([notification])
+
+    async def _show(self, notifications: List[Notification]) -> Optional[int]:
+        # the same measurements and journal events as `winotify._display`
+        journal = _journal.journal
+        start = _instrument.perf_counter() if journal is not None else 0.0
+        result = await self._show_now(notifications)
+        if journal is not None:
+            latency = _instrument.perf_counter() - start
+            for notif in notifications:
+                journal.record(_journal.SHOW, notif.app_id, notif.tag, notif.group, latency)
+        return result
+
+    async def _show_now(self, notifications: List[Notification]) -> Optional[int]:
+        backend = self.backend or get_runner()
+        hook = _instrument.hook
+        if hasattr(backend, 'show'):  # takes toasts rather than scripts
+            loop = asyncio.get_running_loop()
+            if hook is None:
+                await loop.run_in_executor(None, backend.show, notifications)
+                return None
+            hook.count(_instrument.TOASTS_SHOWN, len(notifications))
+            start = _instrument.perf_counter()
+            try:
+                await loop.run_in_executor(None, backend.show, notifications)
+            except Exception:
+                hook.count(_instrument.LAUNCH_ERRORS)
+                raise
+            finally:
+                hook.span(_instrument.LAUNCH, _instrument.perf_counter() - start)
+            return None
+
+        start = _instrument.perf_counter() if hook is not None else 0.0
+        script = Batch.script(notifications)
+        if hook is not None:
+            hook.span(_instrument.RENDER, _instrument.perf_counter() - start)
+            hook.count(_instrument.TOASTS_SHOWN, len(notifications))
+        return await self._run_ps(command=script)
+
+    async def show_many(self, notifications: Iterable[Notification], chunk_size: int = 50):
+        """
+        Show many toasts using one script per `chunk_size` toasts.
+
+        See Also:
+            `Notifier.show_many`
+        """
+        chunk = []
+        for notif in notifications:
+            chunk.append(notif)
+            if len(chunk) >= chunk_size:
+                await self._show(chunk)
+                chunk = []
+        if chunk:
+            await self._show(chunk)
+
+    async def clear(self) -> Optional[int]:
+        """
+        Clear all notification created by this notifier from action center
+        """
+        result = await self._run_ps(command=CLEAR_TEMPLATE.format(app_id=ps_literal(self.app_id)))
+        if _journal.journal is not None:
+            _journal.journal.record(_journal.CLEAR, self.app_id)
+        return result
+
+    async def start(self):
+        """
+        Start the listener thread and bind callback dispatching to the running event loop.
+
+        Examples:
+            ```python
+            async def main():
+                await notifier.start()
+                ...
+            ```
+        """
+        if self._protocol_launched:  # call the callback directly
+            result = self._callback()()
+            if asyncio.iscoroutine(result):
+                await result
+            return
+
+        self.loop = asyncio.get_running_loop()
+        super().start()
+
+    async def activations(self) -> AsyncIterator[Callable]:
+        """
+        Yield every activated callback function, in addition to the normal dispatching.
+
+        Examples:
+            ```python
+            async for func in notifier.activations():
+                print(func.__name__, "was clicked")
+            ```
+        """
+        q = asyncio.Queue()
+        self._subscribers.add(q)
+        try:
+            while True:
+                yield await q.get()
+        finally:
+            self._subscribers.discard(q)
+
+    def _dispatch(self, func: Callable):
+        # called from the listener thread
+        if self.loop is None or self.loop.is_closed():
+            self.listener.run_callback(func)
+            return
+        if not _is_coroutine(func) and not hasattr(func, 'rimt'):
+            func()
+        self.loop.call_soon_threadsafe(self._dispatch_in_loop, func)
+
+    def _dispatch_in_loop(self, func: Callable):
+        for q in self._subscribers:
+            q.put_nowait(func)
+        if _is_coroutine(func):
+            task = self.loop.create_task(func())
+            self._tasks.add(task)  # keep a reference until it is done
+            task.add_done_callback(self._tasks.discard)
+        elif hasattr(func, 'rimt'):
+            func()
@@ -0,0 +1,155 @@
+"""
+Display backends which take toasts rather than PowerShell scripts.
+
+A backend is a runner (see `set_runner`) with a `show(notifications)` method: toasts shown through it are handed
+over as they are, while scripts that are not toasts (eg. `Notifier.clear`) still go through `__call__`.
+A backend with an `update(app_id, tag, group, values, sequence)` method also gets the updates of progress toasts,
+instead of their scripts.
+`ProcessRunner` and `HostRunner` are the PowerShell backends.
+"""
+import collections
+import importlib
+import threading
+from typing import Deque, Dict, List, Optional
+
+from winotify import Notification
+from winotify._runner import ProcessRunner
+
+__all__ = ['RecordingBackend', 'WinRTBackend', 'Record', 'Update']
+
+Record = collections.namedtuple('Record', 'app_id tag group xml')
+Update = collections.namedtuple('Update', 'app_id tag group values sequence')
+
+
+class RecordingBackend:
+    def __init__(self, max_records: Optional[int] = None, render: bool = True):
+        """
+        Keep every toast in memory instead of showing it, for tests and load simulations on any platform.
+
+        Args:
+            max_records: Keep only this many of the most recent records and scripts, `count` still counts them all
+            render: If True, a `Record` with the rendered toast XML is kept for every toast,
+                    else the `Notification` itself is kept, which is faster
+
+        Examples:
+            ```python
+            backend = RecordingBackend()
+            winotify.set_runner(backend)
+            run_the_code_under_test()
+            assert backend.records[0].xml.count("<action") == 2
+            ```
+        """
+        self.render = render
+        self.records = collections.deque(maxlen=max_records)  # type: Deque
+        self.scripts = collections.deque(maxlen=max_records)  # type: Deque[str]
+        self.updates = collections.deque(maxlen=max_records)  # type: Deque[Update]
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def show(self, notifications: List[Notification]):
+        if self.render:
+            records = [Record(n.app_id, n.tag, n.group, n._xml()) for n in notifications]
+        else:
+            records = notifications
+        with self._lock:
+            self.records.extend(records)
+            self.count += len(records)
+
+    def update(self, app_id: str, tag: str, group: str, values: Dict[str, str], sequence: int):
+        with self._lock:
+            self.updates.append(Update(app_id, tag, group, dict(values), sequence))
+
+    def __call__(self, *, file: str = '', command: str = ''):
+        with self._lock:
+            self.scripts.append(command or file)
+
+    def clear(self):
+        """
+        Forget every record, update and script, and reset `count`
+        """
+        with self._lock:
+            self.records.clear()
+            self.updates.clear()
+            self.scripts.clear()
+            self.count = 0
+
+    def close(self):
+        pass
+
+
+def _winrt():
+    # the projections of the Windows SDK, published as `winsdk` and, before that, as `winrt`
+    for package in ("winsdk", "winrt"):
+        try:
+            notifications = importlib.import_module(package + ".windows.ui.notifications")
+            dom = importlib.import_module(package + ".windows.data.xml.dom")
+        except ImportError:
+            continue
+        return notifications, dom
+    raise ImportError("WinRTBackend needs the winsdk package: pip install winsdk")
+
+
+class WinRTBackend:
+    def __init__(self, fallback=None):
+        """
+        Show toasts by calling WinRT directly from Python, without starting PowerShell.
+
+        Needs the optional `winsdk` (or older `winrt`) package.
+
+        Args:
+            fallback: Runs the scripts which are not toasts, eg. `Notifier.clear`, defaults to a `ProcessRunner`
+
+        Raises:
+            ImportError: If neither package is installed
+        """
+        self._notifications, self._dom = _winrt()
+        self.fallback = fallback or ProcessRunner()
+        self._notifiers = {}  # type: Dict[str, object]
+
+    @staticmethod
+    def available() -> bool:
+        """
+        Returns:
+            True if the packages needed by `WinRTBackend` are installed
+        """
+        try:
+            _winrt()
+        except ImportError:
+            return False
+        return True
+
+    def _notifier(self, app_id: str):
+        notifier = self._notifiers.get(app_id)
+        if notifier is None:
+            manager = self._notifications.ToastNotificationManager
+            notifier = self._notifiers[app_id] = manager.create_toast_notifier(app_id)
+        return notifier
+
+    def show(self, notifications: List[Notification]):
+        for notif in notifications:
+            doc = self._dom.XmlDocument()
+            doc.load_xml(notif._xml())
+            toast = self._notifications.ToastNotification(doc)
+            toast.tag = notif.tag
+            toast.group = notif.group
+            values = getattr(notif, 'data', None)  # bound values of a `ProgressNotification`
+            if values:
+                data = self._notifications.NotificationData()
+                for key, value in values.items():
+                    data.values.insert(key, value)
+                data.sequence_number = 1
+                toast.data = data
+            self._notifier(notif.app_id).show(toast)
+
+    def update(self, app_id: str, tag: str, group: str, values: Dict[str, str], sequence: int):
+        data = self._notifications.NotificationData()
+        for key, value in values.items():
+            data.values.insert(key, value)
+        data.sequence_number = sequence
+        self._notifier(app_id).update(data, tag, group)
+
+    def __call__(self, *, file: str = '', command: str = ''):
+        self.fallback(file=file, command=command)
+
+    def close(self):
+        self.fallback.close()
@@ -1,31 +1,295 @@
 import atexit
 import multiprocessing
+import os
+import pickle
+import random
+import sys
+import tempfile
 import threading
+import time
+import traceback
 import typing
-from queue import Queue
-from multiprocessing.connection import Listener as MPL, Client
-__all__ = ['Listener', 'Sender']
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Listener as MPL, Client, Connection, answer_challenge, deliver_challenge
+
+from winotify import _instrument, _journal
+from winotify._routing import resolve
+__all__ = ['Listener', 'Sender', 'CallbackQueue', 'Transport', 'ConnectTimeout']
+
+DISPATCH_QUEUE_SIZE = 64
+
+
+def _call(func: typing.Callable):
+    hook = _instrument.hook
+    if hook is None:
+        func()
+        return
+    start = _instrument.perf_counter()
+    try:
+        func()
+    except Exception:
+        hook.count(_instrument.CALLBACK_ERRORS)
+        raise
+    finally:
+        hook.span(_instrument.CALLBACK, _instrument.perf_counter() - start)
+
+
+class CallbackQueue:
+    def __init__(self, maxsize: int = DISPATCH_QUEUE_SIZE):
+        """
+        A bounded queue of callbacks waiting to run in the main thread.
+
+        Putting never blocks, callbacks arriving while the queue is full are dropped and counted.
+        Getting can block until a callback arrives or `wake` is called.
+
+        Args:
+            maxsize: The maximum number of pending callbacks
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.queued = 0
+        self.dropped = 0
+        self.executed = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._woken = False
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, func: typing.Callable) -> bool:
+        """
+        Returns:
+            True if `func` was queued, False if it was dropped because the queue is full
+        """
+        with self._cond:
+            queued = len(self._items) < self.maxsize
+            if queued:
+                self._items.append(func)
+                self.queued += 1
+                self._cond.notify()
+            else:
+                self.dropped += 1
+            depth = len(self._items)
+        hook = _instrument.hook
+        if hook is not None:
+            hook.gauge(_instrument.QUEUE_DEPTH, depth)
+            if not queued:
+                hook.count(_instrument.CALLBACKS_DROPPED)
+        return queued
+
+    def get(self, timeout: typing.Optional[float] = 0) -> typing.Optional[typing.Callable]:
+        """
+        Args:
+            timeout: Seconds to wait for a callback, 0 does not wait and None waits until one arrives
+
+        Returns:
+            The oldest pending callback, or None if there is none in time or `wake` was called
+        """
+        with self._cond:
+            if timeout != 0:
+                self._cond.wait_for(lambda: self._items or self._woken, timeout)
+            self._woken = False
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def run(self, timeout: typing.Optional[float] = 0) -> bool:
+        """
+        Get the oldest pending callback and call it.
+
+        Returns:
+            True if a callback was called
+        """
+        func = self.get(timeout)
+        if func is None:
+            return False
+        try:
+            _call(func)
+        finally:
+            with self._cond:
+                self.executed += 1
+        return True
+
+    def wake(self):
+        """
+        Make a blocked `get` return immediately
+        """
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    @property
+    def stats(self) -> typing.Dict[str, int]:
+        """
+        Returns:
+            The number of callbacks queued, dropped and executed so far, and the number still pending
+        """
+        with self._cond:
+            return {"queued": self.queued, "dropped": self.dropped, "executed": self.executed,
+                    "pending": len(self._items)}
+
+
+class Transport:
+    def __init__(self, key: str, family: typing.Optional[str] = None, address: typing.Optional[str] = None):
+        """
+        Where the listener of the app `key` can be reached.
+
+        Args:
+            key: The app id
+            family: 'AF_PIPE' (named pipe) or 'AF_UNIX' (unix domain socket), defaults to named pipes on Windows
+                    and unix domain sockets elsewhere
+            address: The pipe name or socket path, derived from `key` by default
+        """
+        if family is None:
+            family = 'AF_PIPE' if sys.platform == 'win32' else 'AF_UNIX'
+        if address is None:
+            name = key.replace("-", "")
+            if family == 'AF_PIPE':
+                address = r'\\.\pipe\{}'.format(name)
+            else:
+                address = os.path.join(tempfile.gettempdir(), 'winotify-{}.sock'.format(name))
+        self.family = family
+        self.address = address
+
+    def listen(self) -> MPL:
+        """
+        Returns:
+            A listener accepting raw connections, authentication is left to the caller
+
+        Raises:
+            OSError: If another listener is already using the address
+        """
+        if self.family == 'AF_UNIX' and os.path.exists(self.address):
+            try:
+                self.connect_raw().close()
+            except OSError:
+                os.unlink(self.address)  # left over by a process that did not exit cleanly
+        return MPL(self.address, family=self.family)
+
+    def connect(self, authkey: bytes) -> Connection:
+        """
+        Returns:
+            An authenticated connection to the listener
+        """
+        return Client(self.address, family=self.family, authkey=authkey)
+
+    def connect_raw(self) -> Connection:
+        """
+        Returns:
+            A connection to the listener that skips authentication
+        """
+        return Client(self.address, family=self.family)
+
+
+class _TimedConnection:
+    # the parts of Connection used by the authentication handshake, with a deadline on every read
+    def __init__(self, con: Connection, timeout: float):
+        self.con = con
+        self.timeout = timeout
+
+    def send_bytes(self, buf, *args):
+        self.con.send_bytes(buf, *args)
+
+    def recv_bytes(self, maxlength=None):
+        if not self.con.poll(self.timeout):
+            raise TimeoutError("no data received in {} seconds".format(self.timeout))
+        return self.con.recv_bytes(maxlength)
 
 
 class Listener:
-    def __init__(self, key: str):
-        pipe = r'\\.\pipe\{}'.format(key.replace("-", ""))
-        print(pipe)
-        self.server = MPL(pipe, family='AF_PIPE', authkey=key.encode())
+    def __init__(self,
+                 key: str,
+                 queue_size: int = DISPATCH_QUEUE_SIZE,
+                 *,
+                 transport: typing.Optional[Transport] = None,
+                 workers: int = 4,
+                 max_pending: int = 32,
+                 read_timeout: float = 5.0,
+                 max_message_size: int = 64 * 1024):
+        """
+        Receive activation targets (see `parse_target`) from other processes and run the matching callbacks.
+
+        The listener thread only accepts connections, reading them and running the callbacks is done by a thread
+        pool, so a slow callback or a silent client does not hold up other activations.
+
+        Args:
+            key: The app id, also used as the authentication key
+            queue_size: The maximum number of callbacks waiting to run in the main thread
+            transport: Where to listen, see `Transport`
+            workers: The number of threads reading connections and running callbacks
+            max_pending: The maximum number of connections being handled at once, the listener stops accepting
+                         new connections until one of them is done
+            read_timeout: Seconds a client gets to authenticate and send its message before it is dropped
+            max_message_size: Messages larger than this many bytes are rejected
+        """
+        self.transport = transport or Transport(key)
+        self.server = self.transport.listen()
+        self.key = key
+        self.authkey = key.encode()
+        self.read_timeout = read_timeout
+        self.max_message_size = max_message_size
         self.thread = threading.Thread(name=self.__repr__(), target=self._loop, daemon=True)
-        self.callbacks = {}
-        self.queue = Queue(1)
-        atexit.register(self._cleanup)
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="winotify-listener")
+        self.callbacks = {}  # route -> callback
+        self.contexts = None  # where the arguments too long for an activation url are, see `ContextStore`
+        self.queue = CallbackQueue(queue_size)
+        self.rejected = 0
+        # called with every received callback, can be replaced to dispatch callbacks elsewhere
+        self.dispatch = self.run_callback
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._closed = False
+        atexit.register(self.close)
 
     def _loop(self):
-        while True:
+        while not self._closed:
+            self._slots.acquire()  # back-pressure, wait until a connection is done
             try:
-                with self.server.accept() as con:
-                    msg = con.recv()
-            except multiprocessing.AuthenticationError:
+                con = self.server.accept()
+            except OSError:
+                self._slots.release()
                 continue
+            if self._closed:
+                con.close()
+                break
+            timed = _instrument.hook is not None or _journal.journal is not None
+            self.pool.submit(self._handle, con, _instrument.perf_counter() if timed else 0.0)
 
-            self.run_callback(self.callbacks.get(msg, lambda: print(f'no such callbacks: {msg}')))
+    def _receive(self, con: Connection):
+        timed = _TimedConnection(con, self.read_timeout)
+        deliver_challenge(timed, self.authkey)
+        answer_challenge(timed, self.authkey)
+        return pickle.loads(timed.recv_bytes(self.max_message_size))
+
+    def _handle(self, con: Connection, accepted: float = 0.0):
+        hook = _instrument.hook
+        try:
+            if hook is not None:
+                start = _instrument.perf_counter()
+                if accepted:
+                    hook.span(_instrument.IPC_ACCEPT, start - accepted)
+            with con:
+                try:
+                    msg = self._receive(con)
+                except (multiprocessing.AuthenticationError, EOFError, OSError, pickle.UnpicklingError):
+                    self.rejected += 1  # TimeoutError is an OSError
+                    if hook is not None:
+                        hook.count(_instrument.IPC_ERRORS)
+                    return
+            if hook is not None:
+                hook.span(_instrument.IPC_RECV, _instrument.perf_counter() - start)
+                hook.count(_instrument.CALLBACKS_DISPATCHED)
+            journal = _journal.journal
+            if journal is not None:
+                latency = _instrument.perf_counter() - accepted if accepted else None
+                journal.record(_journal.ACTIVATE, self.key, detail=msg, latency=latency)
+            self.dispatch(resolve(msg, self.callbacks, self.contexts))
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._slots.release()
 
     def run_callback(self, func: typing.Callable):
         """
@@ -33,31 +297,82 @@ class Listener:
         :param func: callback's function object
         :return:
         """
-        if hasattr(func, 'rimt'):  # put func to queue
+        if hasattr(func, 'rimt'):  # put func to queue, dropped if the main thread is too far behind
             self.queue.put(func)
         else:
-            func()
+            _call(func)
 
     def start(self):
         self.thread.start()
         print(f"Thread {self.thread.name}, {self.thread.is_alive()}")
 
-    def _cleanup(self):
+    def close(self):
+        """
+        Stop accepting connections, callbacks already running are not interrupted
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self.thread.is_alive():
+            try:
+                self.transport.connect_raw().close()  # wake up the blocked accept
+            except OSError:
+                pass
         self.server.close()
+        self.pool.shutdown(wait=False)
+
+
+class ConnectTimeout(ConnectionError):
+    def __init__(self, address: str, attempts: int, latency: float):
+        super().__init__(f"could not connect to {address!r} after {attempts} attempts in {latency:.2f} seconds")
+        self.attempts = attempts
+        self.latency = latency
 
 
 class Sender:
-    def __init__(self, key: str):
-        pipe = r"\\.\pipe\{}".format(key.replace("-", ""))
-        connected = False
-        while not connected:
+    def __init__(self,
+                 key: str,
+                 *,
+                 transport: typing.Optional[Transport] = None,
+                 timeout: float = 5.0,
+                 backoff: float = 0.02,
+                 max_backoff: float = 0.5):
+        """
+        Connect to the listener of the app `key`, retrying with exponential backoff and jitter until `timeout`.
+
+        Args:
+            key: The app id, also used as the authentication key
+            transport: Where the listener is, see `Transport`
+            timeout: Seconds to keep trying before giving up
+            backoff: Upper bound of the first delay between attempts, doubled after every failed attempt
+            max_backoff: Upper bound of any delay between attempts
+
+        Raises:
+            ConnectTimeout: If no connection could be made in time, eg. the listener is gone and the pidfile is stale
+        """
+        transport = transport or Transport(key)
+        self.attempts = 0
+        self.latency = 0.0  # seconds spent connecting
+        self.last_error = None  # type: typing.Optional[BaseException]
+
+        start = time.monotonic()
+        deadline = start + timeout
+        delay = backoff
+        while True:
+            self.attempts += 1
             try:
-                self.con = Client(pipe, family='AF_PIPE', authkey=key.encode())
-                connected = True
-            except multiprocessing.AuthenticationError:
-                continue
+                self.con = transport.connect(key.encode())
+                break
+            except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+                self.last_error = e
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.latency = time.monotonic() - start
+                raise ConnectTimeout(transport.address, self.attempts, self.latency) from self.last_error
+            time.sleep(min(random.uniform(0, delay), remaining))
+            delay = min(delay * 2, max_backoff)
+        self.latency = time.monotonic() - start
 
     def send(self, data):
         self.con.send(data)
         self.con.close()
-
@@ -0,0 +1,323 @@
+import argparse
+import getpass
+import json
+import multiprocessing
+import threading
+import traceback
+import typing
+from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+
+from winotify._communication import Sender, Transport, _TimedConnection
+from winotify._scheduler import Scheduler
+
+__all__ = ['Daemon', 'DaemonClient', 'DaemonError', 'default_key']
+
+
+def default_key() -> str:
+    """
+    Returns:
+        The key of the daemon of the current user, which names its socket or pipe
+    """
+    try:
+        user = getpass.getuser()
+    except (KeyError, OSError):  # no user name in the environment nor in the password database
+        user = "default"
+    return "winotify-daemon-" + user
+
+
+class DaemonError(Exception):
+    pass
+
+
+class Daemon:
+    def __init__(self,
+                 key: str = '',
+                 *,
+                 transport: typing.Optional[Transport] = None,
+                 scheduler: typing.Optional[Scheduler] = None,
+                 show: typing.Optional[typing.Callable] = None,
+                 defaults: typing.Optional[argparse.Namespace] = None,
+                 max_clients: int = 64,
+                 read_timeout: float = 5.0,
+                 max_message_size: int = 1024 * 1024):
+        """
+        Show toasts sent by other processes, so they don't each need their own PowerShell.
+
+        Clients (see `DaemonClient`) keep a connection open and send toast specs, the JSON objects of
+        `winotify --stream`. Every toast goes through a `Scheduler`, which coalesces toasts with the same tag,
+        rate limits each app and shows toasts ready at the same time in one batch.
+
+        Args:
+            key: Names the socket or pipe and authenticates clients, defaults to one daemon per user
+            transport: Where to listen, see `Transport`
+            scheduler: The scheduler toasts are submitted to, a default `Scheduler` is created if not given
+            show: Called by the default scheduler with every list of toasts to show, eg. a fake display in tests.
+                  Defaults to showing them in one batch with the current runner.
+            defaults: Parsed command line options used for the keys missing from a spec
+            max_clients: The maximum number of connected clients, more are accepted when one disconnects
+            read_timeout: Seconds a client gets to authenticate
+            max_message_size: Messages larger than this many bytes close the connection
+
+        Raises:
+            OSError: If another daemon already uses the same key
+        """
+        from winotify.__main__ import build_parser, spec_parser
+        self.key = key or default_key()
+        self.transport = transport or Transport(self.key)
+        if scheduler is None:
+            scheduler = Scheduler(show=show) if show is not None else Scheduler()
+        self.scheduler = scheduler
+        self.defaults = defaults or build_parser().parse_args([])
+        self.read_timeout = read_timeout
+        self.max_message_size = max_message_size
+        self.authkey = self.key.encode()
+        self.server = self.transport.listen()
+        self.thread = threading.Thread(name="winotify-daemon", target=self._loop, daemon=True)
+        self.accepted = 0
+        self.invalid = 0
+        self.refused = 0
+        self.connections = 0
+        self._parser = spec_parser()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_clients)
+        self._stopped = threading.Event()
+        self._closed = False
+
+    def _loop(self):
+        while not self._closed:
+            self._slots.acquire()
+            try:
+                con = self.server.accept()
+            except OSError:
+                self._slots.release()
+                continue
+            if self._closed:
+                con.close()
+                self._slots.release()
+                break
+            threading.Thread(name="winotify-daemon-client", target=self._serve, args=(con,), daemon=True).start()
+
+    def _serve(self, con: Connection):
+        connected = False
+        try:
+            with con:
+                timed = _TimedConnection(con, self.read_timeout)
+                try:
+                    deliver_challenge(timed, self.authkey)
+                    answer_challenge(timed, self.authkey)
+                except (multiprocessing.AuthenticationError, EOFError, OSError):
+                    with self._lock:
+                        self.refused += 1
+                    return
+                with self._lock:
+                    self.connections += 1
+                connected = True
+                while not self._closed:
+                    if not con.poll(0.5) or self._closed:  # wake up now and then to notice close()
+                        continue
+                    try:
+                        data = con.recv_bytes(self.max_message_size)
+                    except (EOFError, OSError):
+                        return  # the client is gone, or sent too much
+                    try:
+                        reply = self.handle(json.loads(data))
+                    except ValueError as e:
+                        reply = {"error": str(e)}
+                    con.send_bytes(json.dumps(reply).encode())
+        except OSError:
+            pass  # the client disconnected before reading its reply
+        except Exception:
+            traceback.print_exc()
+        finally:
+            if connected:
+                with self._lock:
+                    self.connections -= 1
+            self._slots.release()
+
+    def handle(self, request: dict) -> dict:
+        """
+        Answer one request of a client.
+
+        Requests are `{"op": "show", "toasts": [spec, ...]}`, answered with the number of toasts accepted and the
+        index and reason of every invalid one, and `{"op": "stats"}`, answered with `stats`.
+        A spec can have a "priority" key, see `Scheduler.submit`.
+        """
+        if not isinstance(request, dict):
+            raise ValueError("a request must be a JSON object")
+        op = request.get("op")
+        if op == "stats":
+            return {"stats": self.stats}
+        if op != "show":
+            raise ValueError("unknown op {!r}".format(op))
+
+        from winotify.__main__ import toast_from_spec
+        specs = request.get("toasts")
+        if not isinstance(specs, list):
+            raise ValueError("toasts must be a list of toast specs")
+        accepted = 0
+        errors = []
+        for i, spec in enumerate(specs):
+            try:
+                if not isinstance(spec, dict):
+                    raise ValueError("a toast must be a JSON object")
+                spec = dict(spec)
+                priority = spec.pop("priority", 0)
+                if not isinstance(priority, int):
+                    raise ValueError("priority must be an integer")
+                toast = toast_from_spec(spec, self._parser, self.defaults)
+            except ValueError as e:
+                errors.append([i, str(e)])
+                continue
+            if self.scheduler.submit(toast, priority):
+                accepted += 1
+            else:
+                errors.append([i, "dropped, too many toasts are waiting"])
+        with self._lock:
+            self.accepted += accepted
+            self.invalid += len(errors)
+        return {"accepted": accepted, "errors": errors}
+
+    @property
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """
+        Returns:
+            Counters of toasts accepted and invalid, clients refused and connected, and the scheduler's counters
+        """
+        with self._lock:
+            stats = {"accepted": self.accepted, "invalid": self.invalid, "refused": self.refused,
+                     "connections": self.connections}
+        stats["scheduler"] = self.scheduler.stats
+        return stats
+
+    def start(self):
+        """
+        Start accepting clients and showing toasts in background threads
+        """
+        self.scheduler.start()
+        self.thread.start()
+
+    def serve_forever(self):
+        """
+        Start, then block until `close` is called from another thread
+        """
+        self.start()
+        while not self._stopped.wait(0.5):  # a timeout keeps Ctrl+C working on Windows
+            pass
+
+    def close(self, flush: bool = True):
+        """
+        Stop accepting clients and showing toasts, connected clients are disconnected within half a second
+
+        Args:
+            flush: If True, toasts still waiting for the rate limit are shown right away
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self.thread.is_alive():
+            try:
+                self.transport.connect_raw().close()  # wake up the blocked accept
+            except OSError:
+                pass
+            self.thread.join()
+        self.server.close()
+        self.scheduler.stop(flush)
+        self._stopped.set()
+
+
+class DaemonClient:
+    def __init__(self, key: str = '', *, transport: typing.Optional[Transport] = None, timeout: float = 5.0):
+        """
+        Send toasts to a `Daemon` over a single connection, opened on the first request and reused after.
+
+        If the connection breaks (eg. the daemon restarted), the request is sent again once on a new connection.
+        Requests are serialized, so a client can be shared between threads.
+
+        Args:
+            key: The key of the daemon, defaults to the daemon of the current user
+            transport: Where the daemon is, see `Transport`
+            timeout: Seconds to keep trying to connect, see `Sender`
+
+        Examples:
+            ```python
+            with DaemonClient() as client:
+                client.show(title="Build finished", message="All tests passed", tag="build")
+            ```
+        """
+        self.key = key or default_key()
+        self.transport = transport or Transport(self.key)
+        self.timeout = timeout
+        self.connects = 0
+        self._con = None  # type: typing.Optional[Connection]
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        if self._con is None:
+            self._con = Sender(self.key, transport=self.transport, timeout=self.timeout).con
+            self.connects += 1
+        return self._con
+
+    def _drop(self):
+        con, self._con = self._con, None
+        if con is not None:
+            con.close()
+
+    def request(self, request: dict) -> dict:
+        """
+        Send `request` and return the reply, see `Daemon.handle`
+
+        Raises:
+            ConnectTimeout: If the daemon can't be reached
+            DaemonError: If the daemon rejected the request
+        """
+        data = json.dumps(request).encode()
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    con = self._connect()
+                    con.send_bytes(data)
+                    reply = json.loads(con.recv_bytes())
+                    break
+                except (EOFError, OSError):
+                    self._drop()
+                    if attempt:
+                        raise
+        if "error" in reply:
+            raise DaemonError(reply["error"])
+        return reply
+
+    def show(self, spec: typing.Optional[dict] = None, **fields) -> dict:
+        """
+        Show one toast
+
+        Args:
+            spec: The toast, with the keys of `winotify --stream`
+            **fields: Same as `spec`
+
+        Returns:
+            The number of toasts accepted and the errors, see `Daemon.handle`
+        """
+        return self.show_many([dict(spec or {}, **fields)])
+
+    def show_many(self, specs: typing.Iterable[dict]) -> dict:
+        """
+        Show many toasts with a single request
+        """
+        return self.request({"op": "show", "toasts": list(specs)})
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            The daemon's `stats`
+        """
+        return self.request({"op": "stats"})["stats"]
+
+    def close(self):
+        with self._lock:
+            self._drop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
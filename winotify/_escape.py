@@ -0,0 +1,123 @@
+"""
+Validation and escaping of the values interpolated into toast XML and PowerShell scripts.
+
+Every value goes through a single `str.translate` call with a table built once at import, which removes the
+characters XML can't carry and escapes the ones special where the value lands:
+
+* text (title, message) is in a CDATA section, `]]>` is split across two sections
+* attributes (icon, launch url, button labels and urls) are entity-escaped
+* in a script, the toast XML is inside a double-quoted here-string, where `` ` `` and `$` are special and a line
+  starting with `"@` ends the string, so these and every kind of double quote PowerShell accepts are escaped
+  with a backtick
+* single-quoted PowerShell strings (app ids cleared, progress values) double every kind of single quote
+"""
+__all__ = ['validate', 'text', 'attribute', 'ps_string', 'ps_literal', 'MAX_TEXT', 'MAX_ATTRIBUTE', 'MAX_ACTIONS']
+
+MAX_TEXT = 4096  # characters of a title or message
+MAX_ATTRIBUTE = 2048  # characters of an icon path, url or button label
+MAX_ACTIONS = 5  # buttons of a toast, the most Windows shows
+
+# the characters XML 1.0 does not allow, removed. Lone surrogates can't be encoded either.
+_INVALID = dict.fromkeys([c for c in range(0x20) if c not in (0x9, 0xA, 0xD)] + list(range(0xD800, 0xE000)) +
+                         [0xFFFE, 0xFFFF], '')
+
+# whitespace too, parsers turn it into spaces in attributes
+_XML_ATTRIBUTE = {ord('&'): '&amp;', ord('<'): '&lt;', ord('>'): '&gt;', ord('"'): '&quot;', ord("'"): '&apos;',
+                  ord('\t'): '&#9;', ord('\n'): '&#10;', ord('\r'): '&#13;'}
+
+# in double-quoted strings and here-strings, PowerShell also takes the typographic quotes as quotes
+_PS_DOUBLE = {ord(c): '`' + c for c in '`$"\u201c\u201d\u201e'}
+_PS_SINGLE = {ord(c): c + c for c in "'\u2018\u2019\u201a\u201b"}
+
+
+# characters kept as they are, listed so `str.translate` finds them rather than handling a KeyError for each, which
+# is most of its cost: ASCII and Latin-1, and the general punctuation block where the typographic quotes are
+_KEPT = {c: chr(c) for c in [*range(0x100), *range(0x2000, 0x2070)]}
+
+
+def _compose(*tables) -> dict:
+    # one table doing what applying every table in turn does: the replacements of a table never contain characters
+    # a later table replaces, so a character is replaced by the first table having it
+    composed = dict(_KEPT)
+    for table in reversed(tables):
+        composed.update(table)
+    return composed
+
+
+XML_TEXT = _compose(_INVALID)
+XML_ATTRIBUTE = _compose(_INVALID, _XML_ATTRIBUTE)
+SCRIPT_TEXT = _compose(_INVALID, _PS_DOUBLE)
+SCRIPT_ATTRIBUTE = _compose(_INVALID, _XML_ATTRIBUTE, _PS_DOUBLE)
+PS_STRING = _compose(_INVALID, _PS_DOUBLE)
+PS_LITERAL = _compose(_INVALID, _PS_SINGLE)
+
+
+def text(value: str, script: bool = True) -> str:
+    """
+    Returns:
+        `value` safe inside `<![CDATA[...]]>`, and inside a PowerShell here-string if `script` is True
+    """
+    value = value.translate(SCRIPT_TEXT if script else XML_TEXT)
+    if "]]>" in value:
+        value = value.replace("]]>", "]]]]><![CDATA[>")
+    return value
+
+
+def attribute(value: str, script: bool = True) -> str:
+    """
+    Returns:
+        `value` safe inside a double-quoted XML attribute, and inside a PowerShell here-string if `script` is True
+    """
+    return value.translate(SCRIPT_ATTRIBUTE if script else XML_ATTRIBUTE)
+
+
+def ps_string(value: str) -> str:
+    """
+    Returns:
+        `value` safe inside a double-quoted PowerShell string
+    """
+    return value.translate(PS_STRING)
+
+
+def ps_literal(value: str) -> str:
+    """
+    Returns:
+        `value` safe inside a single-quoted PowerShell string
+    """
+    return value.translate(PS_LITERAL)
+
+
+_SCHEMES = ("file:", "http:", "https:", "ms-appx:", "ms-appdata:")
+
+
+def _is_absolute(path: str) -> bool:
+    # a Windows path even when checked elsewhere, eg. C:\icon.png or \\server\share\icon.png
+    return (len(path) > 2 and path[1] == ':' and path[2] in '\\/') or path.startswith(('\\\\', '/'))
+
+
+def validate(notification):
+    """
+    Check the values of `notification` against the limits toasts can show.
+
+    Raises:
+        ValueError: If a text, attribute or the icon path is too long, the icon path is not absolute, there are
+                    more than `MAX_ACTIONS` buttons or the duration is not 'short' or 'long'
+    """
+    for name in ('title', 'msg'):
+        if len(getattr(notification, name)) > MAX_TEXT:
+            raise ValueError("{} is longer than {} characters".format(name, MAX_TEXT))
+    icon = notification.icon
+    if icon:
+        if len(icon) > MAX_ATTRIBUTE:
+            raise ValueError("the icon path is longer than {} characters".format(MAX_ATTRIBUTE))
+        if not (icon.startswith(_SCHEMES) or _is_absolute(icon)):
+            raise ValueError("the icon path must be absolute: {!r}".format(icon))
+    if len(notification.launch) > MAX_ATTRIBUTE:
+        raise ValueError("the launch url is longer than {} characters".format(MAX_ATTRIBUTE))
+    if len(notification.actions) > MAX_ACTIONS:
+        raise ValueError("a toast can have at most {} actions".format(MAX_ACTIONS))
+    for label, url in notification.actions:
+        if len(label) > MAX_ATTRIBUTE or len(url) > MAX_ATTRIBUTE:
+            raise ValueError("an action label or url is longer than {} characters".format(MAX_ATTRIBUTE))
+    if notification.duration not in ("short", "long"):
+        raise ValueError("Duration is not 'short' or 'long'")
@@ -0,0 +1,167 @@
+"""
+Optional timing spans, counters and gauges on the hot paths.
+
+Instrumented code reads the module attribute `hook` and only measures anything when it is set,
+so a disabled hook costs one attribute lookup per call site.
+"""
+from time import perf_counter  # noqa: F401  (used by the instrumented modules)
+
+__all__ = ['Collector', 'set_hook']
+
+# spans, in seconds
+RENDER = "render"  # building a toast script
+LAUNCH = "launch"  # handing a script to the runner
+IPC_ACCEPT = "ipc.accept"  # from accepting a connection until a worker picks it up
+IPC_RECV = "ipc.recv"  # authenticating a connection and reading its message
+CALLBACK = "callback"  # running a callback function
+
+# counters
+TOASTS_SHOWN = "toasts.shown"
+CALLBACKS_DISPATCHED = "callbacks.dispatched"
+CALLBACKS_DROPPED = "callbacks.dropped"
+LAUNCH_ERRORS = "errors.launch"
+IPC_ERRORS = "errors.ipc"
+CALLBACK_ERRORS = "errors.callback"
+
+# gauges
+QUEUE_DEPTH = "queue.depth"  # main thread callbacks pending
+
+hook = None
+
+
+class _FunctionHook:
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+    def span(self, name, seconds):
+        self.func("span", name, seconds)
+
+    def count(self, name, value=1):
+        self.func("count", name, value)
+
+    def gauge(self, name, value):
+        self.func("gauge", name, value)
+
+
+def set_hook(new_hook):
+    """
+    Send measurements of the hot paths to `new_hook`, or stop measuring if it is None.
+
+    Args:
+        new_hook: An object with the methods `span(name, seconds)`, `count(name, value)` and
+                  `gauge(name, value)`, like `Collector`. A plain function is called as
+                  `func(kind, name, value)` instead, `kind` being "span", "count" or "gauge".
+                  Hooks are called from whichever thread did the work, and must not raise.
+
+    Examples:
+        ```python
+        collector = winotify.Collector()
+        winotify.set_hook(collector)
+        ...
+        print(collector.dump())
+        ```
+    """
+    global hook
+    if new_hook is not None and not hasattr(new_hook, 'span') and callable(new_hook):
+        new_hook = _FunctionHook(new_hook)
+    hook = new_hook
+
+
+class _SpanStats:
+    __slots__ = ('count', 'total', 'min', 'max', 'samples')
+
+    def __init__(self, max_samples):
+        from collections import deque
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def percentile(fraction):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1e3
+
+        return {"count": self.count,
+                "total_ms": self.total * 1e3,
+                "mean_ms": self.total / self.count * 1e3,
+                "min_ms": self.min * 1e3,
+                "max_ms": self.max * 1e3,
+                "p50_ms": percentile(0.5),
+                "p99_ms": percentile(0.99)}
+
+
+class Collector:
+    def __init__(self, max_samples: int = 1024):
+        """
+        A hook keeping every measurement in memory, see `set_hook`.
+
+        Args:
+            max_samples: The number of recent durations kept per span to compute percentiles,
+                         the count, total, min and max cover every span
+        """
+        import threading
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Forget every measurement
+        """
+        with self._lock:
+            self._spans = {}
+            self._counters = {}
+            self._gauges = {}
+
+    def span(self, name: str, seconds: float):
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = _SpanStats(self.max_samples)
+            stats.add(seconds)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            _, peak = self._gauges.get(name, (value, value))
+            self._gauges[name] = (value, max(peak, value))
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            The statistics of every span in milliseconds, the counters, and the last and highest value of
+            every gauge
+        """
+        with self._lock:
+            return {"spans": {name: stats.summary() for name, stats in self._spans.items()},
+                    "counters": dict(self._counters),
+                    "gauges": {name: {"last": last, "max": peak} for name, (last, peak) in self._gauges.items()}}
+
+    def dump(self, fp=None) -> str:
+        """
+        Args:
+            fp: A text file the summary is also written to
+
+        Returns:
+            The summary as JSON
+        """
+        import json
+        text = json.dumps(self.summary(), indent=2, sort_keys=True)
+        if fp is not None:
+            fp.write(text)
+        return text
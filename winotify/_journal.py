@@ -0,0 +1,254 @@
+"""
+An optional record of every toast shown, updated, cleared and clicked, kept in a sqlite database.
+
+Like `_instrument.hook`, the module attribute `journal` is read at each call site and nothing is recorded
+when it is None. Recording only appends to a queue, a background thread writes the events in batches.
+"""
+from __future__ import annotations
+
+import collections
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional
+
+__all__ = ['Journal', 'Event', 'set_journal', 'SHOW', 'UPDATE', 'CLEAR', 'ACTIVATE']
+
+# event kinds
+SHOW = "show"  # a toast was handed to the runner or backend, latency is how long that took for its batch
+UPDATE = "update"  # the data of a progress toast was updated, detail holds the values as JSON
+CLEAR = "clear"  # the toasts of an app were cleared from the action center
+ACTIVATE = "activate"  # a toast or button was clicked, detail holds the route and its arguments
+
+Event = collections.namedtuple('Event', 'time kind app_id tag group latency detail')
+
+journal = None
+
+_INSERT = "INSERT INTO events (time, kind, app_id, tag, grp, latency, detail) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    kind TEXT NOT NULL,
+    app_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    latency REAL,
+    detail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_time ON events (time);
+"""
+
+
+class Journal:
+    def __init__(self,
+                 path: str,
+                 *,
+                 flush_interval: float = 1.0,
+                 batch_size: int = 512,
+                 max_pending: int = 100000,
+                 retention: Optional[float] = 30 * 24 * 3600.0,
+                 compact_interval: float = 3600.0,
+                 clock=time.time):
+        """
+        An append-only journal of toast events in a sqlite database in WAL mode, see `set_journal`.
+
+        Args:
+            path: The database file, created if needed. Several processes can share it.
+            flush_interval: Seconds between writes of the recorded events
+            batch_size: Write as soon as this many events are waiting
+            max_pending: The oldest events waiting are dropped beyond this many, eg. while the database is locked
+            retention: Seconds events are kept, older ones are removed by `compact`. None keeps everything.
+            compact_interval: Seconds between the `compact` runs of the background thread
+            clock: Returns the current time in seconds since the epoch
+        """
+        import sqlite3
+        import threading
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self.clock = clock
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self._pending = collections.deque(maxlen=max_pending)
+        self._db = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # durable enough for a journal, and no fsync per write
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()  # serializes the use of the connection
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(name="winotify-journal", target=self._loop, daemon=True)
+        self._thread.start()
+        import atexit
+        atexit.register(self.close)
+
+    def record(self, kind: str, app_id: str = '', tag: str = '', group: str = '', latency: Optional[float] = None,
+               detail: str = ''):
+        """
+        Queue an event, it is written by the background thread
+        """
+        if detail.__class__ is not str:  # eg. an activation message, which can be any object
+            detail = str(detail)
+        pending = self._pending
+        size = len(pending)
+        if size == pending.maxlen:
+            self.dropped += 1
+        pending.append((self.clock(), kind, app_id, tag, group, latency, detail))
+        self.recorded += 1
+        if size + 1 == self.batch_size:  # wake the writer once, it takes everything waiting
+            self._wake.set()
+
+    def _loop(self):
+        next_compact = time.monotonic()
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if self.retention is not None and time.monotonic() >= next_compact:
+                    next_compact = time.monotonic() + self.compact_interval
+                    self.compact()
+            except Exception:
+                import traceback
+                traceback.print_exc()
+
+    def flush(self):
+        """
+        Write the events waiting, in a single transaction.
+
+        Events sqlite can't store are dropped and counted in `dropped`. If the database can't be written, eg. it
+        is locked, the events wait for the next flush and the error is raised.
+        """
+        import sqlite3
+        with self._lock:
+            if self._db is None:  # closed
+                return
+            pending = self._pending
+            rows = [pending.popleft() for _ in range(len(pending))]
+            if not rows:
+                return
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(_INSERT, rows)
+                self._db.execute("COMMIT")
+            except (sqlite3.InterfaceError, sqlite3.ProgrammingError):  # a value which can't be bound
+                self._db.execute("ROLLBACK")
+                self._write_each(rows)
+                return
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                self._requeue(rows)
+                raise
+            self.written += len(rows)
+
+    def _write_each(self, rows: list):
+        # called with the lock held: write the rows which can be bound, in one transaction, and drop the others
+        import sqlite3
+        self._db.execute("BEGIN")
+        try:
+            written = 0
+            for row in rows:
+                try:
+                    self._db.execute(_INSERT, row)
+                except (sqlite3.InterfaceError, sqlite3.ProgrammingError):
+                    self.dropped += 1
+                else:
+                    written += 1
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            self._requeue(rows)
+            raise
+        self.written += written
+
+    def _requeue(self, rows: list):
+        # put `rows` back in front of the events recorded since, dropping the oldest rather than the newest if
+        # they don't all fit
+        pending = self._pending
+        room = len(rows) if pending.maxlen is None else pending.maxlen - len(pending)
+        if room < len(rows):
+            self.dropped += len(rows) - room
+            rows = rows[len(rows) - room:]
+        pending.extendleft(reversed(rows))
+
+    def query(self, kind: Optional[str] = None, app_id: Optional[str] = None, tag: Optional[str] = None,
+              since: Optional[float] = None, limit: int = 100) -> List[Event]:
+        """
+        Returns:
+            The most recent `Event`s, newest first, optionally only those of one kind, app or tag,
+            or recorded after `since` (seconds since the epoch). Events still waiting are written first.
+
+        Examples:
+            ```python
+            for event in journal.query(ACTIVATE, since=time.time() - 3600):
+                print(event.tag, "was clicked at", time.ctime(event.time))
+            ```
+        """
+        self.flush()
+        conditions, params = [], []
+        for column, value in (("kind", kind), ("app_id", app_id), ("tag", tag)):
+            if value is not None:
+                conditions.append(column + " = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("time >= ?")
+            params.append(since)
+        sql = "SELECT time, kind, app_id, tag, grp, latency, detail FROM events"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY time DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [Event(*row) for row in self._db.execute(sql, params)]
+
+    def compact(self, retention: Optional[float] = None) -> int:
+        """
+        Remove the events older than `retention` seconds, defaults to the journal's retention,
+        and shrink the write-ahead log.
+
+        Returns:
+            The number of events removed
+        """
+        retention = self.retention if retention is None else retention
+        if retention is None:
+            return 0
+        with self._lock:
+            removed = self._db.execute("DELETE FROM events WHERE time < ?", (self.clock() - retention,)).rowcount
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def close(self):
+        """
+        Write the events waiting and close the database
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        with self._lock:
+            self._db.close()
+            self._db = None
+
+
+def set_journal(new_journal):
+    """
+    Record the events of every toast in `new_journal`, or stop recording if it is None.
+
+    Args:
+        new_journal: A `Journal`, or any object with the same `record` method
+
+    Examples:
+        ```python
+        winotify.set_journal(winotify.Journal(r"c:\\abs\\path\\to\\toasts.sqlite"))
+        ```
+    """
+    global journal
+    journal = new_journal
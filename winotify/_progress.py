@@ -0,0 +1,285 @@
+import json
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from winotify import Notification, _instrument, _journal, _run_ps, script_prefix
+from winotify._runner import get_runner
+from winotify._escape import ps_literal, ps_string
+from winotify._template import CompiledTemplate, xml_part
+
+__all__ = ['ProgressNotification', 'Debouncer']
+
+
+PROGRESS_TEMPLATE = r"""
+$Template = @"
+<toast {launch} duration="{duration}">
+    <visual>
+        <binding template="ToastGeneric">
+            <image placement="appLogoOverride" src="{icon}" />
+            <text><![CDATA[{title}]]></text>
+            <text><![CDATA[{msg}]]></text>
+            <progress title="{{progressTitle}}" value="{{progressValue}}"
+                      valueStringOverride="{{progressValueString}}" status="{{progressStatus}}" />
+        </binding>
+    </visual>
+    <actions>
+        {actions}
+    </actions>
+    {audio}
+</toast>
+"@
+
+$SerializedXml = New-Object Windows.Data.Xml.Dom.XmlDocument
+$SerializedXml.LoadXml($Template)
+
+$Toast = [Windows.UI.Notifications.ToastNotification]::new($SerializedXml)
+$Toast.Tag = "{tag}"
+$Toast.Group = "{group}"
+$Toast.Data = New-Object Windows.UI.Notifications.NotificationData
+{data}
+$Toast.Data.SequenceNumber = 1
+$Notifier.Show($Toast);
+"""
+
+UPDATE_TEMPLATE = r"""
+$Data = New-Object Windows.UI.Notifications.NotificationData
+{data}
+$Data.SequenceNumber = {sequence}
+$Notifier.Update($Data, "{tag}", "{group}") | Out-Null
+"""
+
+PROGRESS = CompiledTemplate(PROGRESS_TEMPLATE)
+PROGRESS_XML = CompiledTemplate(xml_part(PROGRESS_TEMPLATE))
+UPDATE = CompiledTemplate(UPDATE_TEMPLATE)
+
+# friendly names of the keys bound by the progress bar
+ALIASES = {
+    "value": "progressValue",
+    "status": "progressStatus",
+    "title": "progressTitle",
+    "value_string": "progressValueString",
+}
+
+
+def _values(values: Dict[str, object]) -> Dict[str, str]:
+    result = {}
+    for key, value in values.items():
+        if isinstance(value, float):
+            value = "{:.4f}".format(value)  # a progress value is a fraction between 0 and 1
+        result[ALIASES.get(key, key)] = str(value)
+    return result
+
+
+def _assignments(target: str, values: Dict[str, str]) -> str:
+    return '\n'.join("{}.Values['{}'] = '{}'".format(target, ps_literal(key), ps_literal(value))
+                     for key, value in values.items())
+
+
+class Debouncer:
+    def __init__(self,
+                 send: Callable[[Hashable, Dict[str, str], int], None],
+                 interval: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Merge updates per key, so at most one is being sent per key and one is sent every `interval` seconds.
+
+        The first update of a key is sent right away. Updates arriving while it is sent, or less than `interval`
+        seconds after, are merged and sent together when the interval is over, the newest value of a key wins.
+
+        Args:
+            send: Called with the key, the merged values and a sequence number increasing per key
+            interval: The minimum number of seconds between two updates of a key
+            clock: Returns the current time in seconds
+        """
+        self.send = send
+        self.interval = interval
+        self.clock = clock
+        self.sent = 0
+        self.merged = 0
+        self._lock = threading.Lock()
+        self._state = {}  # type: Dict[Hashable, _KeyState]
+
+    def submit(self, key: Hashable, values: Dict[str, str]):
+        """
+        Send `values` for `key` now, or merge them into the next update of `key`
+        """
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                self._prune()
+                state = self._state[key] = _KeyState()
+            if state.pending:
+                self.merged += 1
+            state.pending.update(values)
+            if state.busy or state.timer is not None:
+                return
+            delay = state.last + self.interval - self.clock()
+            if delay > 0:
+                self._schedule(key, state, delay)
+                return
+            state.busy = True
+        self._flush(key, state)
+
+    def _schedule(self, key: Hashable, state: '_KeyState', delay: float):
+        state.timer = threading.Timer(delay, self._fire, args=(key, state))
+        state.timer.daemon = True
+        state.timer.start()
+
+    def _fire(self, key: Hashable, state: '_KeyState'):
+        with self._lock:
+            state.timer = None
+            if state.busy:
+                return
+            state.busy = True
+        self._flush(key, state)
+
+    def _flush(self, key: Hashable, state: '_KeyState'):
+        with self._lock:
+            values, state.pending = state.pending, {}
+            state.sequence += 1
+            sequence = state.sequence
+        try:
+            if values:
+                self.send(key, values, sequence)
+                self.sent += 1
+        finally:
+            with self._lock:
+                state.busy = False
+                state.last = self.clock()
+                if state.pending:
+                    self._schedule(key, state, self.interval)
+
+    def _prune(self):
+        # forget idle keys, they would be sent right away anyway
+        if len(self._state) < 1024:
+            return
+        now = self.clock()
+        self._state = {key: state for key, state in self._state.items()
+                       if state.busy or state.timer is not None or state.pending
+                       or now - state.last < self.interval}
+
+    def flush(self):
+        """
+        Send every pending update now, ignoring the interval
+        """
+        with self._lock:
+            ready = []
+            for key, state in self._state.items():
+                if state.timer is not None and not state.busy:
+                    state.timer.cancel()
+                    state.timer = None
+                    state.busy = True
+                    ready.append((key, state))
+        for key, state in ready:
+            self._flush(key, state)
+
+
+class _KeyState:
+    __slots__ = ('pending', 'busy', 'timer', 'last', 'sequence')
+
+    def __init__(self):
+        self.pending = {}  # type: Dict[str, str]
+        self.busy = False
+        self.timer = None  # type: Optional[threading.Timer]
+        self.last = float('-inf')
+        self.sequence = 1  # the toast itself is shown with sequence number 1
+
+
+def _send_update(key: Tuple[str, str, str, object], values: Dict[str, str], sequence: int):
+    app_id, group, tag, backend = key
+    backend = backend or get_runner()
+    journal = _journal.journal
+    start = _instrument.perf_counter() if journal is not None else 0.0
+    update = getattr(backend, 'update', None)  # backends showing toasts without PowerShell update them too
+    if update is not None:
+        update(app_id, tag, group, values, sequence)
+    else:
+        _run_ps(command=script_prefix(app_id) + UPDATE.render(data=_assignments("$Data", values),
+                                                              sequence=str(sequence),
+                                                              tag=ps_string(tag),
+                                                              group=ps_string(group)),
+                runner=backend)
+    if journal is not None:
+        journal.record(_journal.UPDATE, app_id, tag, group, _instrument.perf_counter() - start,
+                       json.dumps(values, sort_keys=True))
+
+
+debouncer = Debouncer(_send_update)
+
+
+class ProgressNotification(Notification):
+    __slots__ = ('data', 'backend')
+
+    def __init__(self,
+                 app_id: str,
+                 title: str,
+                 msg: str = "",
+                 icon: str = "",
+                 duration: str = 'short',
+                 launch: str = '',
+                 *,
+                 value: object = 0.0,
+                 status: str = '',
+                 progress_title: str = '',
+                 value_string: str = '',
+                 data: Optional[Dict[str, object]] = None,
+                 backend=None):
+        """
+        A notification with a progress bar, which can be updated in place with `update`.
+
+        The progress bar is bound to the data keys `progressValue`, `progressStatus`, `progressTitle` and
+        `progressValueString`. `data` can bind more keys, use `{key}` in the title or message to show them.
+
+        Args:
+            value: The progress as a fraction between 0 and 1, or 'indeterminate'
+            status: The text shown below the progress bar
+            progress_title: The text shown above the progress bar
+            value_string: The text shown instead of the percentage
+            data: Values of other keys bound in the toast
+            backend: Where the toast and its updates are sent instead of the current runner, also set by `show`
+
+        See Also:
+            `Notification` for the other arguments
+        """
+        super().__init__(app_id, title, msg, icon, duration, launch)
+        self.data = _values(dict(value=value, status=status, title=progress_title, value_string=value_string))
+        if data:
+            self.data.update(_values(data))
+        self.backend = backend
+
+    def show(self, batch=None, backend=None):
+        """
+        Same as `Notification.show`, `update` then sends to the same backend
+        """
+        if backend is not None:
+            self.backend = backend  # updates go where the toast is
+        super().show(batch, self.backend)
+
+    def _render(self) -> str:
+        return PROGRESS.render(data=_assignments("$Toast.Data", self.data), **self._fields())
+
+    def _xml(self) -> str:
+        return PROGRESS_XML.render(**self._fields(script=False))
+
+    def update(self, values: Optional[Dict[str, object]] = None, **kwargs):
+        """
+        Update the bound values of the toast already shown, only the given keys are sent.
+
+        Updates are debounced, at most one is sent per toast every half second, the newest values win.
+
+        Args:
+            values: The keys to update, `value`, `status`, `title` and `value_string` can be used as the names
+                    of the progress bar keys
+            **kwargs: Same as `values`
+
+        Examples:
+            ```python
+            toast = ProgressNotification("my app", "Downloading", status="starting")
+            toast.show()
+            toast.update(value=0.5, status="halfway there")
+            ```
+        """
+        values = _values(dict(values or {}, **kwargs))
+        self.data.update(values)
+        debouncer.submit((self.app_id, self.group, self.tag, self.backend), values)
@@ -1,8 +1,7 @@
+import os
 from os import path
 import sys
-import winreg
 
-HKEY = winreg.HKEY_CURRENT_USER
 SUBKEY = r"SOFTWARE\Classes\{}"
 SHELLKEY = r"shell\open\command"
 
@@ -19,13 +18,16 @@ class P:
 PY_EXE = P(path.join(path.dirname(sys.executable), "python.exe"), "PY_EXE")
 # path to pythonw.exe
 PYW_EXE = P(path.join(path.dirname(sys.executable), "pythonw.exe"), "PYW_EXE")
+# the fast activation entry point, see Registry(fast_activation=True)
+ACTIVATE_SCRIPT = path.join(path.dirname(path.abspath(__file__)), "_activate.py")
 
 
 class InvalidKeyStructure(Exception): pass
 
 
 class Registry:
-    def __init__(self, app_id: str, executable=PY_EXE, script_path: str = '', *, force_override=False):
+    def __init__(self, app_id: str, executable=PY_EXE, script_path: str = '', *, force_override=False,
+                 fast_activation=False, stamp_dir: str = '', winreg=None):
         """
         register app_id to Windows Registry as a protocol,
         eg. the app_id is "My Awesome App" can be called from browser or run.exe by typing "my-awesome-app:[Params]"
@@ -40,6 +42,14 @@ class Registry:
             script_path: The script path, usually `__file__`.
             force_override: If True, force replace the exists registry value in Windows Registry. Default is False.
                             Set it True if you want to change default interpreter or script path.
+            fast_activation: If True, a click is handled by a tiny stdlib-only script that forwards it to the
+                             running app, instead of starting `script_path` just to forward it. The script is
+                             still started when the app is not running.
+            stamp_dir: Where to remember that the registration is up to date, so the next start only checks
+                       when the key was last modified instead of reading every value. Defaults to a directory
+                       in the temp directory, None disables it.
+            winreg: The module used to access the registry, anything with the same functions as `winreg`
+                    (eg. an in-memory fake in tests). Defaults to `winreg`.
 
         Raises:
             InvalidKeyStructure: If `force_override` is True but the registry value is not created by winotify or
@@ -51,37 +61,115 @@ class Registry:
         self.executable = executable
         self.path = script_path
         self._override = force_override
+        self.fast_activation = fast_activation
+        self.stamp_dir = stamp_dir
+        self.writes = 0  # values written by the last registration, 0 when everything was already up to date
 
+        if winreg is None:
+            import winreg  # only needed once a Registry is created, keeps `import winotify` light
+        self.winreg = winreg
         self.reg = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
         self._register()
 
+    @property
+    def command(self) -> str:
+        """
+        Returns:
+            The command Windows runs when a notification of this app is clicked
+        """
+        if self.fast_activation:
+            return f'"{self.executable}" "{ACTIVATE_SCRIPT}" "{self.app_id}" "{self.path}" "%1"'
+        return f'{self.executable} {self.path} %1'
+
     def _validate_structure(self):
-        key = winreg.OpenKey(self.reg, self._key)
+        key = self.winreg.OpenKey(self.reg, self._key)
         try:
-            winreg.OpenKey(key, SHELLKEY).Close()
-        except WindowsError:
+            self.winreg.OpenKey(key, SHELLKEY).Close()
+        except OSError:
             raise InvalidKeyStructure(f'The registry from "{self.app}" was not created by winotify or the structure '
                                       f'is invalid')
 
     def _key_exist(self) -> bool:
         try:
-            winreg.OpenKey(HKEY, self._key).Close()
+            self.winreg.OpenKey(self.winreg.HKEY_CURRENT_USER, self._key).Close()
             return True
-        except WindowsError:
+        except OSError:
+            return False
+
+    @property
+    def stamp_path(self) -> str:
+        """
+        Returns:
+            The stamp file of this app id, executable and script path, or '' if stamps are disabled
+        """
+        if self.stamp_dir is None:
+            return ''
+        import hashlib
+        directory = self.stamp_dir
+        if not directory:
+            import tempfile
+            directory = path.join(tempfile.gettempdir(), "winotify-registry")
+        digest = hashlib.sha256("\0".join((self.app_id, str(self.executable), self.path)).encode()).hexdigest()
+        return path.join(directory, f"{self.app}-{digest[:16]}.stamp")
+
+    def _modified(self) -> str:
+        # last write times of the protocol key and the command key, writing or removing one of their values changes
+        # the time of the key holding it
+        with self.winreg.OpenKey(self.reg, self._key) as key:
+            protocol = self.winreg.QueryInfoKey(key)[2]
+        with self.winreg.OpenKey(self.reg, self._key + "\\" + SHELLKEY) as key:
+            command = self.winreg.QueryInfoKey(key)[2]
+        return f"{protocol} {command}"
+
+    def _stamp(self) -> str:
+        return f"{self.command}\n{self._modified()}"
+
+    def _is_current(self, stamp_path: str) -> bool:
+        try:
+            with open(stamp_path, encoding='utf-8') as f:
+                return f.read() == self._stamp()
+        except OSError:
             return False
 
+    def _write_stamp(self, stamp_path: str):
+        try:
+            os.makedirs(path.dirname(stamp_path), exist_ok=True)
+            tmp = f"{stamp_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(self._stamp())
+            os.replace(tmp, stamp_path)
+        except OSError:
+            pass  # the stamp only saves time on the next start
+
+    def _set(self, key, name: str, value: str):
+        # write `value` only if it differs, writes are much slower than reads as they are flushed to the hive
+        try:
+            if self.winreg.QueryValueEx(key, name)[0] == value:
+                return
+        except OSError:
+            pass
+        self.winreg.SetValueEx(key, name, 0, self.winreg.REG_SZ, value)
+        self.writes += 1
+
     def _register(self):
+        self.writes = 0
+        stamp_path = self.stamp_path
+        if stamp_path and not self._override and self._is_current(stamp_path):
+            return
 
         if self._key_exist() and self._override:
             self._validate_structure()  # validate
 
-        key = winreg.CreateKey(self.reg, self._key)
+        key = self.winreg.CreateKey(self.reg, self._key)
         with key:
-            winreg.SetValueEx(key, '', 0, winreg.REG_SZ, f"URL:{self.app}")
-            winreg.SetValueEx(key, 'URL Protocol', 0, winreg.REG_SZ, '')
-            subkey = winreg.CreateKey(key, SHELLKEY)
+            self._set(key, '', f"URL:{self.app}")
+            self._set(key, 'URL Protocol', '')
+            subkey = self.winreg.CreateKey(key, SHELLKEY)
             with subkey:
-                winreg.SetValueEx(subkey, '', 0, winreg.REG_SZ, f'{self.executable} {self.path} %1')
+                self._set(subkey, '', self.command)
+
+        if stamp_path:
+            self._write_stamp(stamp_path)
 
 
 def format_name(name: str):
@@ -0,0 +1,298 @@
+"""
+Activation urls carrying arguments, and the store of the contexts too large to fit in them.
+
+The url of a callback is `app-id:route`, or `app-id:route?key=value;key=value` when it carries arguments.
+Values are percent-encoded, so a url never contains characters special to XML or to PowerShell strings.
+The part after the app id is the target sent to the running app, see `parse_target`.
+"""
+import functools
+import json
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import quote, unquote
+
+__all__ = ['ContextStore', 'SqliteContextStore', 'encode_target', 'parse_target', 'add_token', 'bind', 'resolve',
+           'TOKEN_KEY', 'MAX_INLINE']
+
+# the argument naming the contexts kept in a `ContextStore` rather than in the url, their tokens separated by commas.
+# Each context is a dict of keyword arguments of the callback.
+TOKEN_KEY = "~"
+
+# arguments encoded longer than this are kept in the store, Windows truncates long activation arguments
+MAX_INLINE = 1024
+
+
+def _sizeof(value: Any) -> int:
+    # a rough size of a context in memory, following containers
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(v) for v in value)
+    return size
+
+
+class ContextStore:
+    def __init__(self, max_entries: int = 1024, ttl: float = 24 * 3600.0, max_bytes: int = 4 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Per-toast context, kept in memory under a short token which the activation url carries instead.
+
+        Args:
+            max_entries: The maximum number of contexts kept, the least recently used one is removed first
+            ttl: Seconds a context is kept after it is put, a toast clicked later than this finds nothing
+            max_bytes: The maximum size of the contexts kept, estimated with `sys.getsizeof`
+            clock: Returns the current time in seconds
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.evicted = 0
+        self.expired = 0
+        self.size = 0
+        self._items = OrderedDict()  # type: OrderedDict  # token -> (deadline, size, value), least recent first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            self._expire(self.clock())
+            return len(self._items)
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token, self) is not self
+
+    def put(self, value: Any) -> str:
+        """
+        Returns:
+            A new token for `value`
+
+        Raises:
+            ValueError: If `value` alone is larger than `max_bytes`
+        """
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            raise ValueError("the context is larger than {} bytes".format(self.max_bytes))
+        token = secrets.token_urlsafe(9)
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            self._items[token] = (now + self.ttl, size, value)
+            self.size += size
+            while len(self._items) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._items)))
+                self.evicted += 1
+        return token
+
+    def get(self, token: str, default: Any = None) -> Any:
+        """
+        Returns:
+            The value of `token`, or `default` if it expired, was evicted or never existed
+        """
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            item = self._items.get(token)
+            if item is None:
+                return default
+            if item[0] <= now:
+                self._remove(token)
+                self.expired += 1
+                return default
+            self._items.move_to_end(token)
+        return item[2]
+
+    def _remove(self, token: str):
+        self.size -= self._items.pop(token)[1]
+
+    def _expire(self, now: float):
+        # the least recently used entries are usually the oldest, an expired entry further back is removed when
+        # it is looked up or evicted
+        items = self._items
+        while items:
+            token = next(iter(items))
+            if items[token][0] > now:
+                break
+            self._remove(token)
+            self.expired += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+class SqliteContextStore(ContextStore):
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = 24 * 3600.0,
+                 max_bytes: int = 4 * 1024 * 1024, clock: Callable[[], float] = time.time):
+        """
+        A `ContextStore` in a sqlite database, so a context is still found when the toast is clicked after the
+        app exited and the click starts it again. Several processes can share the same file.
+
+        Contexts must be serializable to JSON, their size is the size of their JSON.
+
+        Args:
+            path: The database file, created if needed
+            max_entries: See `ContextStore`
+            ttl: See `ContextStore`
+            max_bytes: See `ContextStore`
+            clock: Returns the current time in seconds, it must be the same in every process sharing the file
+        """
+        super().__init__(max_entries, ttl, max_bytes, clock)
+        import sqlite3
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._db.execute("CREATE TABLE IF NOT EXISTS contexts (token TEXT PRIMARY KEY, deadline REAL, "
+                             "used REAL, size INTEGER, value TEXT)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS contexts_used ON contexts (used)")
+
+    def __len__(self):
+        with self._lock:
+            self._db.execute("DELETE FROM contexts WHERE deadline <= ?", (self.clock(),))
+            return self._db.execute("SELECT COUNT(*) FROM contexts").fetchone()[0]
+
+    def put(self, value: Any) -> str:
+        data = json.dumps(value, separators=(',', ':'))
+        size = len(data)
+        if size > self.max_bytes:
+            raise ValueError("the context is larger than {} bytes".format(self.max_bytes))
+        token = secrets.token_urlsafe(9)
+        now = self.clock()
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self.expired += db.execute("DELETE FROM contexts WHERE deadline <= ?", (now,)).rowcount
+                db.execute("INSERT INTO contexts VALUES (?, ?, ?, ?, ?)", (token, now + self.ttl, now, size, data))
+                count, self.size = db.execute("SELECT COUNT(*), SUM(size) FROM contexts").fetchone()
+                if count > self.max_entries or self.size > self.max_bytes:
+                    for old, old_size in db.execute("SELECT token, size FROM contexts ORDER BY used").fetchall():
+                        if count <= self.max_entries and self.size <= self.max_bytes:
+                            break
+                        db.execute("DELETE FROM contexts WHERE token = ?", (old,))
+                        count -= 1
+                        self.size -= old_size
+                        self.evicted += 1
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return token
+
+    def get(self, token: str, default: Any = None) -> Any:
+        now = self.clock()
+        with self._lock:
+            row = self._db.execute("SELECT deadline, value FROM contexts WHERE token = ?", (token,)).fetchone()
+            if row is None:
+                return default
+            if row[0] <= now:
+                self._db.execute("DELETE FROM contexts WHERE token = ?", (token,))
+                self.expired += 1
+                return default
+            self._db.execute("UPDATE contexts SET used = ? WHERE token = ?", (now, token))
+        return json.loads(row[1])
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM contexts")
+            self.size = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def encode_target(route: str, args: Dict[str, Any], store: Optional[ContextStore] = None) -> str:
+    """
+    Returns:
+        `route` followed by `args`, converted to strings. If they would make the url longer than `MAX_INLINE`,
+        they are put in `store` and only their token is encoded.
+
+    Raises:
+        ValueError: If an argument is named `TOKEN_KEY`, or the arguments are too long and there is no store
+    """
+    route = quote(route, safe='')
+    if not args:
+        return route
+    if TOKEN_KEY in args:
+        raise ValueError("{!r} is reserved".format(TOKEN_KEY))
+    args = {key: str(value) for key, value in args.items()}
+    query = ";".join(quote(key, safe='') + "=" + quote(value, safe='') for key, value in args.items())
+    if len(query) > MAX_INLINE:
+        if store is None:
+            raise ValueError("the arguments are longer than {} characters".format(MAX_INLINE))
+        query = TOKEN_KEY + "=" + store.put(args)
+    return route + "?" + query
+
+
+def parse_target(target: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split the part of an activation url after the app id into the route and its arguments.
+
+    Examples:
+        ```python
+        >>> parse_target("open?id=42;path=C%3A%5Cfile.txt")
+        ('open', {'id': '42', 'path': 'C:\\\\file.txt'})
+        ```
+    """
+    route, _, query = target.partition("?")
+    route = unquote(route)
+    args = {}
+    if query:
+        for pair in query.split(";"):
+            key, _, value = pair.partition("=")
+            args[unquote(key)] = unquote(value)
+    return route, args
+
+
+def add_token(url: str, token: str) -> str:
+    """
+    Returns:
+        `url` also carrying the context of `token`, eg. the context of the toast a button belongs to
+    """
+    head, sep, query = url.partition("?")
+    if not sep:
+        return "{}?{}={}".format(url, TOKEN_KEY, token)
+    if query.rpartition(";")[2].startswith(TOKEN_KEY + "="):
+        return url + "," + token
+    return "{};{}={}".format(url, TOKEN_KEY, token)
+
+
+def bind(func: Callable, args: Dict[str, Any]) -> Callable:
+    """
+    Returns:
+        `func` called with `args` as keyword arguments, keeping what dispatching looks at (name, main thread flag)
+    """
+    if not args:
+        return func
+    bound = functools.partial(func, **args)
+    bound.__name__ = getattr(func, '__name__', 'callback')
+    if hasattr(func, 'rimt'):
+        bound.rimt = func.rimt
+    return bound
+
+
+def resolve(target: str, callbacks: Dict[str, Callable], store: Optional[ContextStore] = None) -> Callable:
+    """
+    Returns:
+        The callback of the route in `target` bound to its arguments, or a function reporting why there is none
+    """
+    route, args = parse_target(target)
+    func = callbacks.get(route)
+    if func is None:
+        return lambda: print(f'no such callbacks: {route}')
+    tokens = args.pop(TOKEN_KEY, None)
+    if tokens is not None:
+        for token in tokens.split(","):
+            context = store.get(token) if store is not None else None
+            if context is None:
+                return lambda: print(f'the context of {route} expired')
+            args.update(context)
+    return bind(func, args)
@@ -0,0 +1,701 @@
+import atexit
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional
+
+__all__ = ['ProcessRunner', 'ProcessPool', 'ProcessFailure', 'HostRunner', 'ScriptCache', 'get_runner', 'set_runner']
+
+POWERSHELL = "powershell.exe"
+
+# CreateProcess refuses command lines longer than 32767 characters, longer scripts are run from a file instead
+MAX_COMMAND_LINE = 30000
+
+# scripts left by a process which exited are removed by the next one, once they are this many seconds old
+STALE_SCRIPTS = 24 * 3600
+
+# The host loads the WinRT types once, then evaluates every framed script it receives on stdin.
+# A frame is a decimal length (in UTF-16 code units, which is what .NET counts) on its own line,
+# followed by exactly that many characters of script.
+HOST_SCRIPT = r"""
+[Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] > $null
+[Windows.UI.Notifications.ToastNotification, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
+[Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
+[Windows.UI.Notifications.NotificationData, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
+$In = New-Object System.IO.StreamReader([Console]::OpenStandardInput(), [System.Text.Encoding]::UTF8)
+while ($true) {
+    $Header = $In.ReadLine()
+    if ($Header -eq $null) { break }
+    $Length = [int]$Header
+    $Buffer = New-Object char[] $Length
+    $Read = 0
+    while ($Read -lt $Length) {
+        $Count = $In.Read($Buffer, $Read, $Length - $Read)
+        if ($Count -le 0) { exit }
+        $Read += $Count
+    }
+    try { Invoke-Expression (-join $Buffer) } catch { [Console]::Error.WriteLine($_) }
+}
+"""
+
+
+def startupinfo():
+    # STARTUPINFO only exists on Windows, runners are still usable elsewhere with a substitute command
+    if not hasattr(subprocess, 'STARTUPINFO'):
+        return None
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return si
+
+
+def _check_args(file: str, command: str):
+    if (file and command) or not (file or command):
+        raise ValueError("exactly one of file or command must be given")
+
+
+def frame(script: str) -> bytes:
+    """
+    Encode `script` as a single host message.
+
+    Args:
+        script: The PowerShell script to send
+
+    Returns:
+        The UTF-8 encoded frame, a length header followed by the script
+    """
+    units = len(script.encode('utf-16-le')) // 2
+    return "{}\n{}".format(units, script).encode('utf-8')
+
+
+class ScriptCache:
+    def __init__(self, max_entries: int = 64, directory: str = '', grace: float = 30.0):
+        """
+        Scripts written to files named after their content, so identical toasts reuse the same file.
+
+        Files are kept in a private directory under the temp directory. At exit, the files used within the grace
+        period are left in it, the next `ScriptCache` created removes them once they are `STALE_SCRIPTS` old.
+
+        Args:
+            max_entries: The maximum number of files kept, the least recently used one is removed first
+            directory: Where to create the private directory, defaults to the temp directory
+            grace: A file used less than this many seconds ago is not removed yet, as a PowerShell process may
+                   not have opened it
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.grace = grace
+        _sweep(directory or tempfile.gettempdir())
+        self.directory = tempfile.mkdtemp(prefix=_PREFIX, dir=directory or None)
+        self.hits = 0
+        self.misses = 0
+        self._files = OrderedDict()  # digest -> last use
+        self._evicted = []  # (path, last use) still within the grace period
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def __len__(self):
+        return len(self._files)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + ".ps1")
+
+    def path(self, script: str) -> str:
+        """
+        Returns:
+            The path of a file containing `script`, written if it is not cached yet
+        """
+        digest = hashlib.sha256(script.encode('utf-8')).hexdigest()
+        path = self._path(digest)
+        now = time.monotonic()
+        with self._lock:
+            if digest in self._files:
+                try:
+                    os.utime(path)  # so another process doesn't sweep it, see `STALE_SCRIPTS`
+                except OSError:
+                    del self._files[digest]
+                else:
+                    self.hits += 1
+                    self._files.move_to_end(digest)
+                    self._files[digest] = now
+                    return path
+
+            self.misses += 1
+            os.makedirs(self.directory, exist_ok=True)  # in case clear() was called
+            tmp = path + ".tmp"
+            # Windows PowerShell reads files without a BOM in the ANSI code page
+            with open(tmp, 'w', encoding='utf-8-sig') as f:
+                f.write(script)
+            os.replace(tmp, path)
+            self._files[digest] = now
+
+            while len(self._files) > self.max_entries:
+                old, used = self._files.popitem(last=False)
+                self._evicted.append((self._path(old), used))
+            self._purge(now)
+        return path
+
+    def _purge(self, now: float):
+        keep = []
+        for path, used in self._evicted:
+            if now - used < self.grace:
+                keep.append((path, used))
+            else:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    keep.append((path, used))
+        self._evicted = keep
+
+    def clear(self):
+        """
+        Remove every cached file and the private directory
+        """
+        with self._lock:
+            self._files.clear()
+            self._evicted = []
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _at_exit(self):
+        # the runners don't wait for PowerShell, which may not have opened its file yet: like evicted files, those
+        # used within the grace period are kept, and the directory with them
+        with self._lock:
+            self._evicted.extend((self._path(digest), used) for digest, used in self._files.items())
+            self._files.clear()
+            self._purge(time.monotonic())
+            if not self._evicted:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_PREFIX = "winotify-scripts-"
+_swept = set()  # the directories already swept by this process
+_caches = []  # type: List[ScriptCache]
+
+
+def _at_exit():
+    for cache in _caches:
+        cache._at_exit()
+
+
+# registered at import, before any runner, so it runs after them: `ProcessPool` starts its waiting scripts at exit
+atexit.register(_at_exit)
+
+
+def _sweep(parent: str):
+    # remove the stale scripts left by the processes which exited, and their directories once they are empty
+    if parent in _swept:
+        return
+    _swept.add(parent)
+    deadline = time.time() - STALE_SCRIPTS
+    try:
+        directories = [entry.path for entry in os.scandir(parent) if entry.name.startswith(_PREFIX) and entry.is_dir()]
+    except OSError:
+        return
+    for directory in directories:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.stat().st_mtime < deadline:
+                        os.unlink(entry.path)
+            os.rmdir(directory)  # fails unless it is empty
+        except OSError:
+            pass
+
+
+_spill = None  # type: Optional[ScriptCache]
+
+
+def _spill_cache() -> ScriptCache:
+    # where the scripts too long for a command line are written, when the runner has no cache of its own
+    global _spill
+    if _spill is None:
+        _spill = ScriptCache(grace=300.0)  # a script may wait in a `ProcessPool` queue before it is opened
+    return _spill
+
+
+class ProcessRunner:
+    def __init__(self, executable: str = POWERSHELL, cache: Optional[ScriptCache] = None):
+        """
+        Run every script in a new PowerShell process, without waiting for it nor checking how it went.
+
+        See `ProcessPool`, the default runner, which limits the number of processes running at once.
+
+        Args:
+            executable: The PowerShell executable
+            cache: If given, scripts are written to files in this cache and run with `-file`, instead of being passed
+                   on the command line, which is parsed from scratch every time. Without it, only the scripts
+                   too long for a command line (`MAX_COMMAND_LINE`) are written to files.
+        """
+        self.executable = executable
+        self.cache = cache
+
+    def command(self, *, file: str = '', command: str = '') -> List[str]:
+        """
+        Returns:
+            The command line running the script `file` or `command`
+        """
+        _check_args(file, command)
+        if command and self.cache is not None:
+            file, command = self.cache.path(command), ''
+
+        cmd = [self.executable, "-ExecutionPolicy", "Bypass"]
+        if command and len(command) > MAX_COMMAND_LINE // 2:  # quoting at most doubles its length
+            if len(subprocess.list2cmdline(cmd + ["-Command", command])) > MAX_COMMAND_LINE:
+                file, command = _spill_cache().path(command), ''
+        if file:
+            cmd.extend(["-file", file])
+        else:
+            cmd.extend(["-Command", command])
+        return cmd
+
+    def __call__(self, *, file: str = '', command: str = ''):
+        subprocess.Popen(
+            self.command(file=file, command=command),
+            # stdin, stdout, and stderr have to be defined here, because windows tries to duplicate these if not null
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,  # set to null because we don't need the output :)
+            stderr=subprocess.DEVNULL,
+            startupinfo=startupinfo()
+        )
+
+    def close(self):
+        pass
+
+
+class ProcessFailure:
+    __slots__ = ('cmd', 'returncode', 'stderr', 'latency')
+
+    def __init__(self, cmd: List[str], returncode: Optional[int], stderr: str, latency: float):
+        """
+        A script that failed, passed to the `on_failure` callback of a `ProcessPool`.
+
+        Args:
+            cmd: The command line of the process
+            returncode: Its exit code, None if it could not be started
+            stderr: The end of what it wrote to stderr, or why it could not be started
+            latency: Seconds from the script being submitted to the process exiting
+        """
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr = stderr
+        self.latency = latency
+
+    def __repr__(self):
+        return "ProcessFailure(returncode={!r}, stderr={!r})".format(self.returncode, self.stderr)
+
+
+class _Child:
+    __slots__ = ('proc', 'cmd', 'submitted', 'started', 'stderr', 'done')
+
+    def __init__(self, proc: subprocess.Popen, cmd: List[str], submitted: float, started: float, stderr, done):
+        self.proc = proc
+        self.cmd = cmd
+        self.submitted = submitted
+        self.started = started
+        self.stderr = stderr
+        self.done = done
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    # samples must be sorted
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class ProcessPool(ProcessRunner):
+    def __init__(self,
+                 executable: str = POWERSHELL,
+                 cache: Optional[ScriptCache] = None,
+                 *,
+                 max_processes: int = 4,
+                 max_pending: int = 1000,
+                 on_failure: Optional[Callable[[ProcessFailure], None]] = None,
+                 poll_interval: float = 0.02,
+                 stderr_limit: int = 4096,
+                 history: int = 1024):
+        """
+        Run every script in a new PowerShell process, with at most `max_processes` of them at once.
+
+        Scripts submitted while that many processes are running wait in a queue. A background thread reaps the
+        processes which exited, starts the waiting scripts and reports the failures: the exit code and the end
+        of stderr of every process which did not exit with 0. This is the default runner. A script run from a file
+        is written when its process starts, so waiting in the queue doesn't eat into the grace period of the cache.
+
+        Args:
+            executable: The PowerShell executable, any command accepting the same arguments will do, eg. in tests
+            cache: See `ProcessRunner`
+            max_processes: The maximum number of processes running at once
+            max_pending: Submitting a script blocks while this many are waiting
+            on_failure: Called from the background thread with a `ProcessFailure` for every failed script
+            poll_interval: Seconds between checks of the running processes
+            stderr_limit: The number of bytes at the end of stderr kept for a failure
+            history: The number of most recent latencies `stats` are computed from
+
+        Examples:
+            ```python
+            def report(failure):
+                logging.warning("toast failed with %s: %s", failure.returncode, failure.stderr)
+
+            winotify.set_runner(winotify.ProcessPool(max_processes=2, on_failure=report))
+            ```
+        """
+        if max_processes < 1 or max_pending < 1:
+            raise ValueError("max_processes and max_pending must be at least 1")
+        super().__init__(executable, cache)
+        self.max_processes = max_processes
+        self.max_pending = max_pending
+        self.on_failure = on_failure
+        self.poll_interval = poll_interval
+        self.stderr_limit = stderr_limit
+        self.launched = 0
+        self.completed = 0
+        self.failed = 0
+        self.failures = deque(maxlen=16)  # type: Deque[ProcessFailure]
+        self._latencies = deque(maxlen=history)  # type: Deque[float]
+        self._waits = deque(maxlen=history)  # type: Deque[float]
+        self._queue = deque()  # type: Deque  # (file, command, submitted, done)
+        self._finished = []  # (done, exit code), called once the lock is released
+        self._running = []  # type: List[_Child]
+        self._cond = threading.Condition()
+        self._reaper = None  # type: Optional[threading.Thread]
+        self._stop = False
+        atexit.register(self._at_exit)
+
+    def __call__(self, *, file: str = '', command: str = '', done: Optional[Callable[[Optional[int]], None]] = None):
+        """
+        Run the script `file` or `command` once fewer than `max_processes` are running.
+
+        Args:
+            done: Called with the exit code of the process once it exited, or None if it could not be started or
+                  the pool was closed first. It is called from the background thread, or this one.
+        """
+        _check_args(file, command)
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._queue) < self.max_pending)
+            self._queue.append((file, command, time.monotonic(), done))
+            failures = self._start_ready()
+            if self._reaper is None or not self._reaper.is_alive():
+                self._stop = False
+                self._reaper = threading.Thread(name="winotify-reaper", target=self._reap, daemon=True)
+                self._reaper.start()
+            self._cond.notify_all()
+            finished, self._finished = self._finished, []
+        self._report(failures, finished)
+
+    def _launch(self, file: str, command: str, submitted: float, done) -> Optional[ProcessFailure]:
+        stderr = tempfile.TemporaryFile()  # unlike a pipe, never blocks a chatty process
+        cmd = [self.executable]
+        try:
+            # only now, so the grace period of a script written to a file starts when the process opens it
+            cmd = self.command(file=file, command=command)
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr,
+                startupinfo=startupinfo()
+            )
+        except OSError as e:
+            stderr.close()
+            self.failed += 1
+            if done is not None:
+                self._finished.append((done, None))
+            return self._failure(ProcessFailure(cmd, None, str(e), time.monotonic() - submitted))
+        now = time.monotonic()
+        self.launched += 1
+        self._waits.append(now - submitted)
+        self._running.append(_Child(proc, cmd, submitted, now, stderr, done))
+        return None
+
+    def _start_ready(self) -> List[ProcessFailure]:
+        # called with the lock held, the failures are reported after it is released
+        failures = []
+        while self._queue and len(self._running) < self.max_processes:
+            failure = self._launch(*self._queue.popleft())
+            if failure is not None:
+                failures.append(failure)
+        return failures
+
+    def _failure(self, failure: ProcessFailure) -> ProcessFailure:
+        self.failures.append(failure)
+        return failure
+
+    def _tail(self, stderr) -> str:
+        stderr.seek(0, os.SEEK_END)
+        stderr.seek(max(0, stderr.tell() - self.stderr_limit))
+        return stderr.read().decode('utf-8', 'replace')
+
+    def _collect(self) -> List[ProcessFailure]:
+        # called with the lock held
+        failures = []
+        now = time.monotonic()
+        running = []
+        for child in self._running:
+            code = child.proc.poll()
+            if code is None:
+                running.append(child)
+                continue
+            with child.stderr:
+                latency = now - child.submitted
+                self._latencies.append(latency)
+                if code == 0:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                    failures.append(self._failure(ProcessFailure(child.cmd, code, self._tail(child.stderr), latency)))
+            if child.done is not None:
+                self._finished.append((child.done, code))
+        if len(running) != len(self._running):
+            self._running = running
+            self._cond.notify_all()
+        return failures
+
+    def _reap(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._running or self._stop)
+                if self._stop and not self._running:
+                    return
+                failures = self._collect()
+                failures += self._start_ready()
+                finished, self._finished = self._finished, []
+            self._report(failures, finished)
+            time.sleep(self.poll_interval)
+
+    def _report(self, failures: List[ProcessFailure], finished: List = ()):
+        calls = list(finished)
+        if self.on_failure is not None:
+            calls += [(self.on_failure, failure) for failure in failures]
+        for func, arg in calls:
+            try:
+                func(arg)
+            except Exception:
+                import traceback
+                traceback.print_exc()
+
+    @property
+    def running(self) -> int:
+        """
+        Returns:
+            The number of processes running
+        """
+        return len(self._running)
+
+    @property
+    def pending(self) -> int:
+        """
+        Returns:
+            The number of scripts waiting for a process
+        """
+        return len(self._queue)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Counters of processes launched, completed and failed, the number running and pending, and the median and
+            99th percentile in milliseconds of the latency, from a script being submitted to its process exiting,
+            and of the wait in the queue, over the most recent scripts
+        """
+        with self._cond:
+            latencies = sorted(self._latencies)
+            waits = sorted(self._waits)
+            stats = {"launched": self.launched, "completed": self.completed, "failed": self.failed,
+                     "running": len(self._running), "pending": len(self._queue)}
+        stats["latency_p50_ms"] = _percentile(latencies, 0.5) * 1000
+        stats["latency_p99_ms"] = _percentile(latencies, 0.99) * 1000
+        stats["wait_p50_ms"] = _percentile(waits, 0.5) * 1000
+        stats["wait_p99_ms"] = _percentile(waits, 0.99) * 1000
+        return stats
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every submitted script has run
+
+        Returns:
+            False if scripts are still pending or running after `timeout` seconds
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not (self._queue or self._running), timeout)
+
+    def close(self, timeout: float = 5.0):
+        """
+        Wait up to `timeout` seconds for the submitted scripts to run, then stop the background thread.
+
+        Processes still running are left to finish on their own, and scripts still waiting are dropped.
+        The pool is started again if another script is submitted.
+        """
+        self.wait(timeout)
+        with self._cond:
+            dropped = [entry[-1] for entry in self._queue]
+            self._queue.clear()
+            self._stop = True
+            reaper, self._reaper = self._reaper, None
+            self._cond.notify_all()
+        if reaper is not None and reaper is not threading.current_thread():
+            reaper.join(timeout)
+        with self._cond:
+            for child in self._running:
+                child.stderr.close()
+                dropped.append(child.done)
+            self._running = []
+            finished, self._finished = self._finished, []
+        self._report([], finished + [(done, None) for done in dropped if done is not None])
+
+    def _at_exit(self):
+        # start every waiting script rather than losing it, as `ProcessRunner` would have, without waiting for them
+        with self._cond:
+            while self._queue:
+                self._launch(*self._queue.popleft())
+
+
+class HostRunner:
+    def __init__(self, cmd: Optional[List[str]] = None, *, shutdown_timeout: float = 2.0):
+        """
+        Run every script in one long-lived PowerShell process.
+
+        The host is started lazily on the first script, restarted if it crashes, and shut down at exit.
+
+        Args:
+            cmd: The command that starts the host, it must read framed scripts (see `frame`) from stdin.
+                 Defaults to PowerShell running `HOST_SCRIPT`.
+            shutdown_timeout: Seconds to wait for the host to exit after its stdin is closed before killing it.
+        """
+        if cmd is None:
+            cmd = [POWERSHELL, "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass",
+                   "-Command", HOST_SCRIPT]
+        self.cmd = list(cmd)
+        self.shutdown_timeout = shutdown_timeout
+        self.restarts = 0
+        self._proc = None  # type: Optional[subprocess.Popen]
+        self._started = False
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @property
+    def pid(self) -> Optional[int]:
+        """
+        Returns:
+            The pid of the running host, or None if it is not running
+        """
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            return proc.pid
+        return None
+
+    def _ensure(self) -> subprocess.Popen:
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            if self._started:
+                self.restarts += 1
+            self._discard()
+            proc = self._proc = subprocess.Popen(
+                self.cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                startupinfo=startupinfo()
+            )
+            self._started = True
+        return proc
+
+    def send(self, script: str):
+        """
+        Send `script` to the host, (re)starting it if needed.
+
+        Args:
+            script: The PowerShell script to evaluate
+
+        Raises:
+            OSError: If the host could not be reached even after a restart
+        """
+        data = frame(script)
+        with self._lock:
+            try:
+                self._write(data)
+            except (OSError, ValueError):
+                # the host died between the liveness check and the write, try once with a fresh one
+                self._discard()
+                self._write(data)
+
+    def _write(self, data: bytes):
+        proc = self._ensure()
+        proc.stdin.write(data)
+        proc.stdin.flush()
+
+    def _discard(self):
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            if proc.poll() is None:
+                proc.kill()
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass  # the pipe is broken, buffered data can't be flushed
+            proc.wait()
+
+    def __call__(self, *, file: str = '', command: str = ''):
+        _check_args(file, command)
+        if file:
+            command = ". '{}'".format(file.replace("'", "''"))
+        self.send(command)
+
+    def close(self):
+        """
+        Shut the host down, it will be started again if another script is sent.
+        """
+        with self._lock:
+            proc, self._proc = self._proc, None
+            self._started = False
+            if proc is None:
+                return
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+            try:
+                proc.wait(self.shutdown_timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+
+_current = None  # type: Optional[ProcessRunner]
+
+
+def get_runner():
+    """
+    Returns:
+        The runner used to execute PowerShell scripts
+    """
+    global _current
+    if _current is None:
+        _current = ProcessPool()
+    return _current
+
+
+def set_runner(runner):
+    """
+    Replace the runner used to execute PowerShell scripts, the previous runner is closed.
+
+    Args:
+        runner: A callable accepting the keyword arguments `file` and `command`, with a `close` method.
+                Use `HostRunner()` to keep a single PowerShell process alive instead of one per toast.
+
+    Examples:
+        ```python
+        import winotify
+
+        winotify.set_runner(winotify.HostRunner())
+        ```
+    """
+    global _current
+    old, _current = _current, runner
+    if old is not None and old is not runner:
+        old.close()
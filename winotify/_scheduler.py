@@ -0,0 +1,271 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from winotify import Batch, Notification, _escape
+
+__all__ = ['Scheduler', 'TokenBucket']
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, now: float):
+        """
+        Allow `rate` events per second on average, and up to `burst` at once.
+
+        Args:
+            rate: Tokens added per second
+            burst: The maximum number of tokens
+            now: The current time
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = now
+
+    def _refill(self, now: float):
+        if now > self.last:
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+    def take(self, now: float) -> bool:
+        """
+        Returns:
+            True if a token was available and taken
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        """
+        Returns:
+            Seconds until a token is available
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Entry:
+    __slots__ = ('notification', 'priority', 'seq')
+
+    def __init__(self, notification: Notification, priority: int, seq: int):
+        self.notification = notification
+        self.priority = priority
+        self.seq = seq
+
+
+def _show(notifications: List[Notification]):
+    if len(notifications) == 1:
+        notifications[0].show()
+    else:
+        with Batch() as batch:
+            for notif in notifications:
+                batch.add(notif)
+
+
+class Scheduler:
+    def __init__(self,
+                 rate: float = 2.0,
+                 burst: int = 5,
+                 coalesce_window: float = 1.0,
+                 *,
+                 max_pending: int = 1000,
+                 show: Callable[[List[Notification]], None] = _show,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Rate limit and coalesce toasts before showing them.
+
+        Every `app_id`/`group` pair gets its own token bucket. A toast with the same `app_id`, `group` and `tag`
+        as one shown less than `coalesce_window` seconds ago waits until the window is over, and is replaced by
+        any newer toast with that tag in the meantime, so only the latest content is shown. When the budget is
+        tight, toasts with a higher priority are shown first, then the oldest.
+
+        Args:
+            rate: Toasts per second allowed for each `app_id`/`group`
+            burst: Toasts that can be shown at once for each `app_id`/`group`
+            coalesce_window: Seconds during which toasts with the same tag are merged
+            max_pending: The maximum number of waiting toasts, when full the lowest priority toast is dropped
+            show: Called with every list of toasts ready at the same time, defaults to showing them in one batch
+            clock: Returns the current time in seconds
+
+        Examples:
+            ```python
+            scheduler = Scheduler(rate=1, burst=3)
+            scheduler.start()
+            scheduler.submit(toast, priority=10)
+            toast.show(batch=scheduler)  # same as scheduler.submit(toast)
+            ```
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.coalesce_window = coalesce_window
+        self.max_pending = max_pending
+        self.show = show
+        self.clock = clock
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.shown = 0
+        self._pending = {}  # type: Dict[Tuple[str, str, str], _Entry]
+        self._buckets = {}  # type: Dict[Tuple[str, str], TokenBucket]
+        self._last_shown = {}  # type: Dict[Tuple[str, str, str], float]
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None  # type: Optional[threading.Thread]
+        self._running = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, notification: Notification, priority: int = 0) -> bool:
+        """
+        Queue `notification` to be shown as soon as the rate limit allows.
+
+        Args:
+            notification: The toast to show
+            priority: Higher priorities are shown first
+
+        Returns:
+            False if the toast was dropped because the queue is full of toasts with a higher priority
+
+        Raises:
+            ValueError: If `notification` is over the limits of a toast
+        """
+        _escape.validate(notification)
+        key = (notification.app_id, notification.group, notification.tag)
+        with self._cond:
+            self.submitted += 1
+            self._seq += 1
+            entry = self._pending.get(key)
+            if entry is not None:
+                self.coalesced += 1
+                entry.notification = notification
+                entry.priority = max(entry.priority, priority)
+            else:
+                if len(self._pending) >= self.max_pending:
+                    lowest_key, lowest = min(self._pending.items(), key=lambda kv: (kv[1].priority, -kv[1].seq))
+                    if lowest.priority >= priority:
+                        self.dropped += 1
+                        return False
+                    del self._pending[lowest_key]
+                    self.dropped += 1
+                self._pending[key] = _Entry(notification, priority, self._seq)
+            self._cond.notify()
+        return True
+
+    add = submit  # so a scheduler can be passed to `Notification.show(batch=...)`
+
+    def _bucket(self, app_id: str, group: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get((app_id, group))
+        if bucket is None:
+            bucket = self._buckets[(app_id, group)] = TokenBucket(self.rate, self.burst, now)
+        return bucket
+
+    def _ready(self, now: float) -> Tuple[List[Notification], Optional[float]]:
+        # pop every toast allowed now, and tell how long until the next one might be
+        ready = []
+        wait = None
+        ordered = sorted(self._pending.items(), key=lambda kv: (-kv[1].priority, kv[1].seq))
+        for key, entry in ordered:
+            window_end = self._last_shown.get(key, float('-inf')) + self.coalesce_window
+            if now < window_end:
+                delay = window_end - now
+            else:
+                bucket = self._bucket(key[0], key[1], now)
+                if bucket.take(now):
+                    del self._pending[key]
+                    self._last_shown[key] = now
+                    ready.append(entry.notification)
+                    continue
+                delay = bucket.wait_time(now)
+            wait = delay if wait is None else min(wait, delay)
+        self._forget(now)
+        return ready, wait
+
+    def _forget(self, now: float):
+        # tags and buckets that can't affect scheduling anymore
+        if len(self._last_shown) > 4 * self.max_pending:
+            self._last_shown = {key: t for key, t in self._last_shown.items() if now - t < self.coalesce_window}
+        if len(self._buckets) > 4 * self.max_pending:
+            for bucket in self._buckets.values():
+                bucket.wait_time(now)  # refill
+            self._buckets = {key: b for key, b in self._buckets.items() if b.tokens < b.burst}
+
+    def pump(self) -> Optional[float]:
+        """
+        Show every toast allowed right now. Called by the worker thread, or manually when it is not started.
+
+        Returns:
+            Seconds until another toast may be ready, or None if nothing is pending
+        """
+        with self._cond:
+            ready, wait = self._ready(self.clock())
+            self.shown += len(ready)
+        if ready:
+            self.show(ready)
+        return wait
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or not self._running)
+                if not self._running:
+                    return
+            try:
+                wait = self.pump()
+            except Exception:  # eg. the runner failed, keep showing the next toasts
+                import traceback
+                traceback.print_exc()
+                wait = None
+            if wait is not None:
+                with self._cond:
+                    if self._running:
+                        self._cond.wait(wait)
+
+    def start(self):
+        """
+        Start the worker thread showing toasts in the background
+        """
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(name="winotify-scheduler", target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = False):
+        """
+        Stop the worker thread
+
+        Args:
+            flush: If True, show all pending toasts right away, ignoring the rate limit
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            pending = [entry.notification for entry in
+                       sorted(self._pending.values(), key=lambda e: (-e.priority, e.seq))] if flush else []
+            if flush:
+                self._pending.clear()
+                self.shown += len(pending)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if pending:
+            self.show(pending)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Counters of toasts submitted, coalesced, dropped and shown, and the number still pending
+        """
+        with self._cond:
+            return {"submitted": self.submitted, "coalesced": self.coalesced, "dropped": self.dropped,
+                    "shown": self.shown, "pending": len(self._pending)}
@@ -0,0 +1,153 @@
+from winotify._escape import ps_string
+
+__all__ = ['CompiledTemplate', 'PREAMBLE', 'NOTIFIER_TEMPLATE', 'TOAST_TEMPLATE', 'TOAST', 'TOAST_XML', 'XML',
+           'CLEAR_TEMPLATE', 'script_prefix', 'xml_part']
+
+
+PREAMBLE = r"""
+[Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] > $null
+[Windows.UI.Notifications.ToastNotification, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
+[Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
+[Windows.UI.Notifications.NotificationData, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
+"""
+
+NOTIFIER_TEMPLATE = r"""
+$Notifier = [Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("{app_id}")
+"""
+
+TOAST_TEMPLATE = r"""
+$Template = @"
+<toast {launch} duration="{duration}">
+    <visual>
+        <binding template="ToastImageAndText02">
+            <image id="1" src="{icon}" />
+            <text id="1"><![CDATA[{title}]]></text>
+            <text id="2"><![CDATA[{msg}]]></text>
+        </binding>
+    </visual>
+    <actions>
+        {actions}
+    </actions>
+    {audio}
+</toast>
+"@
+
+$SerializedXml = New-Object Windows.Data.Xml.Dom.XmlDocument
+$SerializedXml.LoadXml($Template)
+
+$Toast = [Windows.UI.Notifications.ToastNotification]::new($SerializedXml)
+$Toast.Tag = "{tag}"
+$Toast.Group = "{group}"
+$Notifier.Show($Toast);
+"""
+
+
+def xml_part(template: str) -> str:
+    """
+    Returns:
+        The `<toast>` element of a script template, for backends showing toasts without PowerShell
+    """
+    return template[template.index('<toast'):template.index('</toast>') + len('</toast>')]
+
+
+TOAST_XML = xml_part(TOAST_TEMPLATE)
+
+ACTION_TEMPLATE = '<action activationType="protocol" content="{label}" arguments="{link}" />'
+
+CLEAR_TEMPLATE = r"""
+[Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] > $null
+[Windows.UI.Notifications.ToastNotificationManager]::History.Clear('{app_id}')
+"""
+
+
+def _parse(template: str):
+    # yields (literal, field) like string.Formatter.parse, for plain `{name}` fields only, without importing string
+    # and re. field is None after the last literal.
+    literal = []
+    i, n = 0, len(template)
+    while i < n:
+        start = template.find('{', i)
+        end = template.find('}', i)
+        if start == -1 and end == -1:
+            literal.append(template[i:])
+            break
+        if end != -1 and (start == -1 or end < start):  # a closing brace comes first, it must be doubled
+            if template[end + 1:end + 2] != '}':
+                raise ValueError("single '}' encountered in template")
+            literal.append(template[i:end + 1])
+            i = end + 2
+            continue
+        literal.append(template[i:start])
+        if template[start + 1:start + 2] == '{':
+            literal.append('{')
+            i = start + 2
+            continue
+        close = template.find('}', start)
+        if close == -1:
+            raise ValueError("single '{' encountered in template")
+        field = template[start + 1:close]
+        if not field or '{' in field or '!' in field or ':' in field:
+            raise ValueError("unsupported field {!r} in template".format(field))
+        yield ''.join(literal), field
+        literal = []
+        i = close + 1
+    if literal:
+        yield ''.join(literal), None
+
+
+class CompiledTemplate:
+    def __init__(self, template: str):
+        """
+        A `str.format` template parsed once, rendering only fills the fields in.
+
+        Only plain `{name}` fields are supported, without conversion or format spec.
+
+        Args:
+            template: The template string
+        """
+        self.template = template
+        parts = []
+        slots = []
+        for literal, field in _parse(template):
+            if literal:
+                parts.append(literal)
+            if field is not None:
+                slots.append((len(parts), field))
+                parts.append('')
+        self._parts = parts
+        self._slots = tuple(slots)
+        self.fields = tuple(dict.fromkeys(name for _, name in slots))
+
+    def render(self, **values) -> str:
+        """
+        Returns:
+            The template with every field replaced by `values[field]`
+
+        Raises:
+            KeyError: If a field is missing from `values`
+        """
+        parts = self._parts[:]
+        for i, name in self._slots:
+            parts[i] = values[name]
+        return ''.join(parts)
+
+
+TOAST = CompiledTemplate(TOAST_TEMPLATE)
+XML = CompiledTemplate(TOAST_XML)
+
+
+_prefixes = {}
+
+
+def script_prefix(app_id: str) -> str:
+    """
+    Returns:
+        The constant start of every script showing toasts for `app_id`, which defines `$Notifier`
+    """
+    try:
+        return _prefixes[app_id]
+    except KeyError:
+        if len(_prefixes) >= 64:
+            _prefixes.clear()
+        prefix = _prefixes[app_id] = PREAMBLE + NOTIFIER_TEMPLATE.format(app_id=ps_string(app_id))
+        return prefix
@@ -1,4 +1,6 @@
 class Sound:
+    __slots__ = ('s',)
+
     def __init__(self, s):
         self.s = s
 